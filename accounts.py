@@ -0,0 +1,391 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from currency import record_amount
+
+"""
+Dezy's Budget Tracker - Accounts Module
+
+This module adds accounts (checking, savings, cash), savings goals and
+net-worth tracking on top of the expense and income records.
+
+Each record may name the account it was paid from or into; records without one
+belong to the default account. BalanceLedger keeps, per account, the signed
+amounts in date order plus a cumulative balance checkpoint every
+CHECKPOINT_INTERVAL rows, so the balance on any date is a bisect to the date,
+a jump to the nearest checkpoint and a scan of fewer than CHECKPOINT_INTERVAL
+rows, instead of a replay of the whole ledger.
+
+The ledger is built in one pass and then kept current through the operations
+listener hooks; inserting or removing a row only adjusts the checkpoints after
+it. Balances are in the base currency (see currency.py).
+"""
+
+DEFAULT_ACCOUNT = "checking"
+ACCOUNT_TYPES = ("checking", "savings", "cash")
+CHECKPOINT_INTERVAL = 64
+
+class Account:
+    """
+    Represents a place money is kept.
+
+    Attributes:
+        name (str): The account name, as stored on records
+        account_type (str): One of ACCOUNT_TYPES
+        opening_balance (float): Balance before the first record, in the base currency
+    """
+    def __init__(self, name, account_type="checking", opening_balance=0.0):
+        if not name or not name.strip():
+            raise ValueError("Account name cannot be empty")
+        if account_type not in ACCOUNT_TYPES:
+            raise ValueError(f"Account type must be one of: {', '.join(ACCOUNT_TYPES)}")
+        self.name = name.strip().lower()
+        self.account_type = account_type
+        self.opening_balance = float(opening_balance)
+
+    def to_dict(self):
+        """
+        Convert the account to a dictionary for storage.
+        """
+        return {
+            "name": self.name,
+            "type": self.account_type,
+            "opening_balance": self.opening_balance
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create an Account object from dictionary data.
+        """
+        return cls(data["name"], data.get("type", "checking"), data.get("opening_balance", 0.0))
+
+class SavingsGoal:
+    """
+    Represents a target balance for an account.
+
+    Attributes:
+        name (str): The goal name
+        target (float): The balance to reach, in the base currency
+        account (str): The account whose balance counts towards the goal
+        target_date (str): Date to reach the goal by (YYYY-MM-DD), or None
+    """
+    def __init__(self, name, target, account, target_date=None):
+        if not name or not name.strip():
+            raise ValueError("Goal name cannot be empty")
+        if float(target) <= 0:
+            raise ValueError("Target must be greater than 0")
+        self.name = name.strip()
+        self.target = float(target)
+        self.account = account
+        self.target_date = target_date
+
+    def to_dict(self):
+        """
+        Convert the goal to a dictionary for storage.
+        """
+        return {
+            "name": self.name,
+            "target": self.target,
+            "account": self.account,
+            "target_date": self.target_date
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a SavingsGoal object from dictionary data.
+        """
+        return cls(data["name"], data["target"], data["account"], data.get("target_date"))
+
+def record_account(record):
+    """
+    Get the account a record belongs to.
+    """
+    return record.account or DEFAULT_ACCOUNT
+
+def signed_amount(record, kind, rates=None):
+    """
+    Get a record's effect on its account's balance in the base currency.
+
+    Args:
+        record (Expense or Income): The record
+        kind (str): "expense" or "income"
+        rates (RateTable): The rate table to convert with (default: the active one)
+
+    Returns:
+        float: Negative for expenses, positive for incomes
+    """
+    amount = record_amount(record, rates)
+    return -amount if kind == "expense" else amount
+
+class BalanceLedger:
+    """
+    Running balances per account with periodic checkpoints.
+
+    For each account the rows are kept as two aligned lists sorted by date
+    (dates and signed amounts), and checkpoints[c] holds the sum of the first
+    c * interval amounts.
+
+    Attributes:
+        accounts (list): The Account objects (shared with the ledger, so new accounts are seen)
+        interval (int): Rows between checkpoints
+        rates (RateTable): The ledger's rate table, or None for the active one
+    """
+    def __init__(self, accounts, interval=CHECKPOINT_INTERVAL, rates=None):
+        self.accounts = accounts
+        self.interval = interval
+        self.rates = rates
+        self._dates = {}        # Format: {account: sorted list of dates}
+        self._amounts = {}      # Format: {account: list of signed amounts, aligned with _dates}
+        self._checkpoints = {}  # Format: {account: [0.0, sum of first interval rows, ...]}
+
+    @classmethod
+    def build(cls, accounts, expenses, incomes, interval=CHECKPOINT_INTERVAL, rates=None):
+        """
+        Build the balances from the full ledger in one pass per account.
+
+        Args:
+            accounts (list): List of Account objects
+            expenses (list): List of Expense objects
+            incomes (list): List of Income objects
+            interval (int): Rows between checkpoints
+            rates (RateTable): The ledger's rate table, or None for the active one
+
+        Returns:
+            BalanceLedger: The populated ledger
+        """
+        ledger = cls(accounts, interval, rates)
+        rows = {}  # Format: {account: [(date, signed amount)]}
+        for kind, records in (("expense", expenses), ("income", incomes)):
+            for record in records:
+                rows.setdefault(record_account(record), []).append((record.date, signed_amount(record, kind, rates)))
+        for account, entries in rows.items():
+            entries.sort(key=lambda entry: entry[0])
+            ledger._dates[account] = [entry[0] for entry in entries]
+            amounts = ledger._amounts[account] = [entry[1] for entry in entries]
+            checkpoints = ledger._checkpoints[account] = [0.0]
+            running = 0.0
+            for position, amount in enumerate(amounts, 1):
+                running += amount
+                if position % interval == 0:
+                    checkpoints.append(running)
+        return ledger
+
+    def to_dict(self):
+        """
+        Convert the balances to plain data for the sidecar cache.
+        """
+        return {"interval": self.interval, "dates": self._dates, "amounts": self._amounts, "checkpoints": self._checkpoints}
+
+    @classmethod
+    def from_dict(cls, data, accounts):
+        """
+        Create balances from data returned by to_dict.
+
+        Args:
+            data (dict): The stored balances
+            accounts (list): List of Account objects
+
+        Returns:
+            BalanceLedger: The balances
+        """
+        ledger = cls(accounts, data["interval"])
+        ledger._dates = data["dates"]
+        ledger._amounts = data["amounts"]
+        ledger._checkpoints = data["checkpoints"]
+        return ledger
+
+    def add(self, account, date_str, amount):
+        """
+        Insert one row, after any rows on the same date.
+
+        The checkpoints after the row each gain its amount and lose the amount
+        pushed past their boundary.
+
+        Args:
+            account (str): The account name
+            date_str (str): Date in YYYY-MM-DD format
+            amount (float): Signed amount in the base currency
+        """
+        dates = self._dates.setdefault(account, [])
+        amounts = self._amounts.setdefault(account, [])
+        checkpoints = self._checkpoints.setdefault(account, [0.0])
+        position = bisect_right(dates, date_str)
+        dates.insert(position, date_str)
+        amounts.insert(position, amount)
+
+        interval = self.interval
+        for block in range(position // interval + 1, len(checkpoints)):
+            checkpoints[block] += amount - amounts[block * interval]
+        if len(amounts) % interval == 0:
+            checkpoints.append(checkpoints[-1] + sum(amounts[-interval:]))
+
+    def remove(self, account, date_str, amount):
+        """
+        Remove one row with the given date and amount.
+
+        Args:
+            account (str): The account name
+            date_str (str): Date in YYYY-MM-DD format
+            amount (float): Signed amount in the base currency
+
+        Raises:
+            ValueError: If no such row exists
+        """
+        dates = self._dates.get(account, [])
+        amounts = self._amounts.get(account, [])
+        checkpoints = self._checkpoints.get(account, [0.0])
+        position = bisect_left(dates, date_str)
+        end = bisect_right(dates, date_str, position)
+        while position < end and amounts[position] != amount:
+            position += 1
+        if position == end:
+            raise ValueError(f"No {date_str} row of {amount:.2f} in account '{account}'")
+        del dates[position]
+        del amounts[position]
+
+        interval = self.interval
+        if len(checkpoints) - 1 > len(amounts) // interval:
+            checkpoints.pop()
+        for block in range(position // interval + 1, len(checkpoints)):
+            checkpoints[block] += amounts[block * interval - 1] - amount
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that keeps the balances in sync with the ledger.
+
+        Args:
+            action (str): "add", "delete" or "set"
+            kind (str): "expense", "income" or "budget"
+            record (Expense or Income): The changed record
+            index (int): Position of the record in its list (unused)
+        """
+        if kind not in ("expense", "income"):
+            return
+        if action == "add":
+            self.add(record_account(record), record.date, signed_amount(record, kind, self.rates))
+        elif action == "delete":
+            self.remove(record_account(record), record.date, signed_amount(record, kind, self.rates))
+
+    def _opening_balance(self, account):
+        for candidate in self.accounts:
+            if candidate.name == account:
+                return candidate.opening_balance
+        return 0.0
+
+    def balance(self, account, date_str=None):
+        """
+        Get an account's balance at the end of a date.
+
+        Args:
+            account (str): The account name
+            date_str (str): Date in YYYY-MM-DD format, or None for the current balance
+
+        Returns:
+            float: Opening balance plus every row up to and including the date
+        """
+        amounts = self._amounts.get(account, [])
+        position = len(amounts) if date_str is None else bisect_right(self._dates.get(account, []), date_str)
+        block = position // self.interval
+        total = self._checkpoints.get(account, [0.0])[block]
+        for i in range(block * self.interval, position):
+            total += amounts[i]
+        return self._opening_balance(account) + total
+
+    def account_names(self):
+        """
+        Get every account name: the defined accounts, then any only named on records.
+        """
+        names = [account.name for account in self.accounts]
+        return names + sorted(name for name in self._amounts if name not in names)
+
+    def net_worth(self, date_str=None):
+        """
+        Get the sum of every account's balance at the end of a date.
+
+        Args:
+            date_str (str): Date in YYYY-MM-DD format, or None for now
+
+        Returns:
+            float: The net worth in the base currency
+        """
+        return sum(self.balance(name, date_str) for name in self.account_names())
+
+    def goal_progress(self, goal, today=None):
+        """
+        Measure progress towards a savings goal.
+
+        Args:
+            goal (SavingsGoal): The goal
+            today (str): Date in YYYY-MM-DD format, or None for today
+
+        Returns:
+            dict: Format: {"saved": float, "percent": float, "remaining": float,
+                           "last_30_days": float, "monthly_needed": float or None}
+        """
+        today = today or date.today().isoformat()
+        saved = self.balance(goal.account, today)
+        month_ago = (date.fromisoformat(today) - timedelta(days=30)).isoformat()
+        remaining = max(goal.target - saved, 0.0)
+        monthly_needed = None
+        if goal.target_date and remaining:
+            end = date.fromisoformat(goal.target_date)
+            start = date.fromisoformat(today)
+            months = max((end.year - start.year) * 12 + end.month - start.month, 1)
+            monthly_needed = remaining / months
+        return {
+            "saved": saved,
+            "percent": saved / goal.target * 100,
+            "remaining": remaining,
+            "last_30_days": saved - self.balance(goal.account, month_ago),
+            "monthly_needed": monthly_needed
+        }
+
+## Input ----------------------------------------------------------------------------------------------------------------------------
+# The accounts of the active ledger
+_active_accounts = []
+
+def set_accounts(accounts):
+    """
+    Make a list of accounts the one offered when adding records.
+
+    Args:
+        accounts (list): List of Account objects
+    """
+    global _active_accounts
+    _active_accounts = accounts
+
+def find_account(accounts, name):
+    """
+    Look up an account by name (case-insensitive).
+
+    Raises:
+        ValueError: If there is no such account
+    """
+    name = name.strip().lower()
+    for account in accounts:
+        if account.name == name:
+            return account
+    raise ValueError(f"No account named '{name}'")
+
+def prompt_account():
+    """
+    Ask for the account of a new record, defaulting to the default account.
+
+    Nothing is asked while the ledger has a single account.
+
+    Returns:
+        str: The account name, or None for the default account
+    """
+    if len(_active_accounts) < 2:
+        return None
+    names = ", ".join(account.name for account in _active_accounts)
+    while True:
+        name = input(f"Enter account ({names}) or leave empty for {DEFAULT_ACCOUNT}: ").strip()
+        if not name:
+            return None
+        try:
+            account = find_account(_active_accounts, name).name
+            return None if account == DEFAULT_ACCOUNT else account
+        except ValueError as e:
+            print(f"Error: {e}")
@@ -0,0 +1,244 @@
+import heapq
+import random
+from currency import format_amount, record_amount
+
+"""
+Dezy's Budget Tracker - Analysis Module
+
+This module contains the ranking and distribution queries for the budget tracker.
+It answers questions such as "largest 20 expenses this month", "median grocery bill"
+and "transactions above the 99th percentile".
+
+None of these queries sort the whole ledger:
+- Top-N queries use a bounded heap (heapq.nlargest), O(n log k)
+- Percentiles and medians use quickselect, O(n) on average
+- Outliers reuse the percentile threshold and only sort the (small) result
+
+Amounts are ranked and compared in the base currency.
+"""
+
+## Helpers -----------------------------------------------------------------------------------------------------------------------------
+def filter_expenses(expenses, month=None, category=None):
+    """
+    Yield the expenses matching an optional month and category.
+
+    Args:
+        expenses (list): List of Expense objects
+        month (str): Month in YYYY-MM format, or None for all months
+        category (str): Category name, or None for all categories
+
+    Yields:
+        Expense: Each matching expense
+    """
+    for expense in expenses:
+        # A whole-month comparison, so "2024-1" cannot match 2024-10 to 2024-12
+        if month and expense.date[:7] != month:
+            continue
+        if category and expense.category.lower() != category.lower():
+            continue
+        yield expense
+
+def select_kth(values, k):
+    """
+    Return the k-th smallest value (0-based) using iterative quickselect.
+
+    The list is partially reordered in place, so pass a copy if the
+    original order matters. After the call every element left of
+    position k is <= values[k] and every element right of it is >= values[k].
+
+    Args:
+        values (list): List of numbers
+        k (int): Rank of the value to select (0-based)
+
+    Returns:
+        float: The k-th smallest value
+
+    Raises:
+        ValueError: If k is out of range
+    """
+    if not 0 <= k < len(values):
+        raise ValueError("Index out of range")
+
+    left, right = 0, len(values) - 1
+    while left < right:
+        # Random pivot keeps the average case linear on sorted input
+        pivot = values[random.randint(left, right)]
+        i, j = left, right
+        while i <= j:
+            while values[i] < pivot:
+                i += 1
+            while values[j] > pivot:
+                j -= 1
+            if i <= j:
+                values[i], values[j] = values[j], values[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            right = j
+        elif k >= i:
+            left = i
+        else:
+            break
+    return values[k]
+
+def percentile(values, pct):
+    """
+    Calculate a percentile with linear interpolation, without sorting.
+
+    Args:
+        values (iterable): Numbers to analyze
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value, or None if there are no values
+
+    Raises:
+        ValueError: If pct is outside 0-100
+
+    Example:
+        >>> percentile([10, 30, 20, 40], 50)
+        25.0
+    """
+    if not 0 <= pct <= 100:
+        raise ValueError("Percentile must be between 0 and 100")
+
+    values = list(values)
+    if not values:
+        return None
+
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    lower_value = select_kth(values, lower)
+    if lower == position:
+        return float(lower_value)
+
+    # After quickselect the next order statistic is the minimum of the right side
+    upper_value = min(values[lower + 1:])
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+def median(values):
+    """
+    Calculate the median of a sequence of numbers in linear time.
+
+    Args:
+        values (iterable): Numbers to analyze
+
+    Returns:
+        float: The median, or None if there are no values
+    """
+    return percentile(values, 50)
+
+## Queries -----------------------------------------------------------------------------------------------------------------------------
+def top_expenses(expenses, n=20, month=None, category=None):
+    """
+    Return the n largest expenses, largest first.
+
+    Args:
+        expenses (list): List of Expense objects
+        n (int): Number of expenses to return
+        month (str): Optional month filter in YYYY-MM format
+        category (str): Optional category filter
+
+    Returns:
+        list: Up to n Expense objects ordered by amount (descending)
+    """
+    return heapq.nlargest(n, filter_expenses(expenses, month, category), key=record_amount)
+
+def category_median(expenses, category, month=None):
+    """
+    Return the median expense amount for a category.
+
+    Args:
+        expenses (list): List of Expense objects
+        category (str): The category to analyze
+        month (str): Optional month filter in YYYY-MM format
+
+    Returns:
+        float: The median amount, or None if the category has no expenses
+    """
+    return median(record_amount(expense) for expense in filter_expenses(expenses, month, category))
+
+def expenses_above_percentile(expenses, pct=99, month=None, category=None):
+    """
+    Return the expenses strictly above the given percentile, largest first.
+
+    Args:
+        expenses (list): List of Expense objects
+        pct (float): Percentile threshold between 0 and 100
+        month (str): Optional month filter in YYYY-MM format
+        category (str): Optional category filter
+
+    Returns:
+        tuple: (threshold, list of Expense objects above it)
+    """
+    selected = list(filter_expenses(expenses, month, category))
+    threshold = percentile((record_amount(expense) for expense in selected), pct)
+    if threshold is None:
+        return None, []
+
+    outliers = [expense for expense in selected if record_amount(expense) > threshold]
+    # Only the outliers are sorted, which is a small fraction of the ledger
+    outliers.sort(key=record_amount, reverse=True)
+    return threshold, outliers
+
+## Views -------------------------------------------------------------------------------------------------------------------------------
+def _print_expense_rows(expenses):
+    print("Date       | Category    | Description                | Amount")
+    print("-" * 70)
+    for expense in expenses:
+        print(f"{expense.date} | {expense.category:<10}  | {expense.description:<25}  | {format_amount(expense.amount, expense.currency)}")
+
+def view_top_expenses(expenses, n=20, month=None):
+    """
+    Display the n largest expenses, optionally limited to one month.
+
+    Args:
+        expenses (list): List of Expense objects
+        n (int): Number of expenses to show
+        month (str): Optional month filter in YYYY-MM format
+    """
+    largest = top_expenses(expenses, n, month)
+    if not largest:
+        print("No expenses found for that period.")
+        return
+
+    period = month if month else "all time"
+    print(f"\n--- Largest {len(largest)} Expenses ({period}) ---")
+    _print_expense_rows(largest)
+
+def view_category_median(expenses, category, month=None):
+    """
+    Display the median expense amount for a category.
+
+    Args:
+        expenses (list): List of Expense objects
+        category (str): The category to analyze
+        month (str): Optional month filter in YYYY-MM format
+    """
+    value = category_median(expenses, category, month)
+    if value is None:
+        print(f"No expenses found in category '{category}'.")
+        return
+
+    period = month if month else "all time"
+    print(f"\nMedian {category} expense ({period}): {format_amount(value)}")
+
+def view_outliers(expenses, pct=99, month=None):
+    """
+    Display the expenses above the given percentile.
+
+    Args:
+        expenses (list): List of Expense objects
+        pct (float): Percentile threshold between 0 and 100
+        month (str): Optional month filter in YYYY-MM format
+    """
+    threshold, outliers = expenses_above_percentile(expenses, pct, month)
+    if threshold is None:
+        print("No expenses found for that period.")
+        return
+
+    print(f"\n--- Expenses Above the {pct:g}th Percentile ({format_amount(threshold)}) ---")
+    if not outliers:
+        print("No expenses above the threshold.")
+        return
+    _print_expense_rows(outliers)
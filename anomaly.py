@@ -0,0 +1,399 @@
+import math
+from datetime import date
+from currency import record_amount
+from reports import Report, show_report, TEXT, NUMBER, AMOUNT
+
+"""
+Dezy's Budget Tracker - Anomaly Module
+
+This module flags unusual expenses as they are added, such as an outsized
+grocery bill or a subscription billed twice.
+
+Each category keeps online statistics that are updated in O(1) per expense,
+never by rescanning the ledger:
+- Welford running mean and variance over the whole history (exact, and
+  reversible, so deleting an expense takes it back out)
+- An exponentially weighted mean and variance, the "recent" baseline, so a
+  category whose spending drifts upwards is compared with its recent level
+- A P-square (P²) sketch of the 95th percentile: five markers in constant
+  memory that track the quantile without storing the amounts
+
+An expense is "outsized" when it is above the category's 95th percentile and
+more than Z_THRESHOLD standard deviations above both the long-run and the
+recent mean, once the category has MIN_HISTORY expenses. It is a "repeat" when
+an expense with the same category, description and amount was added within
+REPEAT_DAYS days (a likely double charge).
+
+Flags are kept as they are raised, so the anomaly report reads them directly.
+The recent baseline and the quantile sketch only move forwards: deleting an
+expense removes it from the Welford statistics and the flags, not from them.
+Amounts are compared in the base currency.
+"""
+
+Z_THRESHOLD = 3.0
+MIN_HISTORY = 10
+EWMA_ALPHA = 0.1
+SKETCH_QUANTILE = 0.95
+REPEAT_DAYS = 3
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P² algorithm (Jain and Chlamtac).
+
+    Five markers hold the minimum, the maximum, the quantile and the points
+    halfway to it; each new value shifts the marker positions, and markers that
+    drift from their desired positions are moved along a parabola fitted
+    through their neighbours.
+
+    Attributes:
+        quantile (float): The quantile to track, between 0 and 1
+        count (int): Number of values seen
+    """
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self._increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value):
+        """
+        Add one value to the sketch.
+        """
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        positions = self._positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    # The parabola overshoots a neighbour; move linearly instead
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def to_dict(self):
+        """
+        Convert the sketch to plain data for the sidecar cache.
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a sketch from data returned by to_dict.
+        """
+        sketch = cls(data["quantile"])
+        vars(sketch).update(data)
+        return sketch
+
+    def _parabolic(self, i, step):
+        heights = self._heights
+        positions = self._positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1])
+        )
+
+    def value(self):
+        """
+        Get the current estimate.
+
+        Returns:
+            float: The estimated quantile (exact for up to five values), or None if empty
+        """
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self._heights[min(int(self.quantile * self.count), self.count - 1)]
+        return self._heights[2]
+
+class CategoryStats:
+    """
+    Online statistics of one category's expense amounts.
+
+    Attributes:
+        count (int): Number of expenses
+        mean (float): Mean amount (Welford)
+        recent_mean (float): Exponentially weighted mean amount
+        sketch (P2Quantile): Estimate of the SKETCH_QUANTILE amount
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.recent_mean = 0.0
+        self._recent_variance = 0.0
+        self.sketch = P2Quantile(SKETCH_QUANTILE)
+
+    def add(self, amount):
+        """
+        Add one amount to every statistic.
+        """
+        self.count += 1
+        delta = amount - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (amount - self.mean)
+        if self.count == 1:
+            self.recent_mean = amount
+        else:
+            delta = amount - self.recent_mean
+            self.recent_mean += EWMA_ALPHA * delta
+            self._recent_variance = (1 - EWMA_ALPHA) * (self._recent_variance + EWMA_ALPHA * delta * delta)
+        self.sketch.add(amount)
+
+    def to_dict(self):
+        """
+        Convert the statistics to plain data for the sidecar cache.
+        """
+        return {**vars(self), "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create statistics from data returned by to_dict.
+        """
+        stats = cls()
+        vars(stats).update(data)
+        stats.sketch = P2Quantile.from_dict(data["sketch"])
+        return stats
+
+    def remove(self, amount):
+        """
+        Take one amount back out of the Welford statistics.
+        """
+        if self.count <= 1:
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+            return
+        previous_mean = (self.count * self.mean - amount) / (self.count - 1)
+        self._m2 = max(self._m2 - (amount - previous_mean) * (amount - self.mean), 0.0)
+        self.mean = previous_mean
+        self.count -= 1
+
+    def std(self):
+        """
+        Get the sample standard deviation (Welford).
+        """
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def recent_std(self):
+        """
+        Get the exponentially weighted standard deviation.
+        """
+        return math.sqrt(self._recent_variance)
+
+def _z_score(amount, mean, std):
+    # A perfectly regular category (a fixed subscription) still has a scale of 1% of its mean
+    return (amount - mean) / max(std, abs(mean) * 0.01, 0.01)
+
+class AnomalyDetector:
+    """
+    Per-category online statistics and the anomalies flagged so far.
+
+    Attributes:
+        stats (dict): Format: {category: CategoryStats}
+        flags (list): Flagged expenses in the order they were added. Format:
+                      [{"record": Expense, "kind": "outsized" or "repeat", "score": float, "reason": str}]
+        rates (RateTable): The ledger's rate table, or None for the active one
+    """
+    def __init__(self, rates=None):
+        self.rates = rates
+        self.stats = {}
+        self.flags = []
+        self._recent = {}  # Format: {(category, description, amount): date of the last such expense}
+
+    @classmethod
+    def build(cls, expenses, rates=None):
+        """
+        Replay the ledger's expenses in date order, flagging as they would have been at entry.
+
+        Args:
+            expenses (list): List of Expense objects
+            rates (RateTable): The ledger's rate table, or None for the active one
+
+        Returns:
+            AnomalyDetector: The populated detector
+        """
+        detector = cls(rates)
+        for expense in sorted(expenses, key=lambda expense: expense.date):
+            detector.add(expense)
+        return detector
+
+    def to_dict(self, positions):
+        """
+        Convert the detector to plain data for the sidecar cache.
+
+        Args:
+            positions (dict): Format: {id(expense): position in the ledger's list}; flagged
+                              expenses are stored by position, so they can be re-linked on load
+
+        Returns:
+            dict: The statistics, flags and recent repeat keys
+        """
+        return {
+            "stats": {category: stats.to_dict() for category, stats in self.stats.items()},
+            "flags": [{**flag, "record": positions[id(flag["record"])]} for flag in self.flags],
+            "recent": [[*key, date_str] for key, date_str in self._recent.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data, expenses):
+        """
+        Create a detector from data returned by to_dict.
+
+        Args:
+            data (dict): The stored detector
+            expenses (list): The ledger's expenses, in the order positions refer to
+
+        Returns:
+            AnomalyDetector: The detector, with flags pointing at the given expense objects
+        """
+        detector = cls()
+        detector.stats = {category: CategoryStats.from_dict(stats) for category, stats in data["stats"].items()}
+        detector.flags = [{**flag, "record": expenses[flag["record"]]} for flag in data["flags"]]
+        detector._recent = {tuple(entry[:3]): entry[3] for entry in data["recent"]}
+        return detector
+
+    def _repeat_key(self, expense, amount):
+        return (expense.category, expense.description.strip().lower(), round(amount, 2))
+
+    def check(self, expense):
+        """
+        Check a new expense against its category's statistics, without recording it.
+
+        Args:
+            expense (Expense): The expense being added
+
+        Returns:
+            dict: The flag (see flags), or None if the expense looks normal
+        """
+        amount = record_amount(expense, self.rates)
+        return self._check(expense, amount, self._repeat_key(expense, amount))
+
+    def _check(self, expense, amount, key):
+        previous = self._recent.get(key)
+        if previous is not None and abs((date.fromisoformat(expense.date) - date.fromisoformat(previous)).days) <= REPEAT_DAYS:
+            return {"record": expense, "kind": "repeat", "score": 0.0,
+                    "reason": f"Same amount and description as the expense on {previous} (possible double charge)"}
+
+        stats = self.stats.get(expense.category)
+        # The quantile is checked first: it is cheap and rules out almost every expense
+        if stats is None or stats.count < MIN_HISTORY or amount <= stats.sketch.value():
+            return None
+        score = min(_z_score(amount, stats.mean, stats.std()), _z_score(amount, stats.recent_mean, stats.recent_std()))
+        if score > Z_THRESHOLD:
+            return {"record": expense, "kind": "outsized", "score": score,
+                    "reason": f"{score:.1f} standard deviations above the usual {expense.category} expense"}
+        return None
+
+    def add(self, expense):
+        """
+        Check an expense, record any flag and add it to the statistics.
+
+        Returns:
+            dict: The flag, or None
+        """
+        amount = record_amount(expense, self.rates)
+        key = self._repeat_key(expense, amount)
+        flag = self._check(expense, amount, key)
+        if flag:
+            self.flags.append(flag)
+        stats = self.stats.get(expense.category)
+        if stats is None:
+            stats = self.stats[expense.category] = CategoryStats()
+        stats.add(amount)
+        self._recent[key] = expense.date
+        return flag
+
+    def remove(self, expense):
+        """
+        Take a deleted expense out of the statistics and the flags.
+        """
+        amount = record_amount(expense, self.rates)
+        stats = self.stats.get(expense.category)
+        if stats is not None:
+            stats.remove(amount)
+        key = self._repeat_key(expense, amount)
+        if self._recent.get(key) == expense.date:
+            del self._recent[key]
+        self.flags = [flag for flag in self.flags if flag["record"] is not expense]
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that keeps the statistics in sync with the ledger.
+
+        Args:
+            action (str): "add", "delete" or "set"
+            kind (str): "expense", "income" or "budget"
+            record (Expense): The changed record
+            index (int): Position of the record in its list (unused)
+        """
+        if kind != "expense":
+            return
+        if action == "add":
+            self.add(record)
+        elif action == "delete":
+            self.remove(record)
+
+def build_anomaly_report(detector, limit=50):
+    """
+    Build the report of flagged expenses and the statistics they were judged by.
+
+    Args:
+        detector (AnomalyDetector): The active ledger's detector
+        limit (int): Most recent flags to list
+
+    Returns:
+        Report: The report
+    """
+    report = Report("Unusual Expenses")
+    if not detector.flags:
+        report.add_notes(["No unusual expenses found."])
+    else:
+        rows = [[flag["record"].date, flag["record"].category, flag["record"].description, record_amount(flag["record"], detector.rates),
+                 flag["kind"], flag["reason"]]
+                for flag in reversed(detector.flags[-limit:])]
+        report.add_table([("Date", TEXT), ("Category", TEXT), ("Description", TEXT), ("Amount", AMOUNT), ("Type", TEXT),
+                          ("Reason", TEXT)], rows, title=f"Flagged ({len(detector.flags)} total, most recent first)")
+
+    rows = [[category, stats.count, stats.mean, stats.std(), stats.recent_mean, stats.sketch.value()]
+            for category, stats in sorted(detector.stats.items()) if stats.count]
+    if rows:
+        report.add_table([("Category", TEXT), ("Count", NUMBER), ("Mean", AMOUNT), ("Std Dev", AMOUNT),
+                          ("Recent Mean", AMOUNT), ("95th Percentile", AMOUNT)], rows, title="Category Baselines")
+    return report
+
+def view_anomalies(detector, limit=50):
+    """
+    Display the flagged expenses and the category baselines.
+
+    Args:
+        detector (AnomalyDetector): The active ledger's detector
+        limit (int): Most recent flags to list
+    """
+    show_report("anomalies", lambda: build_anomaly_report(detector, limit))
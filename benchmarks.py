@@ -0,0 +1,424 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from expense import Expense
+from storage import load_expenses
+from categorize import CategoryRule, Categorizer
+from accounts import Account, BalanceLedger, DEFAULT_ACCOUNT
+from validation import validate_amounts, validate_dates, validate_descriptions
+from consolidate import consolidate
+
+"""
+Dezy's Budget Tracker - Benchmarks Module
+
+This module contains timing checks for performance-sensitive paths.
+Run it directly:
+
+    python benchmarks.py --rows 200000
+
+Benchmarks:
+- load: schema-validated load_expenses against the original unvalidated loader
+- startup: import time of main.py (python -X importtime), checked against
+  STARTUP_BUDGET_MS and against the list of modules that must load lazily, then
+  the background ledger load the first menu choice waits for, checked against
+  LOAD_BUDGET_MS and against the modules only menu items may import
+- categorize: compiled category rules against checking every rule on every row
+- balances: checkpointed balance-on-date lookups against replaying the ledger
+- validate: batch column validators against the original raise-per-value validators
+- consolidate: the consolidated report's per-ledger summaries in a process pool against one process
+
+The script exits with status 1 if a checked benchmark fails.
+"""
+
+# Import-time budget for "import main", and modules it must not import eagerly
+STARTUP_BUDGET_MS = 25
+LAZY_MODULES = ("operations", "storage", "expense", "income", "budget", "analysis", "rollups",
+                "forecast", "search", "profiles", "history", "recurring", "export", "reconcile",
+                "currency", "reports", "categorize", "accounts", "cache", "spill", "feed", "consolidate",
+                "anomaly", "datetime")
+# Budget for "import main" plus the background load of an empty profile, and modules
+# the load must leave to the menu items that use them
+LOAD_BUDGET_MS = 100
+MENU_MODULES = ("analysis", "forecast", "export", "reconcile", "consolidate")
+LOAD_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+thread, result = main.start_loading("bench")
+thread.join()
+assert "error" not in result, result.get("error")
+print((time.perf_counter() - start) * 1000)
+"""
+
+CATEGORIES = ["food", "transport", "bills", "rent", "entertainment", "groceries"]
+DESCRIPTIONS = ["Lunch at the local cafe", "Uber to airport", "Electric bill", "Monthly rent", "Movie night", "Weekly groceries"]
+
+def make_rows(count, seed=0):
+    """
+    Generate synthetic expense rows as stored in expenses.json.
+
+    Args:
+        count (int): Number of rows
+        seed (int): Random seed, so runs are repeatable
+
+    Returns:
+        list: List of expense dictionaries
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "date": f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "amount": round(rng.uniform(1, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": rng.choice(DESCRIPTIONS)
+        }
+        for _ in range(count)
+    ]
+
+def legacy_load_expenses(filename):
+    """
+    The original loader, kept as the benchmark baseline (no validation, aborts on a bad row).
+    """
+    with open(filename, "r") as f:
+        expenses_data = json.load(f)
+    expenses = []
+    for expense_dict in expenses_data:
+        expenses.append(Expense(
+            date=expense_dict["date"],
+            amount=expense_dict["amount"],
+            category=expense_dict["category"],
+            description=expense_dict["description"]
+        ))
+    return expenses
+
+def _best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_load(rows, repeat=3):
+    """
+    Time the schema-validated loader against the legacy loader.
+
+    Args:
+        rows (int): Number of rows to generate
+        repeat (int): Runs per loader (the best time is reported)
+
+    Returns:
+        dict: Format: {"legacy": seconds, "validated": seconds}
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "expenses.json")
+        with open(filename, "w") as f:
+            json.dump(make_rows(rows), f)
+
+        results = {
+            "legacy": _best_of(lambda: legacy_load_expenses(filename), repeat),
+            "validated": _best_of(lambda: load_expenses(filename), repeat)
+        }
+
+    print(f"\n--- Load benchmark ({rows} rows, best of {repeat}) ---")
+    for name, seconds in results.items():
+        print(f"{name:<10} | {seconds:>8.3f}s | {rows / seconds:>12,.0f} rows/s")
+    print(f"Validation overhead: {results['validated'] / results['legacy']:.2f}x")
+    return results
+
+def _run_importtime(script, cwd, env=None):
+    # Run a script in a fresh interpreter with -X importtime.
+    # Returns (stdout, {module: cumulative import time in milliseconds})
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    imported = {}
+    for line in completed.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        if parts[1].strip().isdigit():
+            imported[parts[2].strip()] = int(parts[1]) / 1000
+    return completed.stdout, imported
+
+def bench_startup(rows=None, repeat=5):
+    """
+    Measure the import time of main.py and the background ledger load, and check
+    which modules each of them imports.
+
+    Each run is a fresh interpreter with -X importtime. The best cumulative time
+    for the "main" module is compared against STARTUP_BUDGET_MS. The load runs
+    LOAD_SCRIPT on a new, empty profile in a scratch directory: its best time
+    (import main, start the load, wait for it) is compared against LOAD_BUDGET_MS,
+    since that is what the first menu choice waits for.
+
+    Args:
+        rows (int): Unused, accepted so every benchmark has the same signature
+        repeat (int): Number of interpreter runs (the best time is reported)
+
+    Returns:
+        dict: Format: {"milliseconds": float, "eager": list of module names,
+                       "load_milliseconds": float, "load_eager": list of module names, "passed": bool}
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [directory, os.environ.get("PYTHONPATH")])))
+    best = best_load = None
+    imported = set()
+    loaded = set()
+    with tempfile.TemporaryDirectory() as scratch:
+        for _ in range(repeat):
+            _, modules = _run_importtime("import main", directory)
+            imported.update(modules)
+            if "main" in modules:
+                best = modules["main"] if best is None else min(best, modules["main"])
+
+            output, modules = _run_importtime(LOAD_SCRIPT, scratch, env)
+            loaded.update(modules)
+            milliseconds = float(output)
+            best_load = milliseconds if best_load is None else min(best_load, milliseconds)
+
+    eager = [module for module in LAZY_MODULES if module in imported]
+    load_eager = [module for module in MENU_MODULES if module in loaded]
+    passed = (best is not None and best <= STARTUP_BUDGET_MS and not eager
+              and best_load <= LOAD_BUDGET_MS and not load_eager)
+
+    print(f"\n--- Startup benchmark (best of {repeat}) ---")
+    print(f"import main: {best:.1f}ms (budget {STARTUP_BUDGET_MS}ms)")
+    print(f"import main and load an empty profile: {best_load:.1f}ms (budget {LOAD_BUDGET_MS}ms)")
+    if eager:
+        print("Imported eagerly: " + ", ".join(eager))
+    if load_eager:
+        print("Imported by the background load: " + ", ".join(load_eager))
+    print("PASS" if passed else "FAIL")
+    return {"milliseconds": best, "eager": eager, "load_milliseconds": best_load, "load_eager": load_eager, "passed": passed}
+
+def make_category_rules(count, seed=0):
+    """
+    Generate categorization rules: merchant keywords, a few patterns and amount ranges.
+
+    Args:
+        count (int): Number of rules
+        seed (int): Random seed, so runs are repeatable
+
+    Returns:
+        list: List of CategoryRule objects
+    """
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        keywords = [f"merchant {i:04d}", f"shop{i:04d}"]
+        pattern = rf"\bstore #{i:04d}\b" if i % 5 == 0 else None
+        low, high = (100, 500) if i % 7 == 0 else (None, None)
+        rules.append(CategoryRule(rng.choice(CATEGORIES), keywords, pattern, low, high))
+    return rules
+
+def bench_categorize(rows, repeat=3, rule_count=50):
+    """
+    Time categorizing rows with the compiled Categorizer against checking each rule in turn.
+
+    Args:
+        rows (int): Number of rows to generate
+        repeat (int): Runs per method (the best time is reported)
+        rule_count (int): Number of rules
+
+    Returns:
+        dict: Format: {"naive": seconds, "compiled": seconds, "passed": bool (same categories)}
+    """
+    # Merchants are drawn from twice as many as there are rules, so about half the rows match
+    rng = random.Random(1)
+    data = [(f"{row['description']} merchant {rng.randrange(2 * rule_count):04d}", row["amount"])
+            for row in make_rows(rows)]
+    rules = make_category_rules(rule_count)
+    categorizer = Categorizer(rules)
+
+    def naive():
+        return [next((rule.category for rule in rules if rule.matches(description, amount)), None)
+                for description, amount in data]
+
+    def compiled():
+        return [categorizer.suggest(description, amount) for description, amount in data]
+
+    results = {
+        "naive": _best_of(naive, repeat),
+        "compiled": _best_of(compiled, repeat)
+    }
+    results["passed"] = naive() == compiled()
+
+    print(f"\n--- Categorize benchmark ({rows} rows, {rule_count} rules, best of {repeat}) ---")
+    for name in ("naive", "compiled"):
+        print(f"{name:<10} | {results[name]:>8.3f}s | {rows / results[name]:>12,.0f} rows/s")
+    print(f"Speedup: {results['naive'] / results['compiled']:.1f}x")
+    print("PASS" if results["passed"] else "FAIL (categories differ)")
+    return results
+
+def bench_balances(rows, repeat=3, queries=1000):
+    """
+    Time balance-on-date lookups with the checkpointed BalanceLedger against a full replay.
+
+    Args:
+        rows (int): Number of rows to generate
+        repeat (int): Runs per method (the best time is reported)
+        queries (int): Number of random dates to look up
+
+    Returns:
+        dict: Format: {"replay": seconds, "checkpointed": seconds, "passed": bool (same balances)}
+    """
+    expenses = [Expense(row["date"], row["amount"], row["category"], row["description"]) for row in make_rows(rows)]
+    balances = BalanceLedger.build([Account(DEFAULT_ACCOUNT)], expenses, [])
+    rng = random.Random(2)
+    dates = [f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(queries)]
+    # The replay only gets a tenth of the queries, scaled up, to keep the run short
+    replay_dates = dates[:max(queries // 10, 1)]
+
+    def replay():
+        return [-sum(expense.amount for expense in expenses if expense.date <= date_str) for date_str in replay_dates]
+
+    def checkpointed():
+        return [balances.balance(DEFAULT_ACCOUNT, date_str) for date_str in dates]
+
+    results = {
+        "replay": _best_of(replay, repeat) * queries / len(replay_dates),
+        "checkpointed": _best_of(checkpointed, repeat)
+    }
+    expected = replay()
+    results["passed"] = all(abs(a - b) < 1e-6 * max(1.0, abs(a)) for a, b in zip(expected, checkpointed()))
+
+    print(f"\n--- Balances benchmark ({rows} rows, {queries} lookups, best of {repeat}) ---")
+    for name in ("replay", "checkpointed"):
+        print(f"{name:<12} | {results[name]:>8.3f}s | {queries / results[name]:>12,.0f} lookups/s")
+    print(f"Speedup: {results['replay'] / results['checkpointed']:.0f}x")
+    print("PASS" if results["passed"] else "FAIL (balances differ)")
+    return results
+
+def legacy_validate_row(date_str, amount_str, description):
+    """
+    The original single-value checks, kept as the benchmark baseline (strptime per date,
+    and an exception raised, caught and re-raised per bad amount).
+
+    Returns:
+        bool: True if every field is valid
+    """
+    from datetime import datetime
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        try:
+            amount = float(amount_str)
+            if amount <= 0:
+                raise ValueError("Amount must be greater than 0")
+        except ValueError as e:
+            if str(e) == "Amount must be greater than 0":
+                raise
+            raise ValueError("Please enter a valid number")
+        description = description.strip()
+        if not description or len(description) > 100:
+            raise ValueError("Description cannot be empty")
+    except ValueError:
+        return False
+    return True
+
+def bench_validate(rows, repeat=3):
+    """
+    Time validating imported text columns with the batch validators against the
+    original per-value validators.
+
+    Args:
+        rows (int): Number of rows to generate (about a tenth have a bad field)
+        repeat (int): Runs per method (the best time is reported)
+
+    Returns:
+        dict: Format: {"per_value": seconds, "batch": seconds, "passed": bool (same valid rows)}
+    """
+    rng = random.Random(3)
+    dates, amounts, descriptions = [], [], []
+    for row in make_rows(rows):
+        dates.append(row["date"] if rng.random() > 0.03 else row["date"][:8] + "31")
+        amounts.append(str(row["amount"]) if rng.random() > 0.05 else rng.choice(["", "-4.50", "n/a", "12,50"]))
+        descriptions.append(row["description"] if rng.random() > 0.02 else " ")
+
+    def per_value():
+        return [legacy_validate_row(*row) for row in zip(dates, amounts, descriptions)]
+
+    def batch():
+        date_mask = validate_dates(dates, allow_empty=False)[0]
+        amount_mask = validate_amounts(amounts)[0]
+        description_mask = validate_descriptions(descriptions)[0]
+        return [a and b and c for a, b, c in zip(date_mask, amount_mask, description_mask)]
+
+    results = {
+        "per_value": _best_of(per_value, repeat),
+        "batch": _best_of(batch, repeat)
+    }
+    results["passed"] = per_value() == batch()
+
+    print(f"\n--- Validate benchmark ({rows} rows, best of {repeat}) ---")
+    for name in ("per_value", "batch"):
+        print(f"{name:<10} | {results[name]:>8.3f}s | {rows / results[name]:>12,.0f} rows/s")
+    print(f"Speedup: {results['per_value'] / results['batch']:.1f}x")
+    print("PASS" if results["passed"] else "FAIL (valid rows differ)")
+    return results
+
+def bench_consolidate(rows, repeat=1, ledgers=8):
+    """
+    Time consolidating several ledgers with a process pool against summarizing them serially.
+
+    Args:
+        rows (int): Total number of rows, split evenly across the ledgers
+        repeat (int): Runs per method (the best time is reported)
+        ledgers (int): Number of ledgers
+
+    Returns:
+        dict: Format: {"serial": seconds, "pool": seconds, "passed": bool (same totals)}
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        profiles = []
+        for i in range(ledgers):
+            root = os.path.join(directory, f"ledger{i}")
+            os.makedirs(root)
+            with open(os.path.join(root, "expenses.json"), "w") as f:
+                json.dump(make_rows(rows // ledgers, seed=i), f)
+            profiles.append((f"ledger{i}", root))
+
+        results = {
+            "serial": _best_of(lambda: consolidate(profiles, workers=1), repeat),
+            "pool": _best_of(lambda: consolidate(profiles), repeat)
+        }
+        serial, pool = consolidate(profiles, workers=1), consolidate(profiles)
+        results["passed"] = (serial.ledgers == pool.ledgers and serial.months.keys() == pool.months.keys()
+                             and abs(serial.expenses - pool.expenses) < 1e-6 * max(1.0, serial.expenses))
+
+    print(f"\n--- Consolidate benchmark ({rows} rows in {ledgers} ledgers, {os.cpu_count()} CPUs, best of {repeat}) ---")
+    for name in ("serial", "pool"):
+        print(f"{name:<10} | {results[name]:>8.3f}s | {rows / results[name]:>12,.0f} rows/s")
+    print(f"Speedup: {results['serial'] / results['pool']:.1f}x")
+    print("PASS" if results["passed"] else "FAIL (totals differ)")
+    return results
+
+BENCHMARKS = {
+    "load": bench_load,
+    "startup": bench_startup,
+    "categorize": bench_categorize,
+    "balances": bench_balances,
+    "validate": bench_validate,
+    "consolidate": bench_consolidate
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dezy's Budget Tracker benchmarks")
+    parser.add_argument("names", nargs="*", default=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--rows", type=int, default=200000, help="number of rows to generate")
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.names:
+        result = BENCHMARKS[name](args.rows)
+        if result.get("passed") is False:
+            failed.append(name)
+    sys.exit(1 if failed else 0)
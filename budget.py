@@ -1,4 +1,5 @@
 from validation import validate_amount
+from currency import currency_symbol, record_amount
 
 class Budget:
     """
@@ -38,10 +39,17 @@ class Budget:
         """
         Calculate the total of all category budgets.
         
+        Sub-category budgets (e.g. "food > groceries") are only counted when
+        none of their parent categories has a budget, so nothing is counted twice.
+        
         Returns:
             float: Sum of all category budgets
         """
-        return sum(self.categories.values())
+        budgeted = {split_category(category) for category in self.categories}
+        return sum(
+            amount for category, amount in self.categories.items()
+            if not any(split_category(category)[:depth] in budgeted for depth in range(1, len(split_category(category))))
+        )
     
     def to_dict(self):
         """
@@ -74,7 +82,7 @@ class Budget:
         while True:
             try:
                 # Get overall budget
-                amount_str = input("Enter overall monthly budget amount: $")
+                amount_str = input(f"Enter overall monthly budget amount: {currency_symbol()}")
                 amount = validate_amount(amount_str)
                 budget = cls(amount)
                 
@@ -89,7 +97,7 @@ class Budget:
                         print("Category name cannot be empty.")
                         continue
                     
-                    amount_str = input(f"Enter budget amount for {category}: $")
+                    amount_str = input(f"Enter budget amount for {category}: {currency_symbol()}")
                     try:
                         amount = validate_amount(amount_str)
                         budget.set_category_budget(category, amount)
@@ -107,7 +115,296 @@ class Budget:
 
 #Sub Budget-----------------------------------------------------------------------------------------------------------
 
+CATEGORY_SEPARATOR = ">"
+
+def split_category(category):
+    """
+    Split a hierarchical category name into its path parts.
+    
+    Example:
+        >>> split_category("food > groceries")
+        ('food', 'groceries')
+    """
+    return tuple(part.strip() for part in category.split(CATEGORY_SEPARATOR) if part.strip())
+
+def join_category(parts):
+    """
+    Join category path parts into the stored name, e.g. "food > groceries".
+    """
+    return f" {CATEGORY_SEPARATOR} ".join(parts)
+
 class SubBudget(Budget):  # Fixed class name to follow Python naming conventions
-    def __init__(self, amount, category):
+    """
+    A node in the category budget tree.
+    
+    Spend and limits roll up from children to parents. Totals are cached per node
+    and only invalidated along the path from a changed node to the root.
+    
+    Attributes:
+        amount (float): This node's own limit (0 if not set)
+        category (str): Full category name, e.g. "food > groceries" (None for the root)
+        parent (SubBudget): The parent node, or None for the root
+        children (dict): Format: {name: SubBudget}
+        spent (float): Spend recorded directly against this category
+        count (int): Number of expenses recorded directly against this category
+    """
+    def __init__(self, amount, category, parent=None):
         super().__init__(amount)
-        self.category = category
\ No newline at end of file
+        self.category = category
+        self.parent = parent
+        self.children = {}
+        self.spent = 0.0
+        self.count = 0
+        self._total_spent = None
+        self._total_count = None
+        self._limit = None
+
+    def invalidate(self):
+        """
+        Clear the cached totals of this node and every ancestor.
+        """
+        node = self
+        while node is not None:
+            node._total_spent = None
+            node._total_count = None
+            node = node.parent
+
+    def invalidate_limits(self):
+        """
+        Clear the cached limit of this node and every ancestor.
+        """
+        node = self
+        while node is not None:
+            node._limit = None
+            node = node.parent
+
+    def total_spent(self):
+        """
+        Get the spend of this category including all sub-categories (cached).
+        """
+        if self._total_spent is None:
+            self._total_spent = self.spent + sum(child.total_spent() for child in self.children.values())
+        return self._total_spent
+
+    def total_count(self):
+        """
+        Get the number of expenses in this category including all sub-categories (cached).
+        """
+        if self._total_count is None:
+            self._total_count = self.count + sum(child.total_count() for child in self.children.values())
+        return self._total_count
+
+    def limit(self):
+        """
+        Get the effective limit of this category (cached).
+        
+        A category's own limit wins; otherwise the limits of its children are summed.
+        
+        Returns:
+            float: The limit, or 0 if neither the category nor its children have one
+        """
+        if self._limit is None:
+            self._limit = self.amount if self.amount > 0 else sum(child.limit() for child in self.children.values())
+        return self._limit
+
+class BudgetTree:
+    """
+    Hierarchical budget evaluation over categories such as "food > groceries".
+    
+    The tree is built once from the budget and the expenses. Adding or removing an
+    expense updates one node and invalidates only the cached totals on its path to
+    the root, so reports stay fast as the number of categories grows.
+    
+    Attributes:
+        root (SubBudget): The root node, holding the overall budget
+        rates (RateTable): The ledger's rate table, or None for the active one
+    """
+    def __init__(self, budget=None, rates=None):
+        self.rates = rates
+        self.root = SubBudget(budget.amount if budget else 0, None)
+        self._nodes = {(): self.root}  # Format: {path tuple: SubBudget}
+        self._aliases = {}  # Sub-category name -> path, for expenses entered without the parent
+        self._expenses = []  # The live expense list, used to re-bucket spend when the budget changes
+        if budget:
+            paths = [split_category(category) for category in budget.categories]
+            for path, amount in zip(paths, budget.categories.values()):
+                self.node(path).amount = float(amount)
+
+            # Aliases come from the budget only, so they cannot change as expenses are added
+            # and removed: a sub-category name that is unique among the budgeted paths can be
+            # used on its own, unless a top-level category of that name is budgeted too
+            for path in paths:
+                if len(path) > 1:
+                    name = path[-1]
+                    self._aliases[name] = None if self._aliases.get(name, path) != path else path
+            for path in paths:
+                if len(path) == 1:
+                    self._aliases.pop(path[0], None)
+
+    @classmethod
+    def build(cls, budget, expenses, rates=None):
+        """
+        Build a tree and record every expense in a single pass.
+        
+        Args:
+            budget (Budget): The Budget object, or None
+            expenses (list): List of Expense objects
+            rates (RateTable): The ledger's rate table, or None for the active one
+            
+        Returns:
+            BudgetTree: The populated tree
+        """
+        tree = cls(budget, rates)
+        tree._expenses = expenses
+        for expense in expenses:
+            node = tree.resolve(expense.category)
+            node.spent += record_amount(expense, rates)
+            node.count += 1
+        return tree
+
+    def to_dict(self):
+        """
+        Convert the tree to plain data for the sidecar cache.
+        
+        Returns:
+            dict: The root limit, one [path, amount, spent, count] entry per node (parents
+                  first) and the aliases
+        """
+        return {
+            "amount": self.root.amount,
+            "nodes": [[list(path), node.amount, node.spent, node.count] for path, node in self._nodes.items() if path],
+            "aliases": [[name, list(path) if path else None] for name, path in self._aliases.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data, expenses):
+        """
+        Create a tree from data returned by to_dict.
+        
+        Args:
+            data (dict): The stored tree
+            expenses (list): The live expense list (see set_budget)
+            
+        Returns:
+            BudgetTree: The tree
+        """
+        tree = cls()
+        tree.root.amount = data["amount"]
+        for path, amount, spent, count in data["nodes"]:
+            node = tree.node(tuple(path))
+            node.amount = amount
+            node.spent = spent
+            node.count = count
+        tree._aliases = {name: tuple(path) if path else None for name, path in data["aliases"]}
+        tree._expenses = expenses
+        return tree
+
+    def node(self, path):
+        """
+        Get the node for a category path, creating it and its parents if needed.
+        
+        Args:
+            path (tuple): Category path parts, e.g. ("food", "groceries")
+            
+        Returns:
+            SubBudget: The node
+        """
+        node = self._nodes.get(path)
+        if node is not None:
+            return node
+        parent = self.node(path[:-1])
+        node = SubBudget(0, join_category(path), parent)
+        parent.children[path[-1]] = node
+        self._nodes[path] = node
+        parent.invalidate()
+        parent.invalidate_limits()
+        return node
+
+    def resolve(self, category):
+        """
+        Find the node for an expense category.
+        
+        "food > groceries" maps to that path. A plain name such as "groceries" maps to
+        the single budgeted sub-category with that name, or to a top-level category.
+        The mapping depends on the budget alone, so an expense is always removed from
+        the node it was added to.
+        
+        Args:
+            category (str): The expense category
+            
+        Returns:
+            SubBudget: The node
+        """
+        path = split_category(category)
+        if len(path) == 1 and self._aliases.get(path[0]):
+            path = self._aliases[path[0]]
+        return self.node(path)
+
+    def add_expense(self, expense, sign=1):
+        """
+        Record an expense, invalidating cached totals along its path.
+        
+        Args:
+            expense (Expense): The expense to add
+            sign (int): 1 to add the expense, -1 to remove it
+        """
+        node = self.resolve(expense.category)
+        node.spent += record_amount(expense, self.rates) * sign
+        node.count += sign
+        node.invalidate()
+
+    def remove_expense(self, expense):
+        """
+        Remove a previously recorded expense.
+        """
+        self.add_expense(expense, sign=-1)
+
+    def set_budget(self, budget):
+        """
+        Replace the limits with a new budget.
+        
+        New budgeted sub-categories can change where plain category names resolve, so the
+        tree is rebuilt from the live expense list. Budget changes are rare
+        compared to expense changes, which stay incremental.
+        
+        Args:
+            budget (Budget): The new Budget object, or None to clear all limits
+        """
+        rebuilt = BudgetTree.build(budget, self._expenses, self.rates)
+        self.root = rebuilt.root
+        self._nodes = rebuilt._nodes
+        self._aliases = rebuilt._aliases
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that keeps the tree in sync with the ledger.
+        
+        Args:
+            action (str): "add", "delete" or "set"
+            kind (str): "expense", "income" or "budget"
+            record (Expense or Budget): The changed record
+            index (int): Position of the record in its list (unused)
+        """
+        if kind == "expense":
+            if action == "add":
+                self.add_expense(record)
+            elif action == "delete":
+                self.remove_expense(record)
+        elif kind == "budget":
+            self.set_budget(record)
+
+    def evaluate(self):
+        """
+        Evaluate every category in tree order.
+        
+        Returns:
+            list: One (node, depth) tuple per category, parents before their children,
+                  siblings sorted by name. The root is not included.
+        """
+        rows = []
+        stack = [(child, 0) for _, child in sorted(self.root.children.items(), reverse=True)]
+        while stack:
+            node, depth = stack.pop()
+            rows.append((node, depth))
+            stack.extend((child, depth + 1) for _, child in sorted(node.children.items(), reverse=True))
+        return rows
\ No newline at end of file
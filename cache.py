@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+
+"""
+Dezy's Budget Tracker - Cache Module
+
+This module keeps a persistent sidecar cache of a ledger's derived data (the
+loaded records, cash-flow cube, search indexes, budget tree and balances), so
+a run that starts on unchanged files skips parsing, validation and every
+aggregate build.
+
+Each entry is keyed by a fingerprint of every source file as this process last
+read or wrote it (record is a storage save listener, so the fingerprint is
+taken right after each save, not when the cache is written):
+its size, modification time and SHA-256 content hash. Size and time are compared
+first because they are free; the hash is only computed when they match, and
+guards against edits that keep both (same-size writes within the timestamp
+resolution). A missing file has the fingerprint None, so creating or deleting
+a file invalidates the entry too.
+
+CACHE_VERSION is stored in every entry. Bump it whenever the layout of any
+cached object changes (new attribute, renamed field, different meaning), and
+every older entry is ignored and rebuilt instead of being misread.
+
+If another process changes a file during the session, its fingerprint no longer
+matches the one recorded, so the next run rebuilds instead of serving this
+process's records under the other writer's files.
+
+The cache is plain JSON (see the to_dict/from_dict methods of the cached
+objects), never a pickle, so a tampered cache file can at worst cause a miss or
+wrong totals, not run code. Writes go to a temporary file that replaces the old
+entry, so an interrupted run never leaves a torn cache.
+"""
+
+CACHE_VERSION = 3
+CACHE_FILENAME = ".derived_cache.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+def file_fingerprint(path, known=None):
+    """
+    Fingerprint a file by size, modification time and content hash.
+
+    Args:
+        path (str): The file to fingerprint
+        known (tuple): A previous fingerprint of the file; if its size or time
+                       differ, the file has changed and is not hashed
+
+    Returns:
+        tuple: (size, mtime in nanoseconds, SHA-256 hex digest), with the digest
+               None when it was skipped, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if known is not None and (known[0], known[1]) != (stat.st_size, stat.st_mtime_ns):
+        return (stat.st_size, stat.st_mtime_ns, None)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+class DerivedCache:
+    """
+    The sidecar cache of one ledger directory.
+
+    Attributes:
+        root (str): The directory holding the ledger's files and the cache
+        sources (tuple): Names of the files the cached data is derived from
+        path (str): Path of the cache file
+        status (str): Outcome of the last load, for diagnostics: "hit", "missing",
+                      "version", "changed: <file>" or "unreadable"
+        known (dict): Fingerprints of the source files as last loaded or saved by this
+                      process, format: {filename: fingerprint or None}
+    """
+    def __init__(self, root, sources):
+        self.root = os.path.abspath(root)
+        self.sources = tuple(sources)
+        self.path = os.path.join(self.root, CACHE_FILENAME)
+        self.status = None
+        self.known = None
+
+    def fingerprints(self):
+        """
+        Fingerprint every source file.
+
+        Returns:
+            dict: Format: {filename: fingerprint or None}
+        """
+        return {name: file_fingerprint(os.path.join(self.root, name)) for name in self.sources}
+
+    def load(self):
+        """
+        Load the cached data if every source file is unchanged.
+
+        On a miss, the source files are fingerprinted before the caller reads them,
+        so the next save is keyed by the files the ledger was loaded from.
+
+        Returns:
+            dict: The data passed to save(), or None (see status for the reason)
+        """
+        data = self._load()
+        if data is None:
+            self.known = self.fingerprints()
+        return data
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.status = "missing"
+            return None
+        except (OSError, ValueError):
+            # A truncated or foreign file is just a cache miss
+            self.status = "unreadable"
+            return None
+
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION or not isinstance(entry.get("sources"), dict):
+            self.status = "version"
+            return None
+        known = {}
+        for name in self.sources:
+            stored = entry["sources"].get(name)
+            known[name] = tuple(stored) if stored else None
+            if file_fingerprint(os.path.join(self.root, name), known[name]) != known[name]:
+                self.status = f"changed: {name}"
+                return None
+        self.status = "hit"
+        self.known = known
+        return entry["data"]
+
+    def record(self, path):
+        """
+        Save listener that fingerprints a source file right after this process wrote it.
+
+        Register it with storage.add_save_listener.
+
+        Args:
+            path (str): The file that was saved
+        """
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        if self.known is not None and name in self.sources and os.path.dirname(path) == self.root:
+            self.known[name] = file_fingerprint(path)
+
+    def save(self, data):
+        """
+        Store derived data keyed by the fingerprints this process last loaded or saved.
+
+        Call this only when data matches what this process last saved (e.g. right
+        after loading, or when closing a ledger whose changes have all been saved).
+        If a file was changed by someone else since, the entry will not match it.
+
+        Args:
+            data (dict): Derived data made of JSON types
+        """
+        sources = self.known if self.known is not None else self.fingerprints()
+        entry = {"version": CACHE_VERSION, "sources": sources, "data": data}
+        temporary = self.path + ".tmp"
+        try:
+            # dumps runs in the C encoder; dump to a file would encode in Python
+            text = json.dumps(entry, separators=(",", ":"))
+            with open(temporary, "w") as f:
+                f.write(text)
+            os.replace(temporary, self.path)
+        except (OSError, TypeError, ValueError):
+            # The cache is an optimization; a read-only directory just means no cache
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def clear(self):
+        """
+        Delete the cache file, if any.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,284 @@
+import re
+from collections import deque
+from currency import record_amount
+
+"""
+Dezy's Budget Tracker - Categorize Module
+
+This module assigns categories to expenses from user-defined rules, so imported
+rows without a category are filled in and the add flow can suggest a category.
+
+A rule matches on description keywords (merchant names or any substring),
+a regular expression, and/or an amount range. The first matching rule in the
+list wins, like mail filters.
+
+Rules are compiled once: every keyword of every rule goes into a single
+Aho-Corasick automaton, so each description is scanned once however many
+merchant keywords there are, instead of rules x rows substring checks. Only
+rules with a regular expression are still checked one by one.
+"""
+
+# Category given to rows loaded without one, until a rule categorizes them
+UNCATEGORIZED = "uncategorized"
+
+class CategoryRule:
+    """
+    Represents a rule that maps matching expenses to a category.
+
+    Attributes:
+        category (str): The category to assign
+        keywords (list): Description substrings (case-insensitive), any of which matches
+        pattern (str): Regular expression searched in the description (case-insensitive), or None
+        min_amount (float): Smallest matching amount in the base currency, or None
+        max_amount (float): Largest matching amount in the base currency, or None
+    """
+    def __init__(self, category, keywords=None, pattern=None, min_amount=None, max_amount=None):
+        if not category or not category.strip():
+            raise ValueError("Category cannot be empty")
+        keywords = [keyword.strip().lower() for keyword in keywords or [] if keyword.strip()]
+        if pattern:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern: {e}")
+        if not keywords and not pattern and min_amount is None and max_amount is None:
+            raise ValueError("A rule needs keywords, a pattern or an amount range")
+        if min_amount is not None and max_amount is not None and float(min_amount) > float(max_amount):
+            raise ValueError("Minimum amount cannot be greater than the maximum amount")
+
+        self.category = category.strip()
+        self.keywords = keywords
+        self.pattern = pattern or None
+        self.min_amount = float(min_amount) if min_amount is not None else None
+        self.max_amount = float(max_amount) if max_amount is not None else None
+
+    def has_text(self):
+        """
+        Check whether the rule matches on the description at all.
+        """
+        return bool(self.keywords or self.pattern)
+
+    def amount_range(self):
+        """
+        Get the (min, max) amount range, with open ends as -inf/inf.
+        """
+        return (
+            self.min_amount if self.min_amount is not None else float("-inf"),
+            self.max_amount if self.max_amount is not None else float("inf")
+        )
+
+    def matches(self, description, amount):
+        """
+        Check this rule alone against one expense (used for explanations and as
+        the reference the compiled Categorizer must agree with).
+
+        Args:
+            description (str): The expense description
+            amount (float): The amount in the base currency
+
+        Returns:
+            bool: True if the rule matches
+        """
+        low, high = self.amount_range()
+        if not low <= amount <= high:
+            return False
+        if not self.has_text():
+            return True
+        text = description.lower()
+        if any(keyword in text for keyword in self.keywords):
+            return True
+        return bool(self.pattern and re.search(self.pattern, description, re.IGNORECASE))
+
+    def to_dict(self):
+        """
+        Convert the rule to a dictionary for storage.
+        """
+        return {
+            "category": self.category,
+            "keywords": self.keywords,
+            "pattern": self.pattern,
+            "min_amount": self.min_amount,
+            "max_amount": self.max_amount
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a CategoryRule object from dictionary data.
+        """
+        return cls(
+            category=data["category"],
+            keywords=data.get("keywords"),
+            pattern=data.get("pattern"),
+            min_amount=data.get("min_amount"),
+            max_amount=data.get("max_amount")
+        )
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton that finds every keyword in a text in one pass.
+
+    The failure links are folded into a full transition table when the
+    automaton is built, so matching is one dictionary lookup per character.
+
+    Attributes:
+        size (int): Number of states
+    """
+    def __init__(self, keywords):
+        """
+        Build the automaton.
+
+        Args:
+            keywords (list): (keyword, value) pairs; several keywords may share a value
+        """
+        goto = [{}]
+        outputs = [set()]
+        for keyword, value in keywords:
+            state = 0
+            for char in keyword:
+                following = goto[state].get(char)
+                if following is None:
+                    following = len(goto)
+                    goto[state][char] = following
+                    goto.append({})
+                    outputs.append(set())
+                state = following
+            outputs[state].add(value)
+
+        # Breadth-first, so a state's failure target is complete before the state is
+        fail = [0] * len(goto)
+        self._delta = [None] * len(goto)
+        self._delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                fail[following] = self._delta[fail[state]].get(char, 0)
+                outputs[following] |= outputs[fail[following]]
+                queue.append(following)
+            delta = dict(self._delta[fail[state]])
+            delta.update(goto[state])
+            self._delta[state] = delta
+
+        self._outputs = [tuple(sorted(values)) if values else None for values in outputs]
+        self.size = len(goto)
+
+    def find(self, text):
+        """
+        Yield the values of every keyword found in a text.
+
+        Args:
+            text (str): The text to scan (keywords are matched exactly, so lower-case both)
+
+        Yields:
+            tuple: Sorted values of the keywords ending at each position with a match
+        """
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state] is not None:
+                yield outputs[state]
+
+class Categorizer:
+    """
+    The compiled form of a list of rules.
+
+    Attributes:
+        rules (list): The CategoryRule objects, in priority order
+    """
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else []
+        self.compile()
+
+    def compile(self):
+        """
+        Rebuild the combined matchers. Call after changing the rule list.
+
+        Every keyword of every rule goes into one Aho-Corasick automaton, which
+        reports the indices of the rules whose keywords occur in a description.
+
+        Rules with a pattern or only an amount range are kept in list order with
+        their compiled expressions and checked one by one, stopping as soon as
+        no remaining rule could beat the best keyword match. (Expressions are
+        compiled separately because one big alternation is tried alternative by
+        alternative at every position, which is slower than a search per rule.)
+
+        The lowest rule index found, among rules whose amount range fits, wins.
+        """
+        self._ranges = [rule.amount_range() for rule in self.rules]
+        self._keywords = KeywordAutomaton(
+            (keyword, index) for index, rule in enumerate(self.rules) for keyword in rule.keywords
+        )
+        self._others = [  # Format: [(index, compiled pattern or None)]
+            (index, re.compile(rule.pattern, re.IGNORECASE) if rule.pattern else None)
+            for index, rule in enumerate(self.rules)
+            if rule.pattern or not rule.has_text()
+        ]
+
+    def match(self, description, amount):
+        """
+        Find the first rule that matches an expense.
+
+        Args:
+            description (str): The expense description
+            amount (float): The amount in the base currency
+
+        Returns:
+            CategoryRule: The winning rule, or None
+        """
+        ranges = self._ranges
+        best = None
+        for indices in self._keywords.find(description.lower()):
+            for index in indices:
+                if best is not None and index >= best:
+                    break
+                low, high = ranges[index]
+                if low <= amount <= high:
+                    best = index
+                    break
+        for index, pattern in self._others:
+            if best is not None and index > best:
+                break
+            low, high = ranges[index]
+            if low <= amount <= high and (pattern is None or pattern.search(description)):
+                best = index
+                break
+        return self.rules[best] if best is not None else None
+
+    def suggest(self, description, amount):
+        """
+        Suggest a category for a new expense.
+
+        Returns:
+            str: The category of the first matching rule, or None
+        """
+        rule = self.match(description, amount)
+        return rule.category if rule else None
+
+    def categorize(self, records, only_uncategorized=True):
+        """
+        Assign categories to records in one pass.
+
+        Records are changed in place, so call this before the ledger's aggregates
+        are built (or rebuild them afterwards).
+
+        Args:
+            records (list): List of Expense objects
+            only_uncategorized (bool): Leave records that already have a category alone
+
+        Returns:
+            int: Number of records whose category changed
+        """
+        if not self.rules:
+            return 0
+        changed = 0
+        for record in records:
+            if only_uncategorized and record.category != UNCATEGORIZED:
+                continue
+            rule = self.match(record.description, record_amount(record))
+            if rule and rule.category != record.category:
+                record.category = rule.category
+                changed += 1
+        return changed
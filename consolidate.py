@@ -0,0 +1,203 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from currency import record_amount, get_rate_table, set_rate_table
+from storage import load_budget, load_rates
+from export import stream_records
+from expense import Expense
+from income import Income
+from reports import Report, show_report, TEXT, AMOUNT, PERCENT
+
+"""
+Dezy's Budget Tracker - Consolidate Module
+
+This module builds one consolidated report over many ledgers (household members,
+years), instead of running the financial summary on each and adding them up.
+
+Each ledger is reduced to a LedgerSummary: totals, per-category totals and
+per-month buckets in its base currency. Summaries merge associatively (every
+field is a sum or a union of sums, and the empty summary is the identity), so
+the per-ledger work fans out to a process pool, one ledger per task, and only
+the small summaries travel back to be merged. Ledgers are streamed from their
+files (see export.stream_records), so a worker never loads a whole ledger or
+builds its aggregates.
+"""
+
+class LedgerSummary:
+    """
+    Partial aggregate of one or more ledgers.
+
+    Attributes:
+        base (str): The base currency of every amount, or None for the empty summary
+        income (float): Total income
+        expenses (float): Total expenses
+        income_by_category (dict): Format: {category: total}
+        expenses_by_category (dict): Format: {category: total}
+        months (dict): Format: {"YYYY-MM": [income, expenses]}
+        ledgers (dict): Per-ledger totals, format: {name: {"income": float, "expenses": float, "budget": float or None}}
+    """
+    def __init__(self, base=None):
+        self.base = base
+        self.income = 0.0
+        self.expenses = 0.0
+        self.income_by_category = {}
+        self.expenses_by_category = {}
+        self.months = {}
+        self.ledgers = {}
+
+    def add(self, kind, record):
+        """
+        Add one record to the summary.
+
+        Args:
+            kind (str): "expense" or "income"
+            record (Expense or Income): The record
+        """
+        amount = record_amount(record)
+        bucket = self.months.setdefault(record.date[:7], [0.0, 0.0])
+        if kind == "income":
+            self.income += amount
+            self.income_by_category[record.category] = self.income_by_category.get(record.category, 0.0) + amount
+            bucket[0] += amount
+        else:
+            self.expenses += amount
+            self.expenses_by_category[record.category] = self.expenses_by_category.get(record.category, 0.0) + amount
+            bucket[1] += amount
+
+    def merge(self, other):
+        """
+        Combine two summaries into a new one.
+
+        Returns:
+            LedgerSummary: The combined summary
+
+        Raises:
+            ValueError: If the summaries are in different base currencies
+        """
+        if self.base and other.base and self.base != other.base:
+            raise ValueError(f"Cannot consolidate ledgers in different base currencies ({self.base} and {other.base})")
+        merged = LedgerSummary(self.base or other.base)
+        merged.income = self.income + other.income
+        merged.expenses = self.expenses + other.expenses
+        for name in ("income_by_category", "expenses_by_category"):
+            totals = dict(getattr(self, name))
+            for category, amount in getattr(other, name).items():
+                totals[category] = totals.get(category, 0.0) + amount
+            setattr(merged, name, totals)
+        merged.months = {month: list(bucket) for month, bucket in self.months.items()}
+        for month, (income, expenses) in other.months.items():
+            bucket = merged.months.setdefault(month, [0.0, 0.0])
+            bucket[0] += income
+            bucket[1] += expenses
+        merged.ledgers = {**self.ledgers, **other.ledgers}
+        return merged
+
+def summarize_ledger(name, root):
+    """
+    Summarize one ledger from its files (run in a worker process).
+
+    Args:
+        name (str): The profile name
+        root (str): The directory holding the profile's files
+
+    Returns:
+        LedgerSummary: The ledger's summary
+    """
+    rates = load_rates(os.path.join(root, "rates.json"))
+    previous = get_rate_table()
+    # Amounts convert with the ledger's own rates; the caller's table is put back for in-process runs
+    set_rate_table(rates)
+    try:
+        summary = LedgerSummary(rates.base)
+        for kind, record_class, filename in (("income", Income, "incomes.json"), ("expense", Expense, "expenses.json")):
+            for record in stream_records(os.path.join(root, filename), record_class):
+                summary.add(kind, record)
+    finally:
+        set_rate_table(previous)
+    budget = load_budget(os.path.join(root, "budget.json"))
+    summary.ledgers[name] = {
+        "income": summary.income,
+        "expenses": summary.expenses,
+        "budget": budget.amount if budget else None
+    }
+    return summary
+
+def consolidate(profiles, workers=None):
+    """
+    Summarize several ledgers in parallel and merge the results.
+
+    Args:
+        profiles (list): (name, root) pairs
+        workers (int): Worker processes (None for one per CPU; 1 runs in this process)
+
+    Returns:
+        LedgerSummary: The merged summary
+
+    Raises:
+        ValueError: If the ledgers are in different base currencies
+    """
+    names = [name for name, root in profiles]
+    roots = [root for name, root in profiles]
+    if workers == 1 or len(profiles) < 2:
+        summaries = map(summarize_ledger, names, roots)
+        return reduce(LedgerSummary.merge, summaries, LedgerSummary())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Merged in profile order as results arrive, so totals do not depend on scheduling
+        return reduce(LedgerSummary.merge, pool.map(summarize_ledger, names, roots), LedgerSummary())
+
+def build_consolidated_report(summary):
+    """
+    Build the consolidated report of merged ledgers.
+
+    Args:
+        summary (LedgerSummary): The merged summary
+
+    Returns:
+        Report: The report
+    """
+    report = Report(f"Consolidated Report ({len(summary.ledgers)} ledgers)")
+    if not summary.income_by_category and not summary.expenses_by_category:
+        report.add_notes(["No financial data to analyze."])
+        return report
+
+    base = summary.base
+    budgets = [totals["budget"] for totals in summary.ledgers.values() if totals["budget"] is not None]
+    fields = [
+        ("Total Income", (summary.income, base), AMOUNT),
+        ("Total Expenses", (summary.expenses, base), AMOUNT),
+        ("Net Income", (summary.income - summary.expenses, base), AMOUNT)
+    ]
+    if budgets:
+        fields.append(("Combined Monthly Budget", (sum(budgets), base), AMOUNT))
+    report.add_fields(fields)
+
+    rows = [[name, (totals["income"], base), (totals["expenses"], base), (totals["income"] - totals["expenses"], base),
+             (totals["budget"], base) if totals["budget"] is not None else None]
+            for name, totals in sorted(summary.ledgers.items())]
+    report.add_table([("Ledger", TEXT), ("Income", AMOUNT), ("Expenses", AMOUNT), ("Net", AMOUNT), ("Budget", AMOUNT)],
+                     rows, title="By Ledger")
+
+    for title, totals, overall in (("Income by Category", summary.income_by_category, summary.income),
+                                   ("Expenses by Category", summary.expenses_by_category, summary.expenses)):
+        if totals:
+            rows = [[category, (amount, base), (amount / overall) * 100 if overall else 0]
+                    for category, amount in sorted(totals.items())]
+            report.add_table([("Category", TEXT), ("Amount", AMOUNT), ("Share", PERCENT)], rows, title=title)
+
+    rows = [[month, (income, base), (expenses, base), (income - expenses, base)]
+            for month, (income, expenses) in sorted(summary.months.items())]
+    report.add_table([("Month", TEXT), ("Income", AMOUNT), ("Expenses", AMOUNT), ("Net", AMOUNT)], rows, title="By Month")
+    return report
+
+def view_consolidated_report(manager, names, workers=None):
+    """
+    Display the consolidated report of several profiles.
+
+    Args:
+        manager (ProfileManager): The profile manager (used to find each profile's files)
+        names (list): Profile names
+        workers (int): Worker processes (None for one per CPU)
+    """
+    profiles = [(name, manager.profile_root(name)) for name in names]
+    summary = consolidate(profiles, workers)
+    show_report("consolidated", lambda: build_consolidated_report(summary))
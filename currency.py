@@ -0,0 +1,275 @@
+from bisect import bisect_right
+from validation import validate_amounts, validate_dates
+
+"""
+Dezy's Budget Tracker - Currency Module
+
+This module handles per-record currencies and conversion to the base currency.
+
+Exchange rates are read from a local file (rates.json, no network access) in the format:
+    {"base": "USD", "rates": {"EUR": {"2025-01-01": 1.08, "2025-02-01": 1.05}}}
+where each rate is the value of one unit of the currency in the base currency.
+The rate for a date is the latest rate on or before it.
+
+Lookups are memoized per (currency, date), and a ledger has far fewer distinct
+dates than rows, so converting a mixed-currency ledger stays the same order as
+summing it. Records already in the base currency skip the lookup entirely.
+"""
+
+BASE_CURRENCY = "USD"
+
+SYMBOLS = {
+    "USD": "$",
+    "EUR": "€",
+    "GBP": "£",
+    "JPY": "¥",
+    "INR": "₹",
+    "KRW": "₩"
+}
+
+class RateTable:
+    """
+    Exchange rates to the base currency, by currency and date.
+
+    Attributes:
+        base (str): The base currency code
+        missing (set): Currencies that were converted without any known rate
+    """
+    def __init__(self, base=BASE_CURRENCY):
+        self.base = base
+        self.missing = set()
+        self._dates = {}  # Format: {currency: sorted list of dates}
+        self._rates = {}  # Format: {currency: list of rates, aligned with _dates}
+        self._cache = {}  # Format: {(currency, date): rate}
+
+    def set_rate(self, currency, date, rate):
+        """
+        Add or replace the rate for a currency on a date.
+
+        Args:
+            currency (str): The currency code
+            date (str): The date in YYYY-MM-DD format
+            rate (float): Value of one unit of the currency in the base currency
+        """
+        dates = self._dates.setdefault(currency, [])
+        rates = self._rates.setdefault(currency, [])
+        position = bisect_right(dates, date)
+        if position and dates[position - 1] == date:
+            rates[position - 1] = float(rate)
+        else:
+            dates.insert(position, date)
+            rates.insert(position, float(rate))
+        # Cached lookups for this currency may now resolve to a different rate
+        self._cache = {key: value for key, value in self._cache.items() if key[0] != currency}
+        self.missing.discard(currency)
+
+    def has_rates(self, currency):
+        """
+        Check whether a currency can be converted.
+        """
+        return currency == self.base or currency in self._dates
+
+    def currencies(self):
+        """
+        Get every currency code with known rates, including the base.
+        """
+        return sorted(set(self._dates) | {self.base})
+
+    def rate(self, currency, date):
+        """
+        Get the rate for a currency on a date (memoized).
+
+        Dates before the first known rate use the first rate. Currencies with no
+        rates at all convert at 1.0 and are recorded in `missing`.
+
+        Args:
+            currency (str): The currency code
+            date (str): The date in YYYY-MM-DD format
+
+        Returns:
+            float: Value of one unit of the currency in the base currency
+        """
+        key = (currency, date)
+        rate = self._cache.get(key)
+        if rate is None:
+            dates = self._dates.get(currency)
+            if not dates:
+                self.missing.add(currency)
+                return 1.0
+            position = max(bisect_right(dates, date) - 1, 0)
+            rate = self._cache[key] = self._rates[currency][position]
+        return rate
+
+    def convert(self, amount, currency, date):
+        """
+        Convert an amount to the base currency.
+
+        Args:
+            amount (float): The amount in its own currency
+            currency (str): The currency code
+            date (str): The date of the record, in YYYY-MM-DD format
+
+        Returns:
+            float: The amount in the base currency
+        """
+        if currency == self.base or not currency:
+            return amount
+        return amount * self.rate(currency, date)
+
+    def to_dict(self):
+        """
+        Convert the rate table to a dictionary for storage.
+        """
+        return {
+            "base": self.base,
+            "rates": {currency: dict(zip(self._dates[currency], self._rates[currency])) for currency in self._dates}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a RateTable object from dictionary data.
+
+        Dates are normalized to YYYY-MM-DD as record dates are, so lookups compare
+        like with like.
+
+        Raises:
+            ValueError: If the data is not in the format above, naming the first bad entry
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Rates must be an object with "base" and "rates"')
+        base = data.get("base", BASE_CURRENCY)
+        if not isinstance(base, str) or not base.strip():
+            raise ValueError(f"Invalid base currency {base!r}")
+        by_currency = data.get("rates", {})
+        if not isinstance(by_currency, dict):
+            raise ValueError('"rates" must map each currency to its {date: rate} entries')
+        table = cls(base)
+        for currency, rates in by_currency.items():
+            if not isinstance(rates, dict):
+                raise ValueError(f"Rates for {currency} must map dates to rates")
+            _, _, dates = validate_dates(list(rates), allow_empty=False)
+            _, _, values = validate_amounts(list(rates.values()))
+            for date, normalized, value in zip(rates, dates, values):
+                if normalized is None:
+                    raise ValueError(f"Invalid date {date!r} for {currency}; please use YYYY-MM-DD")
+                if value is None:
+                    raise ValueError(f"Invalid {currency} rate {rates[date]!r} on {date}; rates must be numbers greater than 0")
+            by_date = dict(zip(dates, values))
+            table._dates[currency] = sorted(by_date)
+            table._rates[currency] = [by_date[date] for date in table._dates[currency]]
+        return table
+
+# The rate table of the active ledger
+_active_rates = RateTable()
+
+def set_rate_table(table):
+    """
+    Make a rate table the one used for conversions and formatting.
+
+    Args:
+        table (RateTable): The rate table to use
+    """
+    global _active_rates
+    _active_rates = table
+
+def get_rate_table():
+    """
+    Get the rate table used for conversions and formatting.
+    """
+    return _active_rates
+
+def base_currency():
+    """
+    Get the code of the base currency of the active rate table.
+    """
+    return _active_rates.base
+
+def to_base(amount, currency, date):
+    """
+    Convert an amount to the base currency with the active rate table.
+
+    Args:
+        amount (float): The amount in its own currency
+        currency (str): The currency code
+        date (str): The date of the record, in YYYY-MM-DD format
+
+    Returns:
+        float: The amount in the base currency
+    """
+    return _active_rates.convert(amount, currency, date)
+
+def record_amount(record, rates=None):
+    """
+    Get a record's amount in the base currency.
+
+    Args:
+        record (Expense or Income): The record
+        rates (RateTable): The rate table to convert with (default: the active one)
+
+    Returns:
+        float: The amount in the base currency
+    """
+    return (rates or _active_rates).convert(record.amount, record.currency, record.date)
+
+def currency_symbol(currency=None):
+    """
+    Get the prefix used to show amounts in a currency.
+
+    Example:
+        >>> currency_symbol("EUR")
+        '€'
+        >>> currency_symbol("CHF")
+        'CHF '
+    """
+    currency = currency or _active_rates.base
+    return SYMBOLS.get(currency, f"{currency} ")
+
+def format_amount(amount, currency=None):
+    """
+    Format an amount with its currency symbol, defaulting to the base currency.
+
+    Example:
+        >>> format_amount(42.5)
+        '$42.50'
+        >>> format_amount(42.5, "EUR")
+        '€42.50'
+    """
+    return f"{currency_symbol(currency)}{amount:.2f}"
+
+def validate_currency(currency_str):
+    """
+    Validates a currency code and converts it to upper case.
+
+    Args:
+        currency_str (str): The currency code, e.g. "eur"
+
+    Returns:
+        str: The upper-case code
+
+    Raises:
+        ValueError: If the code is not three letters
+    """
+    currency = currency_str.strip().upper()
+    if len(currency) != 3 or not currency.isalpha():
+        raise ValueError("Currency must be a three-letter code, e.g. USD")
+    return currency
+
+def prompt_currency():
+    """
+    Ask for the currency of a new record, defaulting to the base currency.
+
+    Returns:
+        str: The currency code, or None for the base currency
+    """
+    while True:
+        currency_str = input(f"Enter currency (e.g., USD, EUR) or leave empty for {base_currency()}: ").strip()
+        if not currency_str:
+            return None
+        try:
+            currency = validate_currency(currency_str)
+            if not _active_rates.has_rates(currency):
+                raise ValueError(f"No exchange rates for {currency}. Add them to rates.json first")
+            return currency
+        except ValueError as e:
+            print(f"Error: {e}")
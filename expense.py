@@ -1,8 +1,10 @@
 from datetime import datetime
 from validation import validate_amount, validate_date
+from currency import prompt_currency
+from accounts import prompt_account
 
 class Expense:
-    def __init__(self, date, amount, category, description):
+    def __init__(self, date, amount, category, description, currency=None, account=None):
         """
         Initialize an Expense object.
         
@@ -11,11 +13,15 @@ class Expense:
             amount (float): The amount of the expense
             category (str): The category of the expense (e.g., food, transport, bills)
             description (str): A detailed description of the expense
+            currency (str): The currency code of the amount, or None for the base currency
+            account (str): The account name, or None for the default account
         """
         self.date = date
         self.amount = float(amount)  # Ensure amount is float
         self.category = category
         self.description = description
+        self.currency = currency
+        self.account = account
 
     @classmethod
     def from_user_input(cls):
@@ -52,6 +58,8 @@ class Expense:
                         break  # Exit the amount input loop if successful
                     except ValueError as e:
                         print(f"Error: {str(e)}")
+                currency = prompt_currency()
+                account = prompt_account()
                 
                 # Category input and validation
                 category = input("Enter the category (e.g., food, transport, bills): ").strip()
@@ -64,7 +72,7 @@ class Expense:
                     raise ValueError("Description cannot be empty")
                 
                 # Create and return the new expense object
-                return cls(date, amount, category, description)
+                return cls(date, amount, category, description, currency, account)
                 
             except ValueError as e:
                 print(f"Error: {str(e)}")
@@ -88,7 +96,9 @@ class Expense:
             date=data['date'],
             amount=data['amount'],
             category=data['category'],
-            description=data['description']
+            description=data['description'],
+            currency=data.get('currency'),
+            account=data.get('account')
         )
 
     def to_dict(self):
@@ -98,12 +108,18 @@ class Expense:
         Returns:
             dict: Dictionary representation of the expense
         """
-        return {
+        data = {
             "date": self.date,
             "amount": self.amount,
             "category": self.category,
             "description": self.description
         }
+        # Optional fields are only written when set, so plain records keep the original four-field format
+        if self.currency:
+            data["currency"] = self.currency
+        if self.account:
+            data["account"] = self.account
+        return data
     
 
 #test:
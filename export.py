@@ -0,0 +1,388 @@
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from budget import split_category
+from storage import compile_row_schema, RowError, RECORD_SCHEMA
+from spill import sort_external
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: fall back to the stdlib column file
+    pyarrow = None
+
+"""
+Dezy's Budget Tracker - Export Module
+
+This module streams records from storage into files for external analysis tools:
+- CSV (one row per record)
+- Parquet, when pyarrow is installed
+- A simple stdlib column file otherwise (see export_columns for the layout)
+
+Records are read from the JSON files one at a time (iter_records), validated
+against the storage row schema (rows a load would quarantine are skipped) and
+written in batches, so memory stays bounded no matter how many rows the ledger holds.
+Every export accepts a date range and a category filter, and can be sorted by
+date or amount; sorting spills to temporary files past the memory cap (see spill.py).
+"""
+
+COLUMNS = ("date", "amount", "category", "description", "currency", "account")
+NUMERIC_COLUMNS = ("amount",)
+# Export sort orders: (key, descending)
+SORT_ORDERS = {
+    "date": (lambda record: record.get("date", ""), False),
+    "amount": (lambda record: record.get("amount", 0.0), True)  # Largest first
+}
+BATCH_SIZE = 10000
+CHUNK_SIZE = 1 << 16
+# Largest record iter_records will buffer, in characters; anything bigger is treated as a malformed file
+MAX_RECORD_SIZE = 1 << 20
+COLUMN_FILE_MAGIC = b"DEZYCOLS1\n"
+
+_SEPARATORS = " \t\r\n,"
+
+## Reading ----------------------------------------------------------------------------------------------------------------------------
+def iter_records(filename, chunk_size=CHUNK_SIZE, max_record_size=MAX_RECORD_SIZE):
+    """
+    Stream the records of a JSON list file one at a time.
+
+    Only one chunk of the file plus the current record is held in memory.
+
+    Args:
+        filename (str): Path of a file written by save_expenses/save_incomes
+        chunk_size (int): Number of characters to read at a time
+        max_record_size (int): Most characters one record may take
+
+    Yields:
+        dict: Each record as stored
+
+    Raises:
+        ValueError: If the file is not a JSON list, or a record does not end within max_record_size
+    """
+    decoder = json.JSONDecoder()
+    with open(filename, "r") as f:
+        buffer = ""
+        position = 0
+        started = False
+        while True:
+            # Skip whitespace and commas between records
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+
+            if position >= len(buffer):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if started:
+                        raise ValueError(f"{filename} ended before the closing ]")
+                    return
+                buffer, position = chunk, 0
+                continue
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"{filename} must contain a list of records")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The record is cut off at the end of the buffer: read more and retry
+                if len(buffer) - position > max_record_size:
+                    raise ValueError(f"{filename} has a malformed record (over {max_record_size} characters)")
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield record
+
+def stream_records(filename, record_class):
+    """
+    Stream validated record objects from a storage file without loading it.
+
+    Rows that fail validation are skipped (load_expenses and load_incomes
+    quarantine them when the ledger is loaded).
+
+    Args:
+        filename (str): Path of expenses.json or incomes.json
+        record_class (type): Expense or Income
+
+    Yields:
+        Expense or Income: Each valid record, in file order
+    """
+    if not os.path.exists(filename):
+        return
+    convert = compile_row_schema(record_class)
+    for row in iter_records(filename):
+        try:
+            yield convert(row)
+        except RowError:
+            continue
+
+_FIELDS = tuple(entry[0] for entry in RECORD_SCHEMA)
+
+def _row_dict(*values):
+    return dict(zip(_FIELDS, values))
+
+def stream_rows(filename):
+    """
+    Stream validated rows of a storage file as dictionaries, without loading it.
+
+    Rows go through the same schema as load_expenses and load_incomes: values
+    are converted (dates zero-padded, amounts as floats), missing optional fields
+    get their defaults, and rows a load would quarantine are skipped.
+
+    Args:
+        filename (str): Path of expenses.json or incomes.json
+
+    Yields:
+        dict: Each valid row, keyed by the schema's field names, in file order
+    """
+    if not os.path.exists(filename):
+        return
+    convert = compile_row_schema(_row_dict)
+    for row in iter_records(filename):
+        try:
+            yield convert(row)
+        except RowError:
+            continue
+
+def filter_records(records, start_date=None, end_date=None, category=None):
+    """
+    Yield the records inside a date range and category.
+
+    Args:
+        records (iterable): Record dictionaries
+        start_date (str): First date to include (YYYY-MM-DD), or None
+        end_date (str): Last date to include (YYYY-MM-DD), or None
+        category (str): Category to include, with its sub-categories, or None
+
+    Yields:
+        dict: Each matching record
+    """
+    path = split_category(category.lower()) if category else None
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        date = record.get("date", "")
+        if start_date and date < start_date:
+            continue
+        if end_date and date > end_date:
+            continue
+        if path and split_category(str(record.get("category", "")).lower())[:len(path)] != path:
+            continue
+        yield record
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+## Writing ----------------------------------------------------------------------------------------------------------------------------
+def export_csv(records, destination):
+    """
+    Write records to a CSV file, one row at a time.
+
+    Args:
+        records (iterable): Record dictionaries
+        destination (str): Path of the CSV file to write
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    with open(destination, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for record in records:
+            writer.writerow([record.get(column, "") for column in COLUMNS])
+            count += 1
+    return count
+
+def export_parquet(records, destination, batch_size=BATCH_SIZE):
+    """
+    Write records to a Parquet file in row groups of batch_size rows.
+
+    Args:
+        records (iterable): Record dictionaries
+        destination (str): Path of the Parquet file to write
+        batch_size (int): Rows per row group
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+    schema = pyarrow.schema([
+        (column, pyarrow.float64() if column in NUMERIC_COLUMNS else pyarrow.string()) for column in COLUMNS
+    ])
+    count = 0
+    with pyarrow.parquet.ParquetWriter(destination, schema) as writer:
+        for batch in _batches(records, batch_size):
+            columns = {column: [_column_value(record, column) for record in batch] for column in COLUMNS}
+            writer.write_table(pyarrow.table(columns, schema=schema))
+            count += len(batch)
+    return count
+
+def _column_value(record, column):
+    value = record.get(column)
+    if column in NUMERIC_COLUMNS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float("nan")
+    return "" if value is None else str(value)
+
+def export_columns(records, destination, batch_size=BATCH_SIZE):
+    """
+    Write records to a stdlib column file.
+
+    Each column is streamed to its own temporary file, then the columns are
+    concatenated behind a header, so memory is bounded by batch_size.
+
+    Layout:
+        COLUMN_FILE_MAGIC
+        one line of JSON: {"rows": n, "columns": [{"name", "type", "offset", "length"}]}
+        column blocks, offsets relative to the end of the header line
+        - "float64" columns: little-endian doubles
+        - "string" columns: one JSON string per line
+
+    Args:
+        records (iterable): Record dictionaries
+        destination (str): Path of the column file to write
+        batch_size (int): Rows buffered per column before writing
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(destination))) as directory:
+        paths = {column: os.path.join(directory, column) for column in COLUMNS}
+        files = {column: open(path, "wb") for column, path in paths.items()}
+        try:
+            for batch in _batches(records, batch_size):
+                for column in COLUMNS:
+                    values = [_column_value(record, column) for record in batch]
+                    if column in NUMERIC_COLUMNS:
+                        data = array("d", values)
+                        if sys.byteorder != "little":
+                            data.byteswap()
+                        data.tofile(files[column])
+                    else:
+                        files[column].write("".join(json.dumps(value) + "\n" for value in values).encode("utf-8"))
+                count += len(batch)
+        finally:
+            for f in files.values():
+                f.close()
+
+        header = {"rows": count, "columns": []}
+        offset = 0
+        for column in COLUMNS:
+            length = os.path.getsize(paths[column])
+            header["columns"].append({
+                "name": column,
+                "type": "float64" if column in NUMERIC_COLUMNS else "string",
+                "offset": offset,
+                "length": length
+            })
+            offset += length
+
+        with open(destination, "wb") as out:
+            out.write(COLUMN_FILE_MAGIC)
+            out.write(json.dumps(header).encode("utf-8") + b"\n")
+            for column in COLUMNS:
+                with open(paths[column], "rb") as f:
+                    shutil.copyfileobj(f, out)
+    return count
+
+def read_column(filename, name, chunk_rows=BATCH_SIZE):
+    """
+    Stream one column back out of a file written by export_columns.
+
+    Args:
+        filename (str): Path of the column file
+        name (str): The column to read
+        chunk_rows (int): Numeric values read per chunk
+
+    Yields:
+        float or str: Each value in row order
+    """
+    with open(filename, "rb") as f:
+        if f.readline() != COLUMN_FILE_MAGIC:
+            raise ValueError(f"{filename} is not a column file")
+        header = json.loads(f.readline())
+        data_start = f.tell()
+        column = next((entry for entry in header["columns"] if entry["name"] == name), None)
+        if column is None:
+            raise ValueError(f"Unknown column: {name}")
+
+        f.seek(data_start + column["offset"])
+        if column["type"] == "float64":
+            remaining = header["rows"]
+            while remaining:
+                data = array("d")
+                data.fromfile(f, min(chunk_rows, remaining))
+                if sys.byteorder != "little":
+                    data.byteswap()
+                remaining -= len(data)
+                yield from data
+        else:
+            for _ in range(header["rows"]):
+                yield json.loads(f.readline())
+
+def export_records(source, destination, file_format, start_date=None, end_date=None, category=None, sort_by=None):
+    """
+    Stream records from a storage file into an export file.
+
+    Args:
+        source (str): Path of expenses.json or incomes.json
+        destination (str): Path of the file to write
+        file_format (str): "csv" or "columnar" (Parquet if pyarrow is installed,
+                           otherwise the stdlib column file)
+        start_date (str): First date to include (YYYY-MM-DD), or None
+        end_date (str): Last date to include (YYYY-MM-DD), or None
+        category (str): Category to include, with its sub-categories, or None
+        sort_by (str): A key of SORT_ORDERS ("date" or "amount"), or None for file order
+
+    Rows that fail validation are skipped, as stream_rows does.
+
+    Returns:
+        int: Number of rows written
+    """
+    records = filter_records(stream_rows(source), start_date, end_date, category)
+    if sort_by:
+        if sort_by not in SORT_ORDERS:
+            raise ValueError("Sort must be 'date' or 'amount'")
+        key, descending = SORT_ORDERS[sort_by]
+        records = sort_external(records, key=key, reverse=descending)
+    if file_format == "csv":
+        return export_csv(records, destination)
+    if file_format == "columnar":
+        if pyarrow is not None:
+            return export_parquet(records, destination)
+        return export_columns(records, destination)
+    raise ValueError("Format must be 'csv' or 'columnar'")
+
+def columnar_extension():
+    """
+    Get the file extension used for columnar exports in this environment.
+    """
+    return "parquet" if pyarrow is not None else "cols"
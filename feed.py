@@ -0,0 +1,208 @@
+import json
+import os
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: there, only one process may write a change file
+    fcntl = None
+
+"""
+Dezy's Budget Tracker - Feed Module
+
+This module publishes ledger changes as a change feed, so dashboards and other
+consumers see each add, delete and budget change instead of polling and
+re-parsing expenses.json.
+
+Every change the operations report to their listeners (adding or deleting
+expenses and incomes, setting the budget, imports, undo/redo) becomes an event
+with a sequence number one higher than the last. Events are held until the
+change has been saved (ChangeFeed.publish is a storage save listener), so a
+consumer never sees a change that is not on disk. Then they are:
+- appended to the change file (changes.jsonl, one JSON event per line), which
+  other processes read with read_changes from the last sequence number they saw
+- passed to callbacks registered with ChangeFeed.subscribe, in the same process
+
+Sequence numbers continue across runs and never repeat. Writers take an
+exclusive lock on the change file and number their events after its last line,
+so several processes writing one ledger still get distinct numbers (on systems
+without fcntl, only one writer per ledger is supported). Because they increase
+down the file, read_changes finds its starting point with a binary search over
+byte offsets rather than reading the events before it.
+"""
+
+CHANGES_FILENAME = "changes.jsonl"
+TAIL_CHUNK_SIZE = 4096
+
+def _last_line(f, end):
+    # Read backwards from the end of the file to the start of the last line
+    position = end
+    tail = b""
+    while position > 0:
+        step = min(TAIL_CHUNK_SIZE, position)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        newline = tail.rfind(b"\n", 0, len(tail) - 1)
+        if newline != -1:
+            return tail[newline + 1:]
+    return tail
+
+def last_sequence(path):
+    """
+    Get the sequence number of the last event in a change file.
+
+    Args:
+        path (str): Path of the change file
+
+    Returns:
+        int: The last sequence number, or 0 if the file is missing or empty
+    """
+    try:
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return 0
+            return json.loads(_last_line(f, end))["seq"]
+    except FileNotFoundError:
+        return 0
+
+def _line_at(f, position):
+    # Find the first line starting at or after a byte position: (its sequence number or None at the end, its start)
+    if position:
+        f.seek(position - 1)
+        f.readline()  # Finish the line holding position - 1, which ends at or after position
+    else:
+        f.seek(0)
+    start = f.tell()
+    line = f.readline()
+    if not line.strip():
+        return None, start
+    return json.loads(line)["seq"], start
+
+def read_changes(path, since=0):
+    """
+    Read the events after a sequence number from a change file.
+
+    Args:
+        path (str): Path of the change file
+        since (int): The last sequence number already processed (0 for all events)
+
+    Yields:
+        dict: Each event with a higher sequence number, oldest first. Format:
+              {"seq": int, "time": str, "action": "add", "delete" or "set",
+               "kind": "expense", "income" or "budget", "index": int or None,
+               "record": dict or None}
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        # Binary search for the first byte position whose next line holds an event after since
+        low, high = 0, f.seek(0, os.SEEK_END)
+        while low < high:
+            middle = (low + high) // 2
+            seq, _ = _line_at(f, middle)
+            if seq is None or seq > since:
+                high = middle
+            else:
+                low = middle + 1
+        _, start = _line_at(f, low)
+        f.seek(start)
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event["seq"] > since:
+                yield event
+
+class ChangeFeed:
+    """
+    The change feed of one ledger.
+
+    Attributes:
+        path (str): Path of the change file, or None to only notify subscribers
+        seq (int): Sequence number of the last event published
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.seq = last_sequence(path) if path else 0
+        self._subscribers = []
+        self._pending = []  # Events of changes that are not saved yet, without sequence numbers
+
+    def subscribe(self, callback):
+        """
+        Register a callback for new events.
+
+        Args:
+            callback (function): Called with each event dict (see read_changes),
+                                 after the change is applied and written
+        """
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Unregister a callback previously added with subscribe.
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that records each ledger change as a pending event.
+
+        The event is published by the next successful save (see publish).
+
+        Args:
+            action (str): "add", "delete" or "set"
+            kind (str): "expense", "income" or "budget"
+            record (Expense, Income or Budget): The changed record, or None for a removed budget
+            index (int): Position of the record in its list
+        """
+        self._pending.append({
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "action": action,
+            "kind": kind,
+            "index": index,
+            "record": record.to_dict() if record else None
+        })
+
+    def publish(self, path=None):
+        """
+        Save listener that numbers the pending events, writes them and notifies subscribers.
+
+        Register it with storage.add_save_listener. The sequence numbers continue from
+        the last event in the change file, read under the file lock, so events written
+        by another process in the meantime are not numbered twice.
+
+        Args:
+            path (str): The file that was saved (unused)
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if self.path:
+            with open(self.path, "a") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)  # Released when the file is closed
+                self.seq = last_sequence(self.path)
+                events = [{"seq": self.seq + number, **event} for number, event in enumerate(pending, 1)]
+                f.write("".join(json.dumps(event) + "\n" for event in events))
+        else:
+            events = [{"seq": self.seq + number, **event} for number, event in enumerate(pending, 1)]
+        self.seq += len(events)
+
+        for event in events:
+            for callback in list(self._subscribers):
+                callback(event)
+
+    def changes_since(self, since=0):
+        """
+        Read the events after a sequence number from this feed's change file.
+
+        Returns:
+            list: The events, oldest first (empty if the feed has no file)
+        """
+        return list(read_changes(self.path, since)) if self.path else []
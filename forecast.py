@@ -0,0 +1,233 @@
+import calendar
+from datetime import datetime
+from rollups import ALL_CATEGORIES
+from currency import format_amount
+from budget import split_category
+
+"""
+Dezy's Budget Tracker - Forecast Module
+
+This module projects end-of-month spending per category and flags categories
+that are likely to exceed their budget before they actually do.
+
+Forecasts read the monthly series from the cash-flow cube (see rollups.py),
+so the cost is O(number of months) regardless of how many expenses are stored.
+A budgeted category's series includes its sub-categories ("food" counts
+"food > groceries"), resolved through the budget tree the same way the
+budget view rolls up spend.
+
+Supported methods:
+- "burn": current month's daily burn rate extrapolated to the end of the month
+- "average": moving average of the previous months
+- "smoothing": exponential smoothing of the previous months
+- "trend": least-squares linear trend of the previous months
+"""
+
+METHODS = ("burn", "average", "smoothing", "trend")
+
+## Series forecasts --------------------------------------------------------------------------------------------------------------------
+def moving_average(values, window=3):
+    """
+    Forecast the next value as the mean of the last `window` values.
+
+    Args:
+        values (list): Historical values, oldest first
+        window (int): Number of values to average
+
+    Returns:
+        float: The forecast, or None if there are no values
+    """
+    if not values:
+        return None
+    recent = values[-window:]
+    return sum(recent) / len(recent)
+
+def exponential_smoothing(values, alpha=0.5):
+    """
+    Forecast the next value with simple exponential smoothing.
+
+    Args:
+        values (list): Historical values, oldest first
+        alpha (float): Smoothing factor between 0 and 1 (higher favors recent values)
+
+    Returns:
+        float: The forecast, or None if there are no values
+    """
+    if not values:
+        return None
+    level = values[0]
+    for value in values[1:]:
+        level = alpha * value + (1 - alpha) * level
+    return level
+
+def linear_trend(values):
+    """
+    Forecast the next value by extending a least-squares line through the values.
+
+    Args:
+        values (list): Historical values, oldest first
+
+    Returns:
+        float: The forecast (never negative), or None if there are no values
+    """
+    n = len(values)
+    if n == 0:
+        return None
+    if n == 1:
+        return values[0]
+
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    variance = sum((x - mean_x) ** 2 for x in range(n))
+    slope = covariance / variance
+    return max(0.0, mean_y + slope * (n - mean_x))
+
+## Projections -------------------------------------------------------------------------------------------------------------------------
+def rolled_up_series(cube, categories, tree=None):
+    """
+    Get the monthly expense series of categories, each including its sub-categories.
+
+    Every category stored in the cube is resolved once through the budget tree
+    (so a plain "groceries" counts towards "food > groceries") and its monthly
+    totals are added to each requested category on its path.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        categories (list): Categories, or ALL_CATEGORIES for total spending
+        tree (BudgetTree): The budget tree, or None to read each category's own cells only
+
+    Returns:
+        dict: Format: {category: [(period, total)]}, oldest period first
+    """
+    if tree is None:
+        return {category: cube.series("month", "expense", category) for category in categories}
+
+    paths = {category: split_category(category) for category in categories if category is not ALL_CATEGORIES}
+    resolved = {}  # Format: {stored category: requested categories it counts towards}
+    series = {category: [] for category in categories}
+    for period in cube.periods("month"):
+        totals = dict.fromkeys(paths, 0.0)
+        for stored, amount in cube.category_totals("month", period, "expense").items():
+            targets = resolved.get(stored)
+            if targets is None:
+                path = split_category(tree.resolve(stored).category or "")
+                targets = resolved[stored] = [category for category, parts in paths.items() if path[:len(parts)] == parts]
+            for category in targets:
+                totals[category] += amount
+        if ALL_CATEGORIES in series:
+            totals[ALL_CATEGORIES] = cube.total("month", period, "expense")
+        for category, total in totals.items():
+            series[category].append((period, total))
+    return series
+
+def _project(series, method, today):
+    # Project the end-of-month spend from a monthly series: (spent so far, projected total)
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of: {', '.join(METHODS)}")
+
+    today = today or datetime.now().date()
+    month = today.strftime("%Y-%m")
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    elapsed = today.day / days_in_month
+
+    spent = dict(series).get(month, 0.0)
+    burn = spent / elapsed
+
+    history = [total for period, total in series if period < month]
+    if method == "burn" or not history:
+        return spent, burn
+
+    if method == "average":
+        expected = moving_average(history)
+    elif method == "smoothing":
+        expected = exponential_smoothing(history)
+    else:
+        expected = linear_trend(history)
+
+    return spent, spent + expected * (1 - elapsed)
+
+def project_category(cube, category, method="smoothing", today=None, tree=None):
+    """
+    Project the end-of-month spend for one category.
+
+    History-based methods forecast a full month and scale it to the days that
+    are left; if there is no history the burn rate is used instead.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        category (str): The category, or ALL_CATEGORIES for total spending
+        method (str): One of METHODS
+        today (date): The current date, defaults to today
+        tree (BudgetTree): The budget tree, used to include sub-category spend
+
+    Returns:
+        tuple: (spent so far, projected end-of-month total)
+    """
+    return _project(rolled_up_series(cube, [category], tree)[category], method, today)
+
+def forecast_budget(cube, budget, method="smoothing", today=None, tree=None):
+    """
+    Project every budgeted category and flag the ones at risk.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        budget (Budget): The Budget object
+        method (str): One of METHODS
+        today (date): The current date, defaults to today
+        tree (BudgetTree): The budget tree, used to include sub-category spend
+
+    Returns:
+        list: One dict per category with keys category, spent, projected, limit and status
+              ("exceeded", "at risk" or "ok"). The overall budget is listed as category None.
+    """
+    limits = dict(budget.categories)
+    limits[ALL_CATEGORIES] = budget.amount
+
+    series = rolled_up_series(cube, list(limits), tree)
+    results = []
+    for category, limit in limits.items():
+        spent, projected = _project(series[category], method, today)
+        if spent > limit:
+            status = "exceeded"
+        elif projected > limit:
+            status = "at risk"
+        else:
+            status = "ok"
+        results.append({
+            "category": category,
+            "spent": spent,
+            "projected": projected,
+            "limit": limit,
+            "status": status
+        })
+    return results
+
+def view_forecast(cube, budget, method="smoothing", today=None, tree=None):
+    """
+    Display projected end-of-month spending against the budget.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        budget (Budget): The Budget object
+        method (str): One of METHODS
+        today (date): The current date, defaults to today
+        tree (BudgetTree): The budget tree, used to include sub-category spend
+    """
+    if not budget:
+        print("No budget has been set.")
+        return
+
+    results = forecast_budget(cube, budget, method, today, tree)
+
+    print(f"\n--- Spending Forecast ({method}) ---")
+    print("Category          | Spent        | Projected    | Budget       | Status")
+    print("-" * 75)
+    for result in results:
+        name = result["category"] if result["category"] is not ALL_CATEGORIES else "Overall"
+        print(f"{name:<17} | {format_amount(result['spent']):>11} | {format_amount(result['projected']):>11} | {format_amount(result['limit']):>11} | {result['status']}")
+
+    at_risk = [result for result in results if result["status"] == "at risk"]
+    for result in at_risk:
+        name = result["category"] if result["category"] is not ALL_CATEGORIES else "your overall budget"
+        print(f"Warning: You are on track to exceed {name} by {format_amount(result['projected'] - result['limit'])}!")
@@ -0,0 +1,691 @@
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+import storage
+from accounts import Account, SavingsGoal, BalanceLedger, record_account, signed_amount
+from budget import Budget, BudgetTree
+from currency import RateTable, record_amount, get_rate_table, set_rate_table
+from expense import Expense
+from income import Income
+from operations import (add_listener, remove_listener, notify_listeners, delete_expense, delete_income, delete_records,
+                        build_expenses_report, build_incomes_report, build_budget_report, build_expense_analysis_report,
+                        build_financial_report, build_accounts_report, build_goals_report)
+from profiles import Ledger, CACHE_SOURCES, restore_derived
+from cache import DerivedCache
+from reports import render
+from rollups import CashFlowCube
+from storage import (save_expenses, load_expenses, save_incomes, load_incomes, save_budget, load_budget, save_rates, load_rates,
+                     save_accounts, load_accounts)
+
+"""
+Dezy's Budget Tracker - Harness Module
+
+This module checks ledger invariants against randomly generated ledgers and
+operation sequences, so incremental and cached code paths (cash-flow cube,
+budget tree, account balances, anomaly statistics, report cache) can be changed with confidence. Run it directly:
+
+    python harness.py random --seeds 200
+    python harness.py scale --rows 1000000
+
+Harnesses:
+- random: many small ledgers per seed; after every random operation (add, delete,
+  batch delete, budget change, undo, redo) all invariants are checked
+- scale: one large ledger from the same generators, with each phase and the
+  slowest operation of each type checked against a time limit that grows with
+  the row count
+
+Invariants:
+- report totals equal the sum of the rows (converted to the base currency)
+- per-category sums add up to the totals, and match a direct group-by
+- the incrementally maintained cube and budget tree match a fresh rebuild
+- account balances on every date match a replay of the rows, and the goal and
+  net-worth reports match those balances
+- the online anomaly statistics match each category's mean, deviation and count,
+  and only flag expenses still in the ledger
+- cached report renderings match a fresh rendering
+- save -> load round-trips records, budget, rates and accounts exactly
+- the sidecar cache restores the same records and aggregates, and a same-size
+  edit that keeps the file's modification time still invalidates it
+
+Every failure is printed with its seed and step, so it can be replayed with
+--seed. The script exits with status 1 if any harness fails.
+"""
+
+CATEGORIES = ["food", "food > groceries", "groceries", "food > restaurants", "transport", "rent", "fun", "fun > movies",
+              "a category name that is much longer than the table columns"]
+INCOME_CATEGORIES = ["salary", "freelance", "investment"]
+WORDS = ["lunch", "cafe", "uber", "airport", "rent", "netflix", "groceries", "trader", "joes", "refund", "café"]
+# Mostly base-currency records, as in a real ledger
+CURRENCIES = [None, None, None, "EUR", "GBP"]
+# Mostly the default account; "brokerage" is only named on records, never defined
+ACCOUNTS = [None, None, None, "savings", "cash", "brokerage"]
+OPERATIONS = ("add", "add", "add", "delete", "delete_many", "budget", "undo", "redo")
+
+# Seconds allowed per million rows for each phase of the scale harness (at least 1 second each)
+SCALE_LIMITS = {
+    "generate": 30,
+    "build": 30,
+    "invariants": 60,
+    "round-trip": 60
+}
+
+# Seconds allowed per million rows for the slowest single operation of each type (at least 0.25s).
+# Undo and redo rewrite the whole data file, a budget change rebuilds the budget tree and
+# every 100th change writes a history checkpoint, so those are O(n); other adds must stay
+# independent of the ledger size.
+OPERATION_LIMITS = {
+    "add": 0.01,
+    "delete": 0.5,
+    "set": 5,
+    "undo": 20,
+    "redo": 20,
+    "checkpoint": 30,
+    "no-op": 0.01
+}
+
+## Generators -------------------------------------------------------------------------------------------------------------------------
+def random_amount(rng):
+    """
+    Generate an amount, mixing typical values with edge cases (one cent, very large).
+    """
+    roll = rng.random()
+    if roll < 0.05:
+        return 0.01
+    if roll < 0.1:
+        return round(rng.uniform(10000, 1000000), 2)
+    return round(rng.uniform(0.01, 500), 2)
+
+def random_date(rng):
+    """
+    Generate a date in YYYY-MM-DD format between 2024 and 2026.
+    """
+    return f"{rng.randint(2024, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+def random_record(rng, kind):
+    """
+    Generate an Expense or Income object.
+
+    Args:
+        rng (random.Random): The random generator
+        kind (str): "expense" or "income"
+
+    Returns:
+        Expense or Income: The new record
+    """
+    record_class = Expense if kind == "expense" else Income
+    category = rng.choice(CATEGORIES if kind == "expense" else INCOME_CATEGORIES)
+    description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+    return record_class(random_date(rng), random_amount(rng), category, description, rng.choice(CURRENCIES),
+                        rng.choice(ACCOUNTS))
+
+def random_rates(rng):
+    """
+    Generate a rate table with a few dated rates for each foreign currency.
+    """
+    rates = RateTable()
+    for currency in ("EUR", "GBP"):
+        for year in range(2024, 2027):
+            for month in range(1, 13, 3):
+                rates.set_rate(currency, f"{year}-{month:02d}-01", round(rng.uniform(0.5, 2.0), 4))
+    return rates
+
+def random_budget(rng, allow_none=True):
+    """
+    Generate a Budget with a random set of category and sub-category budgets.
+
+    Returns:
+        Budget: The budget, or None (only if allow_none is True)
+    """
+    if allow_none and rng.random() < 0.2:
+        return None
+    budget = Budget(round(rng.uniform(100, 10000), 2))
+    for category in rng.sample(CATEGORIES, rng.randint(0, 4)):
+        budget.set_category_budget(category, round(rng.uniform(10, 2000), 2))
+    return budget
+
+def random_ledger(rng, expense_count, income_count, directory):
+    """
+    Generate a ledger and build its aggregates.
+
+    Args:
+        rng (random.Random): The random generator
+        expense_count (int): Number of expenses
+        income_count (int): Number of incomes
+        directory (str): Root directory for the ledger's history files
+
+    Returns:
+        Ledger: The new ledger
+    """
+    rates = random_rates(rng)
+    expenses = [random_record(rng, "expense") for _ in range(expense_count)]
+    incomes = [random_record(rng, "income") for _ in range(income_count)]
+    accounts = [Account("checking"), Account("savings", "savings", round(rng.uniform(0, 5000), 2)), Account("cash", "cash")]
+    goals = [SavingsGoal("emergency fund", round(rng.uniform(1000, 20000), 2), "savings", random_date(rng)),
+             SavingsGoal("holiday", 500, "cash")]
+    return Ledger("harness", directory, expenses, incomes, random_budget(rng), [], rates, [], accounts, goals)
+
+def apply_random_operation(rng, ledger):
+    """
+    Apply one random operation to a ledger through the operations module.
+
+    Listeners are notified exactly as the menu handlers do, so the ledger's
+    aggregates must stay consistent.
+
+    Args:
+        rng (random.Random): The random generator
+        ledger (Ledger): The ledger, with its listeners registered
+
+    Returns:
+        str: Description of the operation, for failure reports
+    """
+    operation = rng.choice(OPERATIONS)
+    kind = rng.choice(("expense", "expense", "income"))
+    records = ledger.expenses if kind == "expense" else ledger.incomes
+
+    if operation == "add":
+        record = random_record(rng, kind)
+        records.append(record)
+        notify_listeners("add", kind, record, len(records) - 1)
+        return f"add {kind} {record.to_dict()}"
+    if operation == "delete" and records:
+        index = rng.randrange(len(records))
+        (delete_expense if kind == "expense" else delete_income)(records, index)
+        return f"delete {kind} {index}"
+    if operation == "delete_many" and records:
+        indices = rng.sample(range(len(records)), rng.randint(1, min(5, len(records))))
+        delete_records(records, indices, kind)
+        return f"delete {kind}s {sorted(indices)}"
+    if operation == "budget":
+        ledger.budget = random_budget(rng, allow_none=False)
+        notify_listeners("set", "budget", ledger.budget)
+        return f"set budget {ledger.budget.to_dict()}"
+    if operation == "undo" and ledger.history.can_undo():
+        change, ledger.budget = ledger.history.undo()
+        return f"undo {change}"
+    if operation == "redo" and ledger.history.can_redo():
+        change, ledger.budget = ledger.history.redo()
+        return f"redo {change}"
+    return "no-op"
+
+## Invariants -------------------------------------------------------------------------------------------------------------------------
+def _close(first, second):
+    # Incremental totals add and subtract in a different order than a fresh sum
+    return math.isclose(first, second, rel_tol=1e-9, abs_tol=1e-6)
+
+def _fields(report):
+    values = {}
+    for block in report.blocks:
+        for label, value, kind in block.get("fields", []) + block.get("footer", []):
+            values[label] = value
+    return values
+
+def _table(report, title=None):
+    for block in report.blocks:
+        if block["type"] == "table" and block["title"] == title:
+            return block["rows"]
+    return []
+
+def _group_by(records, key):
+    totals = {}
+    for record in records:
+        name = key(record)
+        totals[name] = totals.get(name, 0.0) + record_amount(record)
+    return totals
+
+def check_reports(ledger):
+    """
+    Check that every report's totals match the rows they summarize.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    expenses, incomes, budget = ledger.expenses, ledger.incomes, ledger.budget
+    expense_total = math.fsum(record_amount(expense) for expense in expenses)
+    income_total = math.fsum(record_amount(income) for income in incomes)
+    expense_categories = _group_by(expenses, lambda record: record.category)
+    income_categories = _group_by(incomes, lambda record: record.category)
+
+    # Listings: one row per record, footer total equals the sum of the rows
+    for name, report, records, total, label in (
+        ("expenses", build_expenses_report(expenses), expenses, expense_total, "Total Expenses"),
+        ("incomes", build_incomes_report(incomes), incomes, income_total, "Total Income")
+    ):
+        rows = _table(report)
+        if len(rows) != len(records):
+            failures.append(f"{name} report has {len(rows)} rows for {len(records)} records")
+        if records and not _close(_fields(report)[label], total):
+            failures.append(f"{name} report total {_fields(report)[label]} != sum of rows {total}")
+
+    # Financial summary: totals and per-category sums
+    if expenses or incomes:
+        report = build_financial_report(incomes, expenses, budget)
+        fields = _fields(report)
+        if not _close(fields["Total Expenses"], expense_total):
+            failures.append(f"financial summary expenses {fields['Total Expenses']} != {expense_total}")
+        if not _close(fields["Total Income"], income_total):
+            failures.append(f"financial summary income {fields['Total Income']} != {income_total}")
+        if not _close(fields["Net Income"], income_total - expense_total):
+            failures.append("financial summary net income != income - expenses")
+        for title, expected, total in (("Expenses by Category", expense_categories, expense_total),
+                                       ("Income by Category", income_categories, income_total)):
+            rows = _table(report, title)
+            if {row[0] for row in rows} != set(expected):
+                failures.append(f"{title} lists {sorted(row[0] for row in rows)}, expected {sorted(expected)}")
+            for category, amount, share in rows:
+                if not _close(amount, expected.get(category, 0.0)):
+                    failures.append(f"{title} {category}: {amount} != {expected.get(category)}")
+            if rows and not _close(math.fsum(row[1] for row in rows), total):
+                failures.append(f"{title} categories do not add up to {total}")
+
+    # Expense analysis and budget: the incremental tree against a fresh build
+    fresh = BudgetTree.build(budget, expenses, ledger.rates)
+    tree = ledger.budget_tree
+    if tree.root.total_count() != len(expenses):
+        failures.append(f"budget tree counts {tree.root.total_count()} expenses, ledger has {len(expenses)}")
+    if not _close(tree.root.total_spent(), expense_total):
+        failures.append(f"budget tree total {tree.root.total_spent()} != sum of rows {expense_total}")
+    live_nodes = {node.category: node for node, depth in tree.evaluate()}
+    for node, depth in fresh.evaluate():
+        live = live_nodes.get(node.category)
+        if live is None:
+            if node.total_count() or node.limit():
+                failures.append(f"budget tree is missing category {node.category}")
+            continue
+        if live.total_count() != node.total_count() or not _close(live.total_spent(), node.total_spent()):
+            failures.append(f"budget tree {node.category}: {live.total_spent()} ({live.total_count()}) "
+                            f"!= rebuilt {node.total_spent()} ({node.total_count()})")
+        if not _close(live.limit(), node.limit()):
+            failures.append(f"budget tree {node.category} limit {live.limit()} != rebuilt {node.limit()}")
+        children_spent = math.fsum(child.total_spent() for child in live.children.values())
+        if not _close(live.total_spent(), live.spent + children_spent):
+            failures.append(f"budget tree {node.category} total is not its own spend plus its children")
+
+    if expenses:
+        fields = _fields(build_expense_analysis_report(expenses, budget, tree))
+        if fields["Number of expenses"] != len(expenses) or not _close(fields["Total expenses"], expense_total):
+            failures.append("expense analysis totals do not match the rows")
+    if budget:
+        fields = _fields(build_budget_report(budget, tree))
+        if budget.categories and not _close(fields["Total category budgets"], budget.get_total_category_budgets()):
+            failures.append("budget report category total does not match the budget")
+    return failures
+
+def check_cube(ledger):
+    """
+    Check the incrementally maintained cash-flow cube against a fresh build
+    and a direct group-by of the rows.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    fresh = CashFlowCube.build(ledger.expenses, ledger.incomes, ledger.rates)
+    for kind, records in (("expense", ledger.expenses), ("income", ledger.incomes)):
+        by_month = _group_by(records, lambda record: record.date[:7])
+        by_month_category = _group_by(records, lambda record: (record.date[:7], record.category))
+        for month in set(by_month) | set(ledger.cube.periods("month")):
+            live = ledger.cube.total("month", month, kind)
+            if not _close(live, by_month.get(month, 0.0)) or not _close(live, fresh.total("month", month, kind)):
+                failures.append(f"cube {kind} total for {month}: {live} != {by_month.get(month, 0.0)}")
+            for category, total in ledger.cube.category_totals("month", month, kind).items():
+                if not _close(total, by_month_category.get((month, category), 0.0)):
+                    failures.append(f"cube {kind} {month} {category}: {total} != {by_month_category.get((month, category))}")
+        for granularity in ("day", "week"):
+            total = math.fsum(ledger.cube.total(granularity, period, kind) for period in ledger.cube.periods(granularity))
+            if not _close(total, math.fsum(by_month.values())):
+                failures.append(f"cube {kind} {granularity} periods do not add up to the total")
+    return failures
+
+def check_balances(ledger):
+    """
+    Check the checkpointed account balances against a replay of the rows on
+    every date that has rows (plus before the first row and now), and the
+    account and goal reports against those balances.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    rows = {}  # Format: {account: [(date, signed amount)]}
+    for kind, records in (("expense", ledger.expenses), ("income", ledger.incomes)):
+        for record in records:
+            rows.setdefault(record_account(record), []).append((record.date, signed_amount(record, kind)))
+    balances = ledger.balances
+    fresh = BalanceLedger.build(ledger.accounts, ledger.expenses, ledger.incomes, balances.interval, ledger.rates)
+    openings = {account.name: account.opening_balance for account in ledger.accounts}
+    expected_now = {}
+    for account in set(rows) | set(balances.account_names()):
+        entries = sorted(rows.get(account, []), key=lambda entry: entry[0])
+        replayed = {"0000-01-01": 0.0}
+        running = 0.0
+        for date_str, amount in entries:
+            running += amount
+            replayed[date_str] = running
+        expected_now[account] = openings.get(account, 0.0) + running
+        replayed[None] = running
+        for date_str, total in replayed.items():
+            expected = openings.get(account, 0.0) + total
+            for name, ledger_balances in (("incremental", balances), ("rebuilt", fresh)):
+                live = ledger_balances.balance(account, date_str)
+                if not _close(live, expected):
+                    failures.append(f"{name} balance of {account} on {date_str or 'now'}: {live} != replay {expected}")
+                    break
+
+    fields = _fields(build_accounts_report(balances))
+    if not _close(fields["Net Worth"], math.fsum(expected_now.values())):
+        failures.append(f"net worth {fields['Net Worth']} != sum of replayed balances {math.fsum(expected_now.values())}")
+    today = date.today().isoformat()
+    for row in _table(build_goals_report(balances, ledger.goals, today)):
+        goal = ledger.goals[row[0]]
+        if not _close(row[4], balances.balance(goal.account, today)):
+            failures.append(f"goal {goal.name} saved {row[4]} != balance of {goal.account}")
+    return failures
+
+def check_anomalies(ledger):
+    """
+    Check the incrementally maintained anomaly statistics against each category's
+    expenses, and that every flag refers to an expense still in the ledger.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    amounts = {}  # Format: {category: [amounts in the base currency]}
+    for expense in ledger.expenses:
+        amounts.setdefault(expense.category, []).append(record_amount(expense))
+    detector = ledger.anomalies
+    for category in set(amounts) | set(detector.stats):
+        values = amounts.get(category, [])
+        stats = detector.stats.get(category)
+        count = stats.count if stats else 0
+        if count != len(values):
+            failures.append(f"anomaly count of {category}: {count} != {len(values)}")
+            continue
+        if not values:
+            continue
+        mean = math.fsum(values) / len(values)
+        std = math.sqrt(math.fsum((value - mean) ** 2 for value in values) / (len(values) - 1)) if len(values) > 1 else 0.0
+        if not _close(stats.mean, mean) or not _close(stats.std(), std):
+            failures.append(f"anomaly statistics of {category}: mean {stats.mean}, std {stats.std()} != {mean}, {std}")
+    live = {id(expense) for expense in ledger.expenses}
+    if any(id(flag["record"]) not in live for flag in detector.flags):
+        failures.append("anomaly flags refer to a deleted expense")
+    return failures
+
+def check_report_cache(ledger):
+    """
+    Check that cached renderings match a fresh rendering of the current ledger.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    builders = {
+        "incomes": lambda: build_incomes_report(ledger.incomes),
+        "budget": lambda: build_budget_report(ledger.budget, ledger.budget_tree),
+        "expense_analysis": lambda: build_expense_analysis_report(ledger.expenses, ledger.budget, ledger.budget_tree),
+        "financial_summary": lambda: build_financial_report(ledger.incomes, ledger.expenses, ledger.budget)
+    }
+    failures = []
+    for name, build in builders.items():
+        for file_format in ("text", "json"):
+            if ledger.reports.render(name, file_format, build) != render(build(), file_format):
+                failures.append(f"cached {file_format} {name} report is stale")
+    return failures
+
+def check_round_trip(ledger, directory):
+    """
+    Check that saving and loading returns exactly the same data.
+
+    Args:
+        ledger (Ledger): The ledger to save
+        directory (str): Scratch directory for the saved files
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    paths = {name: os.path.join(directory, f"{name}.json") for name in ("expenses", "incomes", "budget", "rates", "accounts")}
+    save_expenses(ledger.expenses, paths["expenses"])
+    save_incomes(ledger.incomes, paths["incomes"])
+    save_rates(ledger.rates, paths["rates"])
+    save_accounts(ledger.accounts, ledger.goals, paths["accounts"])
+    if ledger.budget:
+        save_budget(ledger.budget, paths["budget"])
+    elif os.path.exists(paths["budget"]):
+        os.remove(paths["budget"])
+
+    for name, records, load in (("expenses", ledger.expenses, load_expenses), ("incomes", ledger.incomes, load_incomes)):
+        rejected = []
+        loaded = load(paths[name], rejected)
+        if rejected:
+            failures.append(f"{name} round-trip rejected {len(rejected)} row(s), first: {rejected[0]}")
+        elif len(loaded) != len(records) or any(a.to_dict() != b.to_dict() for a, b in zip(loaded, records)):
+            failures.append(f"{name} round-trip changed the records")
+
+    loaded_budget = load_budget(paths["budget"])
+    if (loaded_budget.to_dict() if loaded_budget else None) != (ledger.budget.to_dict() if ledger.budget else None):
+        failures.append("budget round-trip changed the budget")
+    if load_rates(paths["rates"]).to_dict() != ledger.rates.to_dict():
+        failures.append("rates round-trip changed the rates")
+    accounts, goals = load_accounts(paths["accounts"])
+    if ([account.to_dict() for account in accounts] != [account.to_dict() for account in ledger.accounts]
+            or [goal.to_dict() for goal in goals] != [goal.to_dict() for goal in ledger.goals]):
+        failures.append("accounts round-trip changed the accounts or goals")
+    return failures + check_cache_round_trip(ledger, directory)
+
+def check_cache_round_trip(ledger, directory):
+    """
+    Check that the sidecar cache restores the ledger's derived data, and that it
+    is invalidated by a change the size and modification time do not show.
+
+    The ledger's files must already be saved in the directory (check_round_trip does).
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    failures = []
+    cache = DerivedCache(directory, CACHE_SOURCES)
+    cache.save(ledger.derived_data())
+    data = cache.load()
+    if data is None:
+        return [f"cache round-trip missed: {cache.status}"]
+    data = restore_derived(data)
+
+    for kind, records in (("expenses", ledger.expenses), ("incomes", ledger.incomes)):
+        if [record.to_dict() for record in data[kind]] != [record.to_dict() for record in records]:
+            failures.append(f"cache round-trip changed the {kind}")
+    if data["cube"].cells != ledger.cube.cells:
+        failures.append("cache round-trip changed the cube")
+    for name in ("expense_index", "income_index"):
+        index, restored = getattr(ledger, name), data[name]
+        if restored.postings != index.postings or {key: record.to_dict() for key, record in restored.records.items()} \
+                != {key: record.to_dict() for key, record in index.records.items()}:
+            failures.append(f"cache round-trip changed the {name}")
+        elif any(restored._ids.get(id(record)) != key for key, record in restored.records.items()):
+            failures.append(f"cache round-trip did not re-link the {name} to the restored records")
+    restored_tree = {node.category: (node.total_spent(), node.total_count()) for node, depth in data["budget_tree"].evaluate()}
+    if restored_tree != {node.category: (node.total_spent(), node.total_count()) for node, depth in ledger.budget_tree.evaluate()}:
+        failures.append("cache round-trip changed the budget tree")
+    if data["budget_tree"]._expenses is not data["expenses"]:
+        failures.append("cache round-trip did not keep the budget tree on the restored expense list")
+    data["balances"].accounts = ledger.accounts
+    for name in ledger.balances.account_names():
+        if data["balances"].balance(name) != ledger.balances.balance(name):
+            failures.append(f"cache round-trip changed the balance of {name}")
+    restored_ids = {id(expense) for expense in data["expenses"]}
+    if len(data["anomalies"].flags) != len(ledger.anomalies.flags) \
+            or any(id(flag["record"]) not in restored_ids for flag in data["anomalies"].flags):
+        failures.append("cache round-trip did not keep the anomaly flags on the restored expenses")
+
+    # Same size, same modification time, different content: only the hash can tell
+    path = os.path.join(directory, "expenses.json")
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        content = f.read()
+    if content.startswith(b"[\n    "):
+        with open(path, "wb") as f:
+            f.write(b"[\n\t   " + content[6:])
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        if cache.load() is not None or cache.status != "changed: expenses.json":
+            failures.append(f"cache was not invalidated by a same-size edit (status {cache.status})")
+    return failures
+
+def check_invariants(ledger, directory):
+    """
+    Run every invariant check.
+
+    Returns:
+        list: Failure messages (empty if every invariant holds)
+    """
+    return (check_reports(ledger) + check_cube(ledger) + check_balances(ledger) + check_anomalies(ledger)
+            + check_report_cache(ledger) + check_round_trip(ledger, directory))
+
+## Harnesses --------------------------------------------------------------------------------------------------------------------------
+class _attached:
+    # Registers a ledger's listeners and points storage and the active rate table at it for the duration of a run
+    def __init__(self, ledger):
+        self.ledger = ledger
+
+    def __enter__(self):
+        self.data_dir = storage.DATA_DIR
+        self.rates = get_rate_table()
+        storage.set_data_dir(self.ledger.root)
+        set_rate_table(self.ledger.rates)
+        for callback in self.ledger.listeners():
+            add_listener(callback)
+        for callback in self.ledger.save_listeners():
+            storage.add_save_listener(callback)
+        return self.ledger
+
+    def __exit__(self, *exc_info):
+        for callback in self.ledger.listeners():
+            remove_listener(callback)
+        for callback in self.ledger.save_listeners():
+            storage.remove_save_listener(callback)
+        storage.set_data_dir(self.data_dir)
+        set_rate_table(self.rates)
+
+def run_random(seeds=100, rows=200, operations=40, first_seed=0):
+    """
+    Check the invariants on many small random ledgers.
+
+    Each seed generates a ledger of up to `rows` records (empty ledgers
+    included), checks it, then applies `operations` random operations and
+    checks after each one. The first failure stops the run.
+
+    Args:
+        seeds (int): Number of seeds to run
+        rows (int): Largest number of expenses per ledger
+        operations (int): Operations applied per seed
+        first_seed (int): First seed, for replaying a reported failure
+
+    Returns:
+        dict: Format: {"checks": int, "failure": str or None, "passed": bool}
+    """
+    checks = 0
+    failure = None
+    start = time.perf_counter()
+    for seed in range(first_seed, first_seed + seeds):
+        rng = random.Random(seed)
+        with tempfile.TemporaryDirectory() as directory:
+            ledger = random_ledger(rng, rng.randint(0, rows), rng.randint(0, rows // 10), directory)
+            with _attached(ledger):
+                step, operation = 0, "initial ledger"
+                while True:
+                    failures = check_invariants(ledger, directory)
+                    checks += 1
+                    if failures:
+                        failure = f"seed {seed}, step {step} ({operation}):\n  " + "\n  ".join(failures[:10])
+                        break
+                    if step == operations:
+                        break
+                    step += 1
+                    operation = apply_random_operation(rng, ledger)
+        if failure:
+            break
+
+    print(f"\n--- Random harness ({seeds} seed(s) from {first_seed}, up to {rows} rows, {operations} operations) ---")
+    print(f"{checks} invariant checks in {time.perf_counter() - start:.1f}s")
+    if failure:
+        print(f"Failed at {failure}")
+    print("FAIL" if failure else "PASS")
+    return {"checks": checks, "failure": failure, "passed": failure is None}
+
+def run_scale(rows=1000000, operations=100, seed=0):
+    """
+    Run the generators and invariants on one large ledger under time limits.
+
+    Args:
+        rows (int): Number of expenses (incomes are a tenth of that)
+        operations (int): Random operations applied after the build
+        seed (int): Random seed
+
+    Returns:
+        dict: Format: {"seconds": {phase: float}, "slowest": {operation type: float}, "failures": list, "passed": bool}
+    """
+    rng = random.Random(seed)
+    limits = {phase: max(1.0, per_million * rows / 1000000) for phase, per_million in SCALE_LIMITS.items()}
+    limits.update({operation: max(0.25, per_million * rows / 1000000) for operation, per_million in OPERATION_LIMITS.items()})
+    seconds = {}
+    slowest = {}
+    failures = []
+
+    def timed(phase, function):
+        start = time.perf_counter()
+        result = function()
+        seconds[phase] = time.perf_counter() - start
+        return result
+
+    with tempfile.TemporaryDirectory() as directory:
+        expenses = timed("generate", lambda: [random_record(rng, "expense") for _ in range(rows)])
+        incomes = [random_record(rng, "income") for _ in range(rows // 10)]
+        ledger = timed("build", lambda: Ledger("harness", directory, expenses, incomes, random_budget(rng, allow_none=False),
+                                               [], random_rates(rng)))
+        with _attached(ledger):
+            for _ in range(operations):
+                checkpoints = len(ledger.history.checkpoints)
+                start = time.perf_counter()
+                operation = apply_random_operation(rng, ledger).split()[0]
+                elapsed = time.perf_counter() - start
+                if len(ledger.history.checkpoints) != checkpoints:
+                    operation = "checkpoint"
+                slowest[operation] = max(slowest.get(operation, 0.0), elapsed)
+            failures += timed("invariants", lambda: check_reports(ledger) + check_cube(ledger) + check_report_cache(ledger))
+            failures += timed("round-trip", lambda: check_round_trip(ledger, directory))
+
+    timings = list(seconds.items()) + [(f"{operation} (max)", elapsed) for operation, elapsed in sorted(slowest.items())]
+    slow = [name for name, elapsed in timings if elapsed > limits[name.split()[0]]]
+    passed = not failures and not slow
+
+    print(f"\n--- Scale harness ({rows} rows, {operations} operations, seed {seed}) ---")
+    for name, elapsed in timings:
+        print(f"{name:<16} | {elapsed:>8.2f}s | limit {limits[name.split()[0]]:>6.2f}s{'  SLOW' if name in slow else ''}")
+    for failure in failures[:10]:
+        print(f"Failed: {failure}")
+    print("PASS" if passed else "FAIL")
+    return {"seconds": seconds, "slowest": slowest, "failures": failures, "passed": passed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dezy's Budget Tracker invariant harness")
+    parser.add_argument("names", nargs="*", default=["random"], choices=["random", "scale"], help="harnesses to run")
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds for the random harness")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (random) or seed (scale)")
+    parser.add_argument("--rows", type=int, default=None, help="rows per ledger (default 200 random, 1000000 scale)")
+    parser.add_argument("--operations", type=int, default=None, help="operations per ledger (default 40 random, 100 scale)")
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.names:
+        if name == "random":
+            result = run_random(args.seeds, args.rows or 200, args.operations or 40, args.seed)
+        else:
+            result = run_scale(args.rows or 1000000, args.operations or 100, args.seed)
+        if not result["passed"]:
+            failed.append(name)
+    sys.exit(1 if failed else 0)
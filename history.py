@@ -0,0 +1,302 @@
+import json
+import os
+from bisect import bisect_right
+from datetime import datetime
+from expense import Expense
+from income import Income
+from budget import Budget
+from operations import notify_listeners
+from storage import save_expenses, save_incomes, save_budget, delete_budget
+
+"""
+Dezy's Budget Tracker - History Module
+
+This module records every ledger change (add, delete, budget change) in an
+append-only operation log, with a full checkpoint of the ledger every
+CHECKPOINT_EVERY operations.
+
+That gives:
+- Cheap undo/redo: each change is reversed by applying its inverse operation
+- Point-in-time history: the ledger "as of" a past date is rebuilt by loading
+  the nearest earlier checkpoint and replaying only the operations after it
+
+The data files can change between sessions without going through the log
+(quarantined rows dropped, hand edits, another process). When the log is
+opened, the last checkpoint plus the operations after it is compared with the
+ledger as loaded, and a new checkpoint is written if they differ, so later
+operations replay onto the ledger they were applied to.
+
+Files (inside the history directory):
+- operations.jsonl: one JSON operation per line
+- checkpoints.json: index of checkpoints (sequence number, time, log offset)
+- checkpoint-<seq>.json: the full ledger at that point
+"""
+
+CHECKPOINT_EVERY = 100
+
+class OperationLog:
+    """
+    Append-only log of ledger changes with periodic checkpoints.
+
+    Attributes:
+        directory (str): Directory holding the log and checkpoint files
+        expenses (list): The live list of Expense objects
+        incomes (list): The live list of Income objects
+        budget (dict): The current budget as a dictionary, or None
+        seq (int): Sequence number of the last logged operation
+        checkpoints (list): Checkpoint index entries, oldest first
+    """
+    def __init__(self, directory, expenses, incomes, budget, checkpoint_every=CHECKPOINT_EVERY):
+        self.directory = directory
+        self.expenses = expenses
+        self.incomes = incomes
+        self.budget = budget.to_dict() if budget else None
+        self.checkpoint_every = checkpoint_every
+        self.log_path = os.path.join(directory, "operations.jsonl")
+        self.index_path = os.path.join(directory, "checkpoints.json")
+        self._undo_stack = []
+        self._redo_stack = []
+        self._replaying = False
+
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path, "r") as f:
+                self.checkpoints = json.load(f)
+        except FileNotFoundError:
+            self.checkpoints = []
+
+        if self.checkpoints:
+            # Only the operations after the last checkpoint need to be counted
+            last = self.checkpoints[-1]
+            self.seq = last["seq"] + self._count_operations_from(last["offset"])
+            if not self._matches_log():
+                self.write_checkpoint()
+        else:
+            self.seq = 0
+            self.write_checkpoint()
+
+    def _matches_log(self):
+        # Whether the last checkpoint plus the operations after it rebuild the ledger as loaded
+        try:
+            expenses, incomes, budget = self._replay(self.checkpoints[-1])
+        except (OSError, ValueError, KeyError):
+            return False
+        return (budget == self.budget
+                and expenses == [expense.to_dict() for expense in self.expenses]
+                and incomes == [income.to_dict() for income in self.incomes])
+
+    def _count_operations_from(self, offset):
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(offset)
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self):
+        """
+        Save a full copy of the current ledger and add it to the checkpoint index.
+        """
+        filename = f"checkpoint-{self.seq:08d}.json"
+        snapshot = {
+            "expenses": [expense.to_dict() for expense in self.expenses],
+            "incomes": [income.to_dict() for income in self.incomes],
+            "budget": self.budget
+        }
+        with open(os.path.join(self.directory, filename), "w") as f:
+            json.dump(snapshot, f)
+
+        self.checkpoints.append({
+            "seq": self.seq,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "offset": self._log_size(),
+            "file": filename
+        })
+        with open(self.index_path, "w") as f:
+            json.dump(self.checkpoints, f, indent=4)
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that logs each ledger change.
+
+        Args:
+            action (str): "add", "delete" or "set"
+            kind (str): "expense", "income" or "budget"
+            record (Expense, Income or Budget): The changed record
+            index (int): Position of the record in its list
+        """
+        entry = {
+            "seq": self.seq + 1,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "action": action,
+            "kind": kind,
+            "index": index,
+            "record": record.to_dict() if record else None
+        }
+        if kind == "budget":
+            entry["previous"] = self.budget
+            self.budget = entry["record"]
+
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.seq += 1
+
+        if not self._replaying:
+            # Keep the live object so undo/redo restore the same record
+            self._undo_stack.append((entry, record))
+            self._redo_stack.clear()
+
+        if self.seq - self.checkpoints[-1]["seq"] >= self.checkpoint_every:
+            self.write_checkpoint()
+
+    def _perform(self, action, kind, record, index, previous=None):
+        # Apply one operation to the live ledger, notifying listeners and saving
+        self._replaying = True
+        try:
+            if kind == "budget":
+                budget = Budget.from_dict(previous) if previous else None
+                # Listeners first, then the save, as for records: the change feed publishes on save
+                notify_listeners("set", "budget", budget)
+                if budget:
+                    save_budget(budget)
+                else:
+                    delete_budget()
+                return budget
+
+            records = self.expenses if kind == "expense" else self.incomes
+            if action == "add":
+                records.insert(index, record)
+                notify_listeners("add", kind, record, index)
+            else:
+                notify_listeners("delete", kind, records.pop(index), index)
+
+            if kind == "expense":
+                save_expenses(records)
+            else:
+                save_incomes(records)
+        finally:
+            self._replaying = False
+
+    def can_undo(self):
+        return bool(self._undo_stack)
+
+    def can_redo(self):
+        return bool(self._redo_stack)
+
+    def undo(self):
+        """
+        Reverse the most recent change made in this session.
+
+        Returns:
+            tuple: (description of the change, the budget after the change or None)
+
+        Raises:
+            ValueError: If there is nothing to undo
+        """
+        if not self._undo_stack:
+            raise ValueError("Nothing to undo")
+        entry, record = self._undo_stack.pop()
+        self._redo_stack.append((entry, record))
+
+        if entry["kind"] == "budget":
+            budget = self._perform("set", "budget", None, None, entry["previous"])
+            return "budget change", budget
+
+        inverse = "delete" if entry["action"] == "add" else "add"
+        self._perform(inverse, entry["kind"], record, entry["index"])
+        return f"{entry['kind']} {entry['action']}", self._current_budget()
+
+    def redo(self):
+        """
+        Re-apply the most recently undone change.
+
+        Returns:
+            tuple: (description of the change, the budget after the change or None)
+
+        Raises:
+            ValueError: If there is nothing to redo
+        """
+        if not self._redo_stack:
+            raise ValueError("Nothing to redo")
+        entry, record = self._redo_stack.pop()
+        self._undo_stack.append((entry, record))
+
+        if entry["kind"] == "budget":
+            budget = self._perform("set", "budget", None, None, entry["record"])
+            return "budget change", budget
+
+        self._perform(entry["action"], entry["kind"], record, entry["index"])
+        return f"{entry['kind']} {entry['action']}", self._current_budget()
+
+    def _current_budget(self):
+        return Budget.from_dict(self.budget) if self.budget else None
+
+    def as_of(self, cutoff):
+        """
+        Rebuild the ledger as it was at a past moment.
+
+        Loads the nearest checkpoint at or before the cutoff and replays only
+        the operations logged after it.
+
+        Args:
+            cutoff (str): ISO timestamp or YYYY-MM-DD date (end of that day)
+
+        Returns:
+            tuple: (list of Expense objects, list of Income objects, Budget or None)
+
+        Raises:
+            ValueError: If the cutoff is before the history begins, or the log does not
+                        match its checkpoint (an operation's index is out of range)
+        """
+        if len(cutoff) == 10:
+            cutoff += "T23:59:59"
+
+        times = [checkpoint["time"] for checkpoint in self.checkpoints]
+        position = bisect_right(times, cutoff) - 1
+        if position < 0:
+            raise ValueError(f"History begins at {times[0]}")
+        expenses, incomes, budget = self._replay(self.checkpoints[position], cutoff)
+
+        return (
+            [Expense.from_dict(data) for data in expenses],
+            [Income.from_dict(data) for data in incomes],
+            Budget.from_dict(budget) if budget else None
+        )
+
+    def _replay(self, checkpoint, cutoff=None):
+        # Load a checkpoint and apply the logged operations after it, up to the cutoff:
+        # (expense dicts, income dicts, budget dict or None)
+        with open(os.path.join(self.directory, checkpoint["file"]), "r") as f:
+            snapshot = json.load(f)
+        expenses, incomes, budget = snapshot["expenses"], snapshot["incomes"], snapshot["budget"]
+
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(checkpoint["offset"])
+                for line in f:
+                    entry = json.loads(line)
+                    if cutoff and entry["time"] > cutoff:
+                        break
+                    if entry["kind"] == "budget":
+                        budget = entry["record"]
+                        continue
+                    records = expenses if entry["kind"] == "expense" else incomes
+                    index = entry["index"]
+                    # An add may append (index == len); a delete must name an existing record
+                    limit = len(records) if entry["action"] == "add" else len(records) - 1
+                    if not isinstance(index, int) or not 0 <= index <= limit:
+                        raise ValueError(f"History log entry at {entry['time']} cannot {entry['action']} "
+                                         f"{entry['kind']} {index}: the ledger had {len(records)} record(s) then")
+                    if entry["action"] == "add":
+                        records.insert(index, entry["record"])
+                    else:
+                        records.pop(index)
+        except FileNotFoundError:
+            pass
+        return expenses, incomes, budget
@@ -1,8 +1,10 @@
 from datetime import datetime
 from validation import validate_amount, validate_date
+from currency import prompt_currency
+from accounts import prompt_account
 
 class Income:
-    def __init__(self, date, amount, category, description):
+    def __init__(self, date, amount, category, description, currency=None, account=None):
         """
         Initialize an Income object.
         
@@ -11,11 +13,15 @@ class Income:
             amount (float): The amount of the income
             category (str): The category of the income (e.g., salary, freelance, investment)
             description (str): A detailed description of the income
+            currency (str): The currency code of the amount, or None for the base currency
+            account (str): The account name, or None for the default account
         """
         self.date = date
         self.amount = float(amount)  # Ensure amount is float
         self.category = category
         self.description = description
+        self.currency = currency
+        self.account = account
 
     @classmethod
     def from_user_input(cls):
@@ -52,6 +58,8 @@ class Income:
                         break  # Exit the amount input loop if successful
                     except ValueError as e:
                         print(f"Error: {str(e)}")
+                currency = prompt_currency()
+                account = prompt_account()
                 
                 # Category input
                 category = input("Enter the category (e.g., salary, freelance, investment): ")
@@ -64,7 +72,7 @@ class Income:
                     raise ValueError("Description cannot be empty")
                 
                 # Create and return the new income object
-                return cls(date, amount, category, description)
+                return cls(date, amount, category, description, currency, account)
                 
             except ValueError as e:
                 print(f"Error: {str(e)}")
@@ -88,7 +96,9 @@ class Income:
             date=data["date"],
             amount=data["amount"],
             category=data["category"],
-            description=data["description"]
+            description=data["description"],
+            currency=data.get("currency"),
+            account=data.get("account")
         )
     
     def to_dict(self):
@@ -98,9 +108,15 @@ class Income:
         Returns:
             dict: Dictionary representation of the income
         """
-        return {
+        data = {
             "date": self.date,
             "amount": self.amount,
             "category": self.category,
             "description": self.description
-        } 
\ No newline at end of file
+        }
+        # Optional fields are only written when set, so plain records keep the original four-field format
+        if self.currency:
+            data["currency"] = self.currency
+        if self.account:
+            data["account"] = self.account
+        return data 
\ No newline at end of file
@@ -1,6 +1,5 @@
-from operations import view_expenses, add_new_expense, delete_expense, handle_add_expense, set_budget, view_budget, analyze_expenses, view_incomes, handle_add_income, delete_income, analyze_finances
-from storage import save_expenses, load_expenses, save_budget, load_budget, save_incomes, load_incomes
-from validation import validate_menu_choice, validate_index, validate_description, validate_amount, validate_budget_amount
+import threading
+from validation import validate_menu_choice, validate_index, validate_description, validate_amount, validate_budget_amount, validate_date
 
 """
 Dezy's Budget Tracker - Main Module
@@ -14,43 +13,166 @@ The application offers the following features:
 - Income management (view, add, delete)
 - Budget management (set, view, analyze)
 - Financial analysis (income vs expenses)
+- Multiple profiles, each with its own ledger (python main.py --profile NAME)
 
 All user inputs are validated to ensure data integrity and prevent errors.
+
+Startup is kept light: only validation is imported up front. The ledger is loaded
+on a background thread while the first menu is shown, and reporting modules
+(analysis, forecasting, search, profiles) are imported when their menu item is
+chosen. benchmarks.py checks the import time of this module.
 """
 
-def main():
+def start_loading(profile):
+    """
+    Start loading a profile's ledger on a background thread.
+    
+    Args:
+        profile (str): The profile to load
+        
+    Returns:
+        tuple: (thread, result dict that receives "manager", "ledger" or "error")
+    """
+    result = {}
+    
+    def load():
+        try:
+            from profiles import ProfileManager
+            result["manager"] = ProfileManager()
+            result["ledger"] = result["manager"].get(profile)
+        except Exception as e:
+            result["error"] = e
+    
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    return thread, result
+
+def open_profile(manager, name, active=None):
+    """
+    Make a profile the active ledger.
+    
+    This function:
+    1. Detaches the previously active ledger's aggregates from the listeners
+    2. Loads the profile (or reuses it from the cache)
+    3. Points storage, currency conversion and account prompts at the profile and attaches its aggregates
+    4. Catches up on recurring transactions that became due
+    
+    Args:
+        manager (ProfileManager): The profile manager
+        name (str): The profile to open
+        active (Ledger): The currently active ledger, if any
+        
+    Returns:
+        Ledger: The newly active ledger
+    """
+    from operations import add_listener, remove_listener, materialize_recurring
+    from storage import set_data_dir, quarantine_filename, save_expenses, add_save_listener, remove_save_listener
+    from currency import set_rate_table
+    from accounts import set_accounts
+    
+    ledger = manager.get(name)
+    if active:
+        for callback in active.listeners():
+            remove_listener(callback)
+        for callback in active.save_listeners():
+            remove_save_listener(callback)
+        manager.refresh_size(active.name)
+    
+    set_data_dir(ledger.root)
+    set_rate_table(ledger.rates)
+    set_accounts(ledger.accounts)
+    if ledger.rates.missing:
+        print(f"Warning: no exchange rates for {', '.join(sorted(ledger.rates.missing))}; those amounts are counted unconverted. Add them to rates.json")
+    for kind, rejected in ledger.quarantine.items():
+        if rejected:
+            print(f"Warning: skipped {len(rejected)} invalid {kind} row(s); see {quarantine_filename(kind + '.json')}")
+    for callback in ledger.listeners():
+        add_listener(callback)
+    for callback in ledger.save_listeners():
+        add_save_listener(callback)
+    if ledger.auto_categorized:
+        # Keep the categories the rules assigned while loading
+        save_expenses(ledger.expenses)
+        print(f"Categorized {ledger.auto_categorized} uncategorized expense(s) using your category rules.")
+        ledger.auto_categorized = 0
+    
+    # Catch up on any recurring transactions that became due since the last run
+    added_expenses, added_incomes = materialize_recurring(ledger.rules, ledger.expenses, ledger.incomes)
+    if added_expenses or added_incomes:
+        print(f"Added {added_expenses} recurring expense(s) and {added_incomes} recurring income(s).")
+    return ledger
+
+def main(profile="default"):
     """
     Main function that runs the budget tracker application.
     
     This function:
-    1. Loads existing expenses, income, and budget data
-    2. Displays the main menu
+    1. Starts loading existing expenses, income, and budget data for the profile
+    2. Displays the main menu (the first menu is shown while data loads)
     3. Handles user input with validation
     4. Routes to appropriate functionality based on user choice
     5. Provides error handling for invalid inputs
     
     The application continues running until the user chooses to exit.
+    
+    Args:
+        profile (str): Name of the profile to open first
     """
-    expenses = load_expenses()
-    incomes = load_incomes()
-    budget = load_budget()
+    loader, loaded = start_loading(profile)
+    manager = ledger = None
+
     while True:
-        print("\n1. Quick Add Expense")
+        if ledger is not None:
+            # The cube and search indexes are kept current through the listeners
+            expenses, incomes, budget, rules = ledger.expenses, ledger.incomes, ledger.budget, ledger.rules
+            cube, expense_index, income_index = ledger.cube, ledger.expense_index, ledger.income_index
+
+        print(f"\n[Profile: {ledger.name if ledger else profile}]")
+        print("1. Quick Add Expense")
         print("2. Expenses Management")
         print("3. Income Management")
         print("4. Budget Management")
         print("5. Financial Analysis")
-        print("6. Exit")
+        print("6. Recurring Transactions")
+        print("7. Profiles")
+        print("8. History (Undo/Redo)")
+        print("9. Export Data")
+        print("10. Accounts and Goals")
+        print("11. Exit")
         
-        choice = input("\nChoose an option (1-6): ")
+        choice = input("\nChoose an option (1-11): ")
         
         # Validate menu choice
-        if not validate_menu_choice(choice, ["1", "2", "3", "4", "5", "6"]):
-            print("Invalid choice. Please enter a number between 1 and 6.")
+        if not validate_menu_choice(choice, ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11"]):
+            print("Invalid choice. Please enter a number between 1 and 11.")
             continue
         
+        if choice == "11":
+            if manager is not None:
+                # Let the next run start from the sidecar caches instead of re-deriving everything
+                manager.close()
+            print("Thank you for using the Dezy's Budget Tracker!")
+            break
+        
+        if ledger is None:
+            # First real choice: wait for the background load, then pull in the core modules
+            loader.join()
+            if "error" in loaded:
+                print(f"Error: {loaded['error']}")
+                break
+            manager = loaded["manager"]
+            ledger = open_profile(manager, profile)
+            expenses, incomes, budget, rules = ledger.expenses, ledger.incomes, ledger.budget, ledger.rules
+            cube, expense_index, income_index = ledger.cube, ledger.expense_index, ledger.income_index
+            
+            from operations import (view_expenses, delete_expense, handle_add_expense, set_budget, view_budget,
+                                    analyze_expenses, view_incomes, handle_add_income, delete_income, analyze_finances,
+                                    view_recurring, handle_add_recurring, delete_recurring, materialize_recurring)
+            from storage import save_expenses, save_budget, load_budget, save_incomes, save_recurring
+            from currency import format_amount
+        
         if choice == "1":
-            handle_add_expense(expenses)
+            handle_add_expense(expenses, ledger.categorizer, ledger.anomalies)
         
         elif choice == "2":
             # Expenses Management submenu
@@ -58,25 +180,28 @@ def main():
             print("1. View Expenses Summary")
             print("2. Add Expense")
             print("3. Delete Expense")
-            print("4. Back to Main Menu")
-            sub_choice = input("\nChoose an option (1-4): ")
+            print("4. Search Expenses")
+            print("5. Find Duplicates")
+            print("6. Category Rules")
+            print("7. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-7): ")
             
             # Validate submenu choice
-            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4"]):
-                print("Invalid choice. Please enter a number between 1 and 4.")
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4", "5", "6", "7"]):
+                print("Invalid choice. Please enter a number between 1 and 7.")
                 continue
             
             if sub_choice == "1":
-                view_expenses(expenses)
+                view_expenses(expenses, ledger.reports)
             elif sub_choice == "2":
-                handle_add_expense(expenses)
+                handle_add_expense(expenses, ledger.categorizer, ledger.anomalies)
             elif sub_choice == "3":
                 # Check if there are expenses to delete
                 if not expenses:
                     print("No expenses to delete.")
                     continue
                 
-                view_expenses(expenses)
+                view_expenses(expenses, ledger.reports)
                 try:
                     # Get and validate expense index
                     expense_index_str = input("Enter the index of the expense to delete: ")
@@ -87,6 +212,50 @@ def main():
                 except ValueError as e:
                     print(f"Error: {e}")
             elif sub_choice == "4":
+                query = input("Enter search terms (e.g., uber airport): ").strip()
+                if not query:
+                    print("Search terms cannot be empty.")
+                    continue
+                from search import view_search_results
+                view_search_results(expense_index.search(query), query)
+            elif sub_choice == "5":
+                from reconcile import handle_reconcile
+                handle_reconcile(expenses, "expense")
+            elif sub_choice == "6":
+                # Category Rules submenu
+                from operations import view_category_rules, handle_add_category_rule, delete_category_rule, apply_category_rules
+                categorizer = ledger.categorizer
+                print("\nCategory Rules")
+                print("1. View Category Rules")
+                print("2. Add Category Rule")
+                print("3. Delete Category Rule")
+                print("4. Categorize Uncategorized Expenses")
+                print("5. Back to Main Menu")
+                rule_choice = input("\nChoose an option (1-5): ")
+                
+                if not validate_menu_choice(rule_choice, ["1", "2", "3", "4", "5"]):
+                    print("Invalid choice. Please enter a number between 1 and 5.")
+                    continue
+                
+                if rule_choice == "1":
+                    view_category_rules(categorizer.rules)
+                elif rule_choice == "2":
+                    handle_add_category_rule(categorizer)
+                elif rule_choice == "3":
+                    if not categorizer.rules:
+                        print("No category rules to delete.")
+                        continue
+                    
+                    view_category_rules(categorizer.rules)
+                    try:
+                        rule_index = validate_index(input("Enter the index of the rule to delete: "), len(categorizer.rules))
+                        delete_category_rule(categorizer, rule_index)
+                        print("Category rule deleted successfully!")
+                    except ValueError as e:
+                        print(f"Error: {e}")
+                elif rule_choice == "4":
+                    print(f"Categorized {apply_category_rules(categorizer, expenses)} expense(s).")
+            elif sub_choice == "7":
                 continue
 
         elif choice == "3":
@@ -95,16 +264,18 @@ def main():
             print("1. View Income Summary")
             print("2. Add Income")
             print("3. Delete Income")
-            print("4. Back to Main Menu")
-            sub_choice = input("\nChoose an option (1-4): ")
+            print("4. Search Income")
+            print("5. Find Duplicates")
+            print("6. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-6): ")
             
             # Validate submenu choice
-            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4"]):
-                print("Invalid choice. Please enter a number between 1 and 4.")
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4", "5", "6"]):
+                print("Invalid choice. Please enter a number between 1 and 6.")
                 continue
             
             if sub_choice == "1":
-                view_incomes(incomes)
+                view_incomes(incomes, ledger.reports)
             elif sub_choice == "2":
                 handle_add_income(incomes)
             elif sub_choice == "3":
@@ -113,7 +284,7 @@ def main():
                     print("No incomes to delete.")
                     continue
                 
-                view_incomes(incomes)
+                view_incomes(incomes, ledger.reports)
                 try:
                     # Get and validate income index
                     income_index_str = input("Enter the index of the income to delete: ")
@@ -124,6 +295,16 @@ def main():
                 except ValueError as e:
                     print(f"Error: {e}")
             elif sub_choice == "4":
+                query = input("Enter search terms (e.g., uber airport): ").strip()
+                if not query:
+                    print("Search terms cannot be empty.")
+                    continue
+                from search import view_search_results
+                view_search_results(income_index.search(query), query)
+            elif sub_choice == "5":
+                from reconcile import handle_reconcile
+                handle_reconcile(incomes, "income")
+            elif sub_choice == "6":
                 continue
 
         elif choice == "4":
@@ -142,33 +323,408 @@ def main():
 
             if sub_choice == "1":
                 try:
-                    budget = set_budget()
-                    if budget:
+                    new_budget = set_budget()
+                    if new_budget:
+                        budget = ledger.budget = new_budget
                         save_budget(budget)
-                        print(f"Monthly budget set to ${budget.amount:.2f}")
+                        print(f"Monthly budget set to {format_amount(budget.amount)}")
                     else:
                         print("Budget setting cancelled.")
                 except ValueError as e:
                     print(f"Error: {e}")
             elif sub_choice == "2":
-                budget = load_budget()
-                view_budget(budget)
+                budget = ledger.budget = load_budget()
+                view_budget(budget, ledger.budget_tree, ledger.reports)
             elif sub_choice == "3":
                 # Check if there are expenses to analyze
                 if not expenses:
                     print("No expenses to analyze.")
                     continue
-                analyze_expenses(expenses, budget)
+                analyze_expenses(expenses, budget, ledger.budget_tree, ledger.reports)
             elif sub_choice == "4":
                 continue
         
         elif choice == "5":
-            # Financial Analysis
-            analyze_finances(incomes, expenses, budget)
+            # Financial Analysis submenu
+            print("\nFinancial Analysis")
+            print("1. Financial Summary")
+            print("2. Largest Expenses")
+            print("3. Median Expense by Category")
+            print("4. Expenses Above Percentile")
+            print("5. Cash Flow Trend")
+            print("6. Month over Month Expenses")
+            print("7. Budget Burn-down")
+            print("8. Spending Forecast")
+            print("9. Unusual Expenses")
+            print("10. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-10): ")
+
+            # Validate submenu choice
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]):
+                print("Invalid choice. Please enter a number between 1 and 10.")
+                continue
+
+            from datetime import datetime
+            if sub_choice == "1":
+                analyze_finances(incomes, expenses, budget, ledger.reports)
+            elif sub_choice in ["2", "3", "4"]:
+                from analysis import view_top_expenses, view_category_median, view_outliers
+                if not expenses:
+                    print("No expenses to analyze.")
+                    continue
+
+                # Month filter defaults to the current month, 'all' disables it
+                this_month = datetime.now().strftime("%Y-%m")
+                month = input(f"Enter month (YYYY-MM), 'all' for all time, or leave empty for {this_month}: ").strip()
+                if not month:
+                    month = this_month
+                elif month.lower() == "all":
+                    month = None
+                elif not validate_date(f"{month}-01"):
+                    print("Invalid month format. Please use YYYY-MM format.")
+                    continue
+
+                try:
+                    if sub_choice == "2":
+                        n_str = input("How many expenses to show? (default 20): ").strip()
+                        n = int(n_str) if n_str else 20
+                        if n <= 0:
+                            raise ValueError("Number must be greater than 0")
+                        view_top_expenses(expenses, n, month)
+                    elif sub_choice == "3":
+                        category = input("Enter category: ").strip()
+                        if not category:
+                            raise ValueError("Category cannot be empty")
+                        view_category_median(expenses, category, month)
+                    elif sub_choice == "4":
+                        pct_str = input("Enter percentile (default 99): ").strip()
+                        pct = float(pct_str) if pct_str else 99
+                        view_outliers(expenses, pct, month)
+                except ValueError as e:
+                    print(f"Error: {e}")
+            elif sub_choice == "5":
+                granularity = input("Group by (day/week/month, default month): ").strip().lower() or "month"
+                if granularity not in ["day", "week", "month"]:
+                    print("Invalid choice. Please enter day, week or month.")
+                    continue
+                from rollups import view_trend
+                view_trend(cube, granularity)
+            elif sub_choice in ["6", "7"]:
+                this_month = datetime.now().strftime("%Y-%m")
+                month = input(f"Enter month (YYYY-MM) or leave empty for {this_month}: ").strip() or this_month
+                if not validate_date(f"{month}-01"):
+                    print("Invalid month format. Please use YYYY-MM format.")
+                    continue
+                from rollups import view_month_over_month, view_burn_down
+                if sub_choice == "6":
+                    view_month_over_month(cube, month)
+                else:
+                    view_burn_down(cube, budget, month)
+            elif sub_choice == "8":
+                from forecast import view_forecast, METHODS
+                method = input(f"Forecast method ({'/'.join(METHODS)}, default smoothing): ").strip().lower() or "smoothing"
+                if method not in METHODS:
+                    print(f"Invalid choice. Please enter one of: {', '.join(METHODS)}.")
+                    continue
+                view_forecast(cube, budget, method, tree=ledger.budget_tree)
+            elif sub_choice == "9":
+                from anomaly import view_anomalies
+                view_anomalies(ledger.anomalies)
+            elif sub_choice == "10":
+                continue
         
         elif choice == "6":
-            print("Thank you for using the Dezy's Budget Tracker!")
-            break
+            # Recurring Transactions submenu
+            print("\nRecurring Transactions")
+            print("1. View Recurring Transactions")
+            print("2. Add Recurring Transaction")
+            print("3. Delete Recurring Transaction")
+            print("4. Add Due Transactions Now")
+            print("5. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-5): ")
+
+            # Validate submenu choice
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4", "5"]):
+                print("Invalid choice. Please enter a number between 1 and 5.")
+                continue
+
+            if sub_choice == "1":
+                view_recurring(rules)
+            elif sub_choice == "2":
+                handle_add_recurring(rules)
+            elif sub_choice == "3":
+                if not rules:
+                    print("No recurring transactions to delete.")
+                    continue
+
+                view_recurring(rules)
+                try:
+                    rule_index_str = input("Enter the index of the recurring transaction to delete: ")
+                    rule_index = validate_index(rule_index_str, len(rules))
+                    delete_recurring(rules, rule_index)
+                    save_recurring(rules)
+                    print("Recurring transaction deleted successfully!")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            elif sub_choice == "4":
+                added_expenses, added_incomes = materialize_recurring(rules, expenses, incomes)
+                print(f"Added {added_expenses} recurring expense(s) and {added_incomes} recurring income(s).")
+            elif sub_choice == "5":
+                continue
+
+        elif choice == "7":
+            # Profiles submenu
+            print("\nProfiles")
+            print("1. Switch Profile")
+            print("2. View Profiles")
+            print("3. Consolidated Report")
+            print("4. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-4): ")
+
+            # Validate submenu choice
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4"]):
+                print("Invalid choice. Please enter a number between 1 and 4.")
+                continue
+
+            if sub_choice == "1":
+                print("Available profiles: " + ", ".join(manager.list_profiles()))
+                name = input("Enter profile name (a new name creates a profile): ").strip()
+                try:
+                    ledger = open_profile(manager, name, ledger)
+                    print(f"Switched to profile '{ledger.name}'.")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            elif sub_choice == "2":
+                from profiles import view_profile_stats
+                view_profile_stats(manager, ledger.name)
+            elif sub_choice == "3":
+                from consolidate import view_consolidated_report
+                available = manager.list_profiles()
+                print("Available profiles: " + ", ".join(available))
+                names_str = input("Enter profile names separated by commas, or leave empty for all: ").strip()
+                names = [name.strip() for name in names_str.split(",") if name.strip()] if names_str else available
+                unknown = [name for name in names if name not in available]
+                if unknown:
+                    print(f"Error: Unknown profile(s): {', '.join(unknown)}")
+                    continue
+                try:
+                    view_consolidated_report(manager, names)
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}")
+            elif sub_choice == "4":
+                continue
+
+        elif choice == "8":
+            # History submenu
+            print("\nHistory")
+            print("1. Undo Last Change")
+            print("2. Redo")
+            print("3. Financial Summary As Of Date")
+            print("4. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-4): ")
+
+            # Validate submenu choice
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4"]):
+                print("Invalid choice. Please enter a number between 1 and 4.")
+                continue
+
+            try:
+                if sub_choice == "1":
+                    change, ledger.budget = ledger.history.undo()
+                    print(f"Undid {change}.")
+                elif sub_choice == "2":
+                    change, ledger.budget = ledger.history.redo()
+                    print(f"Redid {change}.")
+                elif sub_choice == "3":
+                    date_str = input("Enter date (YYYY-MM-DD): ").strip()
+                    if not date_str or not validate_date(date_str):
+                        raise ValueError("Invalid date format. Please use YYYY-MM-DD")
+                    past_expenses, past_incomes, past_budget = ledger.history.as_of(date_str)
+                    print(f"\nLedger as of {date_str}:")
+                    analyze_finances(past_incomes, past_expenses, past_budget)
+                elif sub_choice == "4":
+                    continue
+            except ValueError as e:
+                print(f"Error: {e}")
+
+        elif choice == "9":
+            # Export Data
+            import os
+            from export import export_records, columnar_extension
+            print("\nExport Data")
+            kind = input("Export expenses, incomes or a report? (expenses/incomes/report): ").strip().lower()
+            if kind == "report":
+                from operations import (build_expenses_report, build_incomes_report, build_budget_report,
+                                        build_expense_analysis_report, build_financial_report)
+                from reports import FORMATS
+                builders = {
+                    "expenses": lambda: build_expenses_report(expenses),
+                    "incomes": lambda: build_incomes_report(incomes),
+                    "budget": lambda: build_budget_report(budget, ledger.budget_tree),
+                    "expense_analysis": lambda: build_expense_analysis_report(expenses, budget, ledger.budget_tree),
+                    "financial_summary": lambda: build_financial_report(incomes, expenses, budget)
+                }
+                name = input(f"Report ({'/'.join(builders)}): ").strip().lower()
+                if name not in builders:
+                    print("Invalid choice. Please enter one of: " + ", ".join(builders))
+                    continue
+                file_format = input("Format (text/json/html, default html): ").strip().lower() or "html"
+                if file_format not in FORMATS:
+                    print("Invalid choice. Please enter 'text', 'json' or 'html'.")
+                    continue
+                extension = "txt" if file_format == "text" else file_format
+                default_destination = os.path.join(ledger.root, f"{name}_report.{extension}")
+                destination = input(f"Output file (default {default_destination}): ").strip() or default_destination
+                try:
+                    with open(destination, "w", encoding="utf-8") as f:
+                        f.write(ledger.reports.render(name, file_format, builders[name]))
+                    print(f"Wrote the {name} report to {destination}")
+                except OSError as e:
+                    print(f"Error: {e}")
+                continue
+            if kind not in ["expenses", "incomes"]:
+                print("Invalid choice. Please enter 'expenses', 'incomes' or 'report'.")
+                continue
+            file_format = input("Format (csv/columnar, default csv): ").strip().lower() or "csv"
+            if file_format not in ["csv", "columnar"]:
+                print("Invalid choice. Please enter 'csv' or 'columnar'.")
+                continue
+
+            start_date = input("Start date (YYYY-MM-DD) or leave empty for all: ").strip() or None
+            end_date = input("End date (YYYY-MM-DD) or leave empty for all: ").strip() or None
+            if not validate_date(start_date) or not validate_date(end_date):
+                print("Invalid date format. Please use YYYY-MM-DD format.")
+                continue
+            category = input("Category (includes sub-categories) or leave empty for all: ").strip() or None
+            sort_by = input("Sort by date or amount (largest first), or leave empty for file order: ").strip().lower() or None
+            if sort_by not in [None, "date", "amount"]:
+                print("Invalid choice. Please enter 'date' or 'amount'.")
+                continue
+
+            extension = "csv" if file_format == "csv" else columnar_extension()
+            default_destination = os.path.join(ledger.root, f"{kind}_export.{extension}")
+            destination = input(f"Output file (default {default_destination}): ").strip() or default_destination
+            try:
+                count = export_records(os.path.join(ledger.root, f"{kind}.json"), destination, file_format,
+                                       start_date, end_date, category, sort_by)
+                print(f"Exported {count} row(s) to {destination}")
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+
+        elif choice == "10":
+            # Accounts and Goals submenu
+            from operations import view_accounts, handle_add_account, view_goals, handle_add_goal, delete_goal
+            print("\nAccounts and Goals")
+            print("1. View Balances and Net Worth")
+            print("2. Balances As Of Date")
+            print("3. Add Account")
+            print("4. View Savings Goals")
+            print("5. Add Savings Goal")
+            print("6. Delete Savings Goal")
+            print("7. Back to Main Menu")
+            sub_choice = input("\nChoose an option (1-7): ")
+
+            # Validate submenu choice
+            if not validate_menu_choice(sub_choice, ["1", "2", "3", "4", "5", "6", "7"]):
+                print("Invalid choice. Please enter a number between 1 and 7.")
+                continue
+
+            if sub_choice == "1":
+                view_accounts(ledger.balances)
+            elif sub_choice == "2":
+                date_str = input("Enter date (YYYY-MM-DD): ").strip()
+                if not date_str or not validate_date(date_str):
+                    print("Invalid date format. Please use YYYY-MM-DD format.")
+                    continue
+                view_accounts(ledger.balances, date_str)
+            elif sub_choice == "3":
+                handle_add_account(ledger.accounts, ledger.goals)
+            elif sub_choice == "4":
+                view_goals(ledger.balances, ledger.goals)
+            elif sub_choice == "5":
+                handle_add_goal(ledger.accounts, ledger.goals)
+            elif sub_choice == "6":
+                view_goals(ledger.balances, ledger.goals)
+                if ledger.goals:
+                    try:
+                        index = validate_index(input("Enter the index of the goal to delete: "), len(ledger.goals))
+                        delete_goal(ledger.accounts, ledger.goals, index)
+                        print("Savings goal deleted successfully!")
+                    except ValueError as e:
+                        print(f"Error: {e}")
+            elif sub_choice == "7":
+                continue
+
+
+def print_summary(profile="default"):
+    """
+    Print a profile's financial summary by streaming its files, without loading the ledger.
+    
+    Records are read one at a time and grouped within the memory cap (see
+    spill.py), so this works for ledgers too large to load.
+    
+    Args:
+        profile (str): Name of the profile to summarize
+    """
+    import os
+    from profiles import ProfileManager
+    from storage import load_budget, load_rates
+    from currency import set_rate_table
+    from expense import Expense
+    from income import Income
+    from export import stream_records
+    from operations import build_financial_report
+    from reports import show_report
+    
+    root = ProfileManager().profile_root(profile)
+    set_rate_table(load_rates(os.path.join(root, "rates.json")))
+    show_report("financial_summary", lambda: build_financial_report(
+        stream_records(os.path.join(root, "incomes.json"), Income),
+        stream_records(os.path.join(root, "expenses.json"), Expense),
+        load_budget(os.path.join(root, "budget.json"))
+    ))
+
+def print_changes(profile="default", since=0):
+    """
+    Print a profile's change feed events after a sequence number, one JSON object per line.
+    
+    Dashboards call this with the last sequence number they processed instead
+    of re-reading the data files (see feed.py).
+    
+    Args:
+        profile (str): Name of the profile
+        since (int): The last sequence number already processed
+    """
+    import os
+    import json
+    from profiles import ProfileManager
+    from feed import read_changes, CHANGES_FILENAME
+    
+    root = ProfileManager().profile_root(profile)
+    for event in read_changes(os.path.join(root, CHANGES_FILENAME), since):
+        print(json.dumps(event))
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Dezy's Budget Tracker")
+    parser.add_argument("--profile", default="default", help="name of the ledger profile to open")
+    parser.add_argument("--memory-cap", type=int, metavar="MB",
+                        help="memory for report group-by and export sorting before spilling to temporary files (default 64)")
+    parser.add_argument("--summary", action="store_true",
+                        help="print the financial summary streamed from the data files, without loading the ledger, and exit")
+    parser.add_argument("--changes-since", type=int, metavar="SEQ",
+                        help="print the change feed events after sequence number SEQ as JSON lines, and exit")
+    args = parser.parse_args()
+    if args.memory_cap is not None:
+        from spill import set_memory_cap
+        try:
+            set_memory_cap(args.memory_cap * 1024 * 1024)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.changes_since is not None:
+        print_changes(args.profile, args.changes_since)
+    elif args.summary:
+        print_summary(args.profile)
+    else:
+        main(args.profile)
\ No newline at end of file
@@ -1,9 +1,16 @@
+import heapq
 from datetime import datetime
 from expense import Expense
-from budget import Budget
+from budget import Budget, BudgetTree, split_category, join_category
 from income import Income
-from storage import save_expenses, save_incomes
+from recurring import RecurringRule, FREQUENCIES, collect_due
+from storage import save_expenses, save_incomes, save_recurring, save_recurring_batch, save_category_rules, save_accounts
 from validation import validate_date, validate_amount, validate_description, validate_budget_amount, validate_index
+from currency import format_amount, currency_symbol, record_amount, to_base, prompt_currency
+from categorize import CategoryRule, UNCATEGORIZED
+from accounts import Account, SavingsGoal, ACCOUNT_TYPES, find_account, prompt_account
+from reports import Report, show_report, TEXT, NUMBER, AMOUNT, PERCENT, CATEGORY
+from spill import group_totals
 
 """
 Dezy's Budget Tracker - Operations Module
@@ -15,47 +22,111 @@ The module implements:
 - Expense management (view, add, delete, analyze)
 - Income management (view, add, delete)
 - Budget management (set, view)
+- Recurring transactions (view, add, delete, materialize)
+- Category rules (view, add, delete, apply)
+- Accounts and savings goals (balances, net worth, goal progress)
+- Report builders for the summaries and analyses (rendered by reports.py)
 - Input validation for all operations
 
 All functions include error handling and input validation to ensure data integrity.
 """
 
+## Listeners --------------------------------------------------------------------------------------------------------------------------
+_listeners = []
+
+def add_listener(callback):
+    """
+    Register a callback that is notified whenever the ledger changes.
+
+    Derived data (rollups, indexes) use this to stay current without
+    re-scanning the expense and income lists. The callback is called as
+    callback(action, kind, record, index) where action is "add" or "delete",
+    kind is "expense" or "income", and index is the record's list position.
+    Budget changes are sent as ("set", "budget", budget, None).
+
+    Args:
+        callback (callable): The function to call on each change
+    """
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+def remove_listener(callback):
+    """
+    Unregister a callback previously added with add_listener.
+
+    Args:
+        callback (callable): The function to remove
+    """
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def notify_listeners(action, kind, record, index=None):
+    """
+    Notify all registered listeners of a ledger change.
+
+    Args:
+        action (str): "add", "delete", or "set" for a budget change
+        kind (str): "expense", "income" or "budget"
+        record (Expense, Income or Budget): The record that was added, removed or set
+        index (int): Position of the record in its list
+    """
+    for callback in list(_listeners):
+        callback(action, kind, record, index)
+
+##-------------------------------------------------------------------------------------------------------------------------------------
+
 #$fe
 ## Expenses --------------------------------------------------------------------------------------------------------------------------
-def view_expenses(expenses):
+def build_expenses_report(expenses):
+    """
+    Build the expenses summary report.
+    
+    The table lists every expense in its own currency, with the index used
+    for deletion; the total is converted to the base currency.
+    
+    Args:
+        expenses (list): List of Expense objects
+        
+    Returns:
+        Report: The report
+    """
+    return _build_records_report(expenses, "Expenses Summary", "No expenses recorded yet.", "Total Expenses")
+
+def _build_records_report(records, title, empty_message, total_label):
+    report = Report(title)
+    if not records:
+        report.add_notes([empty_message])
+        return report
+    
+    rows = []
+    total = 0
+    for i, record in enumerate(records):
+        rows.append([i, record.date, record.category, record.description, (record.amount, record.currency)])
+        total += record_amount(record)
+    
+    columns = [("Index", NUMBER), ("Date", TEXT), ("Category", TEXT), ("Description", TEXT), ("Amount", AMOUNT)]
+    report.add_table(columns, rows, footer=[(total_label, total, AMOUNT)])
+    return report
+
+def view_expenses(expenses, cache=None):
     """
     Display all expenses with their details.
     
-    This function formats and displays a table of all expenses, including:
+    This function displays a table of all expenses, including:
     - Index number for reference
     - Date of the expense
     - Category of the expense
     - Description of the expense
     - Amount spent
-    It also calculates and displays the total amount spent.
+    It also displays the total amount spent, converted to the base currency.
     
     Args:
         expenses (list): List of Expense objects
+        cache (ReportCache): Rendered report cache of the active ledger, if any
     """
-    if not expenses:
-        print("No expenses recorded yet.")
-        return
-    
-    print("\n--- Expenses Summary ---")
-    print("Index | Date       | Category    | Description                | Amount")
-    print("-" * 75)
-    
-    total = 0
-    for i, expense in enumerate(expenses):
-        # Convert amount to float if it's a string
-        amount = float(expense.amount) if isinstance(expense.amount, str) else expense.amount
-        print(f"{i:<6}| {expense.date} | {expense.category:<10}  | {expense.description:<25}  | ${amount:.2f}")
-        total += amount
-    
-    print("-" * 75)
-    print(f"Total Expenses: ${total:.2f}")
+    show_report("expenses", lambda: build_expenses_report(expenses), cache)
 
-def add_new_expense(date_str, amount, category, description):
+def add_new_expense(date_str, amount, category, description, currency=None, account=None):
     """
     Create a new Expense object with the given details.
     
@@ -67,6 +138,8 @@ def add_new_expense(date_str, amount, category, description):
         amount (float): Amount of the expense
         category (str): Category of the expense
         description (str): Detailed description of the expense
+        currency (str): Currency code of the amount, or None for the base currency
+        account (str): Account the expense was paid from, or None for the default account
         
     Returns:
         Expense: The created Expense object
@@ -75,7 +148,7 @@ def add_new_expense(date_str, amount, category, description):
     if not date_str:
         date_str = datetime.now().strftime("%Y-%m-%d")
     
-    return Expense(date_str, amount, category, description)
+    return Expense(date_str, amount, category, description, currency, account)
 
 def delete_expense(expenses, index):
     """
@@ -89,23 +162,46 @@ def delete_expense(expenses, index):
         index (int): Index of the expense to delete
     """
     if 0 <= index < len(expenses):
-        expenses.pop(index)
+        expense = expenses.pop(index)
+        notify_listeners("delete", "expense", expense, index)
+
+def delete_records(records, indices, kind):
+    """
+    Delete many expenses or incomes in a single pass.
+    
+    The list is rebuilt once instead of popping each entry, so deleting k
+    records costs O(n) rather than O(n * k). Listeners are notified from the
+    highest index down, which matches deleting them one by one.
+    
+    Args:
+        records (list): List of Expense or Income objects
+        indices (iterable): Indices of the records to delete
+        kind (str): "expense" or "income"
+    """
+    doomed = {index for index in indices if 0 <= index < len(records)}
+    for index in sorted(doomed, reverse=True):
+        notify_listeners("delete", kind, records[index], index)
+    records[:] = [record for index, record in enumerate(records) if index not in doomed]
 
-def handle_add_expense(expenses):
+def handle_add_expense(expenses, categorizer=None, detector=None):
     """
     Handle the process of adding a new expense with validation.
     
     This function:
-    1. Prompts the user for expense details (date, amount, category, description)
-    2. Validates each input using appropriate validation functions
-    3. Creates a new expense and adds it to the list
-    4. Saves the updated expenses list
+    1. Prompts the user for expense details (date, amount, description, category)
+    2. Suggests a category from the categorization rules, if any match
+    3. Validates each input using appropriate validation functions
+    4. Creates a new expense and adds it to the list
+    5. Warns if the expense is unusual for its category
+    6. Saves the updated expenses list
     
     The function includes error handling and validation loops to ensure
     all inputs are valid before proceeding.
     
     Args:
         expenses (list): List of Expense objects to add to
+        categorizer (Categorizer): Compiled category rules used for the suggestion, if any
+        detector (AnomalyDetector): Spending statistics the new expense is checked against, if any
     """
     print("\n--- Add New Expense ---")
     
@@ -119,117 +215,180 @@ def handle_add_expense(expenses):
     # Get and validate amount
     while True:
         try:
-            amount_str = input("Enter amount: $")
+            amount_str = input("Enter amount: ")
             amount = validate_amount(amount_str)
             break
         except ValueError as e:
             print(f"Error: {e}")
+    currency = prompt_currency()
+    account = prompt_account()
     
-    # Get and validate category
+    # Get and validate description (asked first so the rules can suggest a category)
     while True:
         try:
-            category = input("Enter expense category (e.g., food, transport, bills): ")
-            if not category.strip():
-                raise ValueError("Category cannot be empty")
+            description = input("Enter expense description: ")
+            if not description.strip():
+                raise ValueError("Description cannot be empty")
             break
         except ValueError as e:
             print(f"Error: {e}")
     
-    # Get and validate description
+    # Get and validate category, defaulting to the one suggested by the rules
+    suggestion = None
+    if categorizer:
+        base_amount = to_base(amount, currency, date_str or datetime.now().strftime("%Y-%m-%d"))
+        suggestion = categorizer.suggest(description, base_amount)
     while True:
         try:
-            description = input("Enter expense description: ")
-            if not description.strip():
-                raise ValueError("Description cannot be empty")
+            if suggestion:
+                category = input(f"Enter expense category or leave empty for '{suggestion}': ").strip() or suggestion
+            else:
+                category = input("Enter expense category (e.g., food, transport, bills): ")
+            if not category.strip():
+                raise ValueError("Category cannot be empty")
             break
         except ValueError as e:
             print(f"Error: {e}")
     
     # Add the expense
-    expense = add_new_expense(date_str, amount, category, description)
+    expense = add_new_expense(date_str, amount, category, description, currency, account)
+    flag = detector.check(expense) if detector else None
     expenses.append(expense)
+    notify_listeners("add", "expense", expense, len(expenses) - 1)
     save_expenses(expenses)
     print("Expense added successfully!")
+    if flag:
+        print(f"Warning: unusual expense - {flag['reason']}.")
 
-def analyze_expenses(expenses, budget):
+def build_expense_analysis_report(expenses, budget, tree=None):
     """
-    Analyze expenses and provide insights including category-specific analysis.
+    Build the expense analysis report, including category-specific analysis.
+    
+    Categories are shown as a tree; each parent's spend and budget include
+    its sub-categories.
+    
+    Args:
+        expenses (list): List of Expense objects
+        budget (Budget): The Budget object
+        tree (BudgetTree): Cached budget tree, built from the expenses if not given
+        
+    Returns:
+        Report: The report
     """
+    report = Report("Expense Analysis")
     if not expenses:
-        print("No expenses to analyze.")
-        return
-    
-    # Calculate total expenses
-    total = sum(expense.amount for expense in expenses)
+        report.add_notes(["No expenses to analyze."])
+        return report
     
-    # Group expenses by category
-    expenses_by_category = {}
-    for expense in expenses:
-        if expense.category in expenses_by_category:
-            expenses_by_category[expense.category] += expense.amount
-        else:
-            expenses_by_category[expense.category] = expense.amount
+    if tree is None:
+        tree = BudgetTree.build(budget, expenses)
     
-    print("\n--- Expense Analysis ---")
-    print(f"Total expenses: ${total:.2f}")
-    print(f"Number of expenses: {len(expenses)}")
-    print(f"Average expense: ${total/len(expenses):.2f}")
+    # Totals come from the cached tree instead of re-scanning the expenses
+    total = tree.root.total_spent()
+    count = tree.root.total_count()
+    report.add_fields([
+        ("Total expenses", total, AMOUNT),
+        ("Number of expenses", count, NUMBER),
+        ("Average expense", total / count, AMOUNT)
+    ])
     
     # Category analysis
-    print("\nExpenses by Category:")
-    print("Category          | Spent        | Budget        | Remaining")
-    print("-" * 65)
-    
-    for category, spent in expenses_by_category.items():
-        category_budget = budget.get_category_budget(category) if budget else 0
+    rows = []
+    for node, depth in tree.evaluate():
+        spent = node.total_spent()
+        category_budget = node.limit() if budget else 0
+        if not spent and not category_budget:
+            continue
         remaining = category_budget - spent if category_budget > 0 else 0
-        print(f"{category:<15} | ${spent:>10.2f} | ${category_budget:>10.2f} | ${remaining:>10.2f}")
+        rows.append([node.category, spent, category_budget, remaining])
+    columns = [("Category", CATEGORY), ("Spent", AMOUNT), ("Budget", AMOUNT), ("Remaining", AMOUNT)]
+    report.add_table(columns, rows, title="Expenses by Category")
     
     # Overall budget analysis
     if budget and isinstance(budget, Budget):
         remaining = budget.amount - total
         percentage = (total / budget.amount) * 100
-        
-        print("\nOverall Budget Status:")
-        print(f"Budget remaining: ${remaining:.2f}")
-        print(f"Budget usage: {percentage:.1f}%")
+        report.add_fields([
+            ("Budget remaining", remaining, AMOUNT),
+            ("Budget usage", percentage, PERCENT)
+        ], title="Overall Budget Status")
         
         if remaining < 0:
-            print("Warning: You have exceeded your overall budget!")
+            report.add_notes(["Warning: You have exceeded your overall budget!"])
         elif percentage > 80:
-            print("Warning: You have used more than 80% of your overall budget!")
+            report.add_notes(["Warning: You have used more than 80% of your overall budget!"])
+    return report
+
+def analyze_expenses(expenses, budget, tree=None, cache=None):
+    """
+    Analyze expenses and provide insights including category-specific analysis.
+    
+    Args:
+        expenses (list): List of Expense objects
+        budget (Budget): The Budget object
+        tree (BudgetTree): Cached budget tree, built from the expenses if not given
+        cache (ReportCache): Rendered report cache of the active ledger, if any
+    """
+    show_report("expense_analysis", lambda: build_expense_analysis_report(expenses, budget, tree), cache)
 
 ##-------------------------------------------------------------------------------------------------------------------------------------
 
 ## Budget -----------------------------------------------------------------------------------------------------------------------------
-def view_budget(budget):
+def build_budget_report(budget, tree=None):
     """
-    Display the current budget status.
+    Build the budget status report.
     
-    This function displays the current monthly budget amount.
-    If no budget has been set, it informs the user.
+    Category budgets are shown as a tree (e.g. "food > groceries" under "food").
+    A parent's budget is its own amount, or the sum of its sub-categories
+    if it has none.
     
     Args:
         budget (Budget): The Budget object
+        tree (BudgetTree): Cached budget tree with spend, built from the budget if not given
+        
+    Returns:
+        Report: The report
     """
+    report = Report("Budget Status")
     if not budget or not isinstance(budget, Budget):
-        print("No budget has been set.")
-        return
+        report.add_notes(["No budget has been set."])
+        return report
     
-    print("\n--- Budget Status ---")
-    print(f"Overall monthly budget: ${budget.amount:.2f}")
+    report.add_fields([("Overall monthly budget", budget.amount, AMOUNT)])
     
     if budget.categories:
-        print("\nCategory Budgets:")
-        print("Category          | Budget Amount")
-        print("-" * 35)
-        for category, amount in budget.categories.items():
-            print(f"{category:<15} | ${amount:.2f}")
+        if tree is None:
+            tree = BudgetTree(budget)
+        
+        rows = []
+        for node, depth in tree.evaluate():
+            limit = node.limit()
+            if limit <= 0:
+                continue
+            spent = node.total_spent()
+            rows.append([node.category, limit, spent, limit - spent])
         
         total_categories = budget.get_total_category_budgets()
-        print("-" * 35)
-        print(f"Total category budgets: ${total_categories:.2f}")
-        print(f"Remaining for other categories: ${budget.amount - total_categories:.2f}")
+        columns = [("Category", CATEGORY), ("Budget", AMOUNT), ("Spent", AMOUNT), ("Remaining", AMOUNT)]
+        report.add_table(columns, rows, title="Category Budgets", footer=[
+            ("Total category budgets", total_categories, AMOUNT),
+            ("Remaining for other categories", budget.amount - total_categories, AMOUNT)
+        ])
+    return report
+
+def view_budget(budget, tree=None, cache=None):
+    """
+    Display the current budget status.
+    
+    This function displays the current monthly budget amount and the
+    category budgets as a tree. If no budget has been set, it informs the user.
+    
+    Args:
+        budget (Budget): The Budget object
+        tree (BudgetTree): Cached budget tree with spend, built from the budget if not given
+        cache (ReportCache): Rendered report cache of the active ledger, if any
+    """
+    show_report("budget", lambda: build_budget_report(budget, tree), cache)
 
 def set_budget():
     """
@@ -238,7 +397,8 @@ def set_budget():
     This function:
     1. Prompts the user for a monthly budget amount
     2. Validates the input using the validate_budget_amount function
-    3. Creates and returns a Budget object
+    3. Optionally prompts for category and sub-category budgets
+    4. Creates and returns a Budget object
     
     The function includes error handling and allows the user to cancel
     the operation by typing 'cancel'.
@@ -250,14 +410,35 @@ def set_budget():
     
     while True:
         try:
-            amount_str = input("Enter monthly budget amount (or 'cancel' to cancel): $")
+            amount_str = input(f"Enter monthly budget amount in {currency_symbol().strip()} (or 'cancel' to cancel): ")
             if amount_str.lower() == 'cancel':
                 return None
             
             amount = validate_budget_amount(amount_str)
-            return Budget(amount)
+            budget = Budget(amount)
+            break
         except ValueError as e:
             print(f"Error: {e}")
+    
+    # Ask for category budgets; "parent > child" creates a sub-category
+    while True:
+        add_category = input("\nWould you like to set a category budget? (y/n): ").lower()
+        if add_category != 'y':
+            break
+        
+        path = split_category(input("Enter category name (e.g., food, or food > groceries): "))
+        if not path:
+            print("Category name cannot be empty.")
+            continue
+        
+        try:
+            amount = validate_budget_amount(input(f"Enter budget amount for {join_category(path)}: {currency_symbol()}"))
+            budget.set_category_budget(join_category(path), amount)
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    notify_listeners("set", "budget", budget)
+    return budget
 
 def remove_budget(budget):
     """
@@ -270,40 +451,37 @@ def remove_budget(budget):
 ## -------------------------------------------------------------------------------------------------------------------------------------
 
 ## Income --------------------------------------------------------------------------------------------------------------------------
-def view_incomes(incomes):
+def build_incomes_report(incomes):
+    """
+    Build the income summary report.
+    
+    Args:
+        incomes (list): List of Income objects
+        
+    Returns:
+        Report: The report
+    """
+    return _build_records_report(incomes, "Income Summary", "No incomes recorded yet.", "Total Income")
+
+def view_incomes(incomes, cache=None):
     """
     Display all incomes with their details.
     
-    This function formats and displays a table of all incomes, including:
+    This function displays a table of all incomes, including:
     - Index number for reference
     - Date of the income
     - Category of the income
     - Description of the income
     - Amount received
-    It also calculates and displays the total amount received.
+    It also displays the total amount received, converted to the base currency.
     
     Args:
         incomes (list): List of Income objects
+        cache (ReportCache): Rendered report cache of the active ledger, if any
     """
-    if not incomes:
-        print("No incomes recorded yet.")
-        return
-    
-    print("\n--- Income Summary ---")
-    print("Index | Date       | Category    | Description                | Amount")
-    print("-" * 75)
-    
-    total = 0
-    for i, income in enumerate(incomes):
-        # Convert amount to float if it's a string
-        amount = float(income.amount) if isinstance(income.amount, str) else income.amount
-        print(f"{i:<6}| {income.date} | {income.category:<10}  | {income.description:<25}  | ${amount:.2f}")
-        total += amount
-    
-    print("-" * 75)
-    print(f"Total Income: ${total:.2f}")
+    show_report("incomes", lambda: build_incomes_report(incomes), cache)
 
-def add_new_income(date_str, amount, category, description):
+def add_new_income(date_str, amount, category, description, currency=None, account=None):
     """
     Create a new income entry.
     
@@ -312,11 +490,13 @@ def add_new_income(date_str, amount, category, description):
         amount (float): Amount of the income
         category (str): Category of the income
         description (str): Description of the income
+        currency (str): Currency code of the amount, or None for the base currency
+        account (str): Account the income was paid into, or None for the default account
         
     Returns:
         Income: A new Income object
     """
-    return Income(date_str, amount, category, description)
+    return Income(date_str, amount, category, description, currency, account)
 
 def delete_income(incomes, index):
     """
@@ -327,7 +507,8 @@ def delete_income(incomes, index):
         index (int): Index of the income to delete
     """
     if 0 <= index < len(incomes):
-        del incomes[index]
+        income = incomes.pop(index)
+        notify_listeners("delete", "income", income, index)
     else:
         raise ValueError("Invalid income index")
 
@@ -353,101 +534,562 @@ def handle_add_income(incomes):
     if new_income:
         # Add the new income to the list
         incomes.append(new_income)
+        notify_listeners("add", "income", new_income, len(incomes) - 1)
         
         # Save the updated list
         save_incomes(incomes)
         
-        print(f"Income of ${new_income.amount:.2f} added successfully!")
+        print(f"Income of {format_amount(new_income.amount, new_income.currency)} added successfully!")
     else:
         print("Income addition cancelled.")
 
-def analyze_finances(incomes, expenses, budget):
+def _largest_groups(groups, limit):
+    # Keep the `limit` largest (category, total, count) groups of a stream in a min-heap, summing the rest:
+    # ([(total, category)] largest first, total of the rest, number of other categories, overall total)
+    largest = []
+    overall = other = 0.0
+    others = 0
+    for category, total, count in groups:
+        overall += total
+        if len(largest) < limit:
+            heapq.heappush(largest, (total, category))
+            continue
+        total, category = heapq.heappushpop(largest, (total, category))
+        other += total
+        others += 1
+    return sorted(largest, reverse=True), other, others, overall
+
+def _category_rows(groups, limit=None):
+    # Turn a group-by stream into [category, amount, share] rows in one pass: (rows, overall total).
+    # Without a limit every category is listed in key order; with one, the largest first plus an "Other" row.
+    if limit:
+        largest, other, others, overall = _largest_groups(groups, limit)
+        rows = [[category, amount, 0.0] for amount, category in largest]
+        if others:
+            rows.append([f"Other ({others} categories)", other, 0.0])
+    else:
+        rows = []
+        overall = 0.0
+        for category, total, count in groups:
+            overall += total
+            rows.append([category, total, 0.0])
+    # Shares are filled in once the total is known
+    for row in rows:
+        row[2] = (row[1] / overall) * 100 if overall else 0
+    return rows, overall
+
+def build_financial_report(incomes, expenses, budget, category_limit=None):
     """
-    Analyze finances by comparing income, expenses, and budget.
+    Build the financial summary report comparing income, expenses, and budget.
     
-    This function:
-    1. Calculates total income
-    2. Calculates total expenses
-    3. Calculates net income (income - expenses)
-    4. Compares expenses to budget
-    5. Provides financial insights
+    The report contains:
+    1. Total income, total expenses and net income (income - expenses)
+    2. The expenses compared to the budget
+    3. Financial insights
+    4. Income and expenses by category
+    
+    Each list is read once, so they may also be streams of records (see
+    export.stream_records); the category group-by stays within the spill
+    module's memory cap, and its sorted output is turned into table rows as
+    it streams, with the totals kept as running sums.
     
     Args:
-        incomes (list): List of Income objects
-        expenses (list): List of Expense objects
+        incomes (iterable): Income objects
+        expenses (iterable): Expense objects
         budget (Budget): Budget object
+        category_limit (int): Most categories to list per table, largest first with the
+                              rest summed into an "Other" row, or None to list every category
+        
+    Returns:
+        Report: The report
     """
-    if not incomes and not expenses:
-        print("No financial data to analyze.")
-        return
+    report = Report("Financial Summary")
     
-    # Calculate totals
-    total_income = sum(float(income.amount) for income in incomes)
-    total_expenses = sum(float(expense.amount) for expense in expenses)
+    # Every amount is converted to the base currency before it is summed
+    income_rows, total_income = _category_rows(
+        group_totals((income.category, record_amount(income)) for income in incomes), category_limit)
+    expense_rows, total_expenses = _category_rows(
+        group_totals((expense.category, record_amount(expense)) for expense in expenses), category_limit)
+    if not income_rows and not expense_rows:
+        report.add_notes(["No financial data to analyze."])
+        return report
     net_income = total_income - total_expenses
     
-    # Display financial summary
-    print("\n--- Financial Summary ---")
-    print(f"Total Income: ${total_income:.2f}")
-    print(f"Total Expenses: ${total_expenses:.2f}")
-    print(f"Net Income: ${net_income:.2f}")
+    summary = [
+        ("Total Income", total_income, AMOUNT),
+        ("Total Expenses", total_expenses, AMOUNT),
+        ("Net Income", net_income, AMOUNT)
+    ]
     
     # Compare to budget if available
     if budget:
-        print(f"Monthly Budget: ${budget.amount:.2f}")
+        summary.append(("Monthly Budget", budget.amount, AMOUNT))
         remaining_budget = budget.amount - total_expenses
-        
         if remaining_budget >= 0:
-            print(f"Remaining Budget: ${remaining_budget:.2f}")
+            summary.append(("Remaining Budget", remaining_budget, AMOUNT))
         else:
-            print(f"Budget Exceeded by: ${abs(remaining_budget):.2f}")
+            summary.append(("Budget Exceeded by", abs(remaining_budget), AMOUNT))
         
         # Calculate percentage of budget used
         if budget.amount > 0:
-            percentage_used = (total_expenses / budget.amount) * 100
-            print(f"Percentage of Budget Used: {percentage_used:.1f}%")
+            summary.append(("Percentage of Budget Used", (total_expenses / budget.amount) * 100, PERCENT))
+    report.add_fields(summary)
     
     # Provide financial insights
-    print("\n--- Financial Insights ---")
-    
+    insights = []
     if net_income > 0:
-        print("You have a positive net income. Good job!")
+        insights.append("You have a positive net income. Good job!")
     elif net_income < 0:
-        print("You have a negative net income. Consider reducing expenses or increasing income.")
+        insights.append("You have a negative net income. Consider reducing expenses or increasing income.")
     else:
-        print("Your income equals your expenses. Consider saving more.")
-    
+        insights.append("Your income equals your expenses. Consider saving more.")
     if budget and total_expenses > budget.amount:
-        print("You've exceeded your budget. Consider reducing expenses.")
-    
-    # Analyze income categories
-    if incomes:
-        print("\n--- Income by Category ---")
-        income_by_category = {}
-        for income in incomes:
-            category = income.category
-            amount = float(income.amount)
-            if category in income_by_category:
-                income_by_category[category] += amount
-            else:
-                income_by_category[category] = amount
+        insights.append("You've exceeded your budget. Consider reducing expenses.")
+    report.add_notes(insights, title="Financial Insights")
+    
+    # Income and expense categories, with each category's share of the total
+    for title, rows in (("Income by Category", income_rows), ("Expenses by Category", expense_rows)):
+        if rows:
+            report.add_table([("Category", TEXT), ("Amount", AMOUNT), ("Share", PERCENT)], rows, title=title)
+    return report
+
+def analyze_finances(incomes, expenses, budget, cache=None):
+    """
+    Analyze finances by comparing income, expenses, and budget.
+    
+    Args:
+        incomes (list): List of Income objects
+        expenses (list): List of Expense objects
+        budget (Budget): Budget object
+        cache (ReportCache): Rendered report cache of the active ledger, if any
+    """
+    show_report("financial_summary", lambda: build_financial_report(incomes, expenses, budget), cache)
+
+## -------------------------------------------------------------------------------------------------------------------------------------
+
+## Recurring --------------------------------------------------------------------------------------------------------------------------
+def view_recurring(rules):
+    """
+    Display all recurring transaction rules.
+    
+    Args:
+        rules (list): List of RecurringRule objects
+    """
+    if not rules:
+        print("No recurring transactions set up yet.")
+        return
+    
+    print("\n--- Recurring Transactions ---")
+    print("Index | Type    | Schedule                 | Category    | Description                | Amount")
+    print("-" * 99)
+    
+    for i, rule in enumerate(rules):
+        unit = {"daily": "day", "weekly": "week", "monthly": "month"}[rule.frequency]
+        schedule = f"every {rule.interval} {unit}(s)"
+        if rule.frequency == "monthly":
+            schedule += f" on {rule.day}"
+        print(f"{i:<6}| {rule.kind:<7} | {schedule:<24} | {rule.category:<10}  | {rule.description:<25}  | {format_amount(rule.amount, rule.currency)}")
+
+def handle_add_recurring(rules):
+    """
+    Handle the process of adding a new recurring transaction rule.
+    
+    This function:
+    1. Prompts the user for the rule type, amount, category and description
+    2. Prompts for the schedule (frequency, interval, start date)
+    3. Adds the rule to the list and saves it
+    
+    Args:
+        rules (list): List of RecurringRule objects
+    """
+    print("\n--- Add Recurring Transaction ---")
+    
+    # Get and validate type
+    while True:
+        kind = input("Is this an expense or income? (expense/income): ").strip().lower()
+        if kind in ["expense", "income"]:
+            break
+        print("Invalid choice. Please enter 'expense' or 'income'.")
+    
+    # Get and validate amount
+    while True:
+        try:
+            amount = validate_amount(input("Enter amount: "))
+            break
+        except ValueError as e:
+            print(f"Error: {e}")
+    currency = prompt_currency()
+    account = prompt_account()
+    
+    # Get and validate category and description
+    while True:
+        category = input("Enter category: ").strip()
+        if category:
+            break
+        print("Error: Category cannot be empty")
+    while True:
+        try:
+            description = validate_description(input("Enter description: "))
+            break
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    # Get and validate schedule
+    while True:
+        frequency = input("Repeat daily, weekly or monthly?: ").strip().lower()
+        if frequency in FREQUENCIES:
+            break
+        print("Invalid choice. Please enter daily, weekly or monthly.")
+    while True:
+        interval_str = input("Repeat every how many periods? (default 1): ").strip()
+        if not interval_str:
+            interval = 1
+            break
+        if interval_str.isdigit() and int(interval_str) > 0:
+            interval = int(interval_str)
+            break
+        print("Please enter a whole number greater than 0.")
+    while True:
+        start_date = input("Enter start date (YYYY-MM-DD) or leave empty for today: ").strip()
+        if validate_date(start_date):
+            break
+        print("Invalid date format. Please use YYYY-MM-DD format.")
+    if not start_date:
+        start_date = datetime.now().strftime("%Y-%m-%d")
+    
+    rules.append(RecurringRule(kind, amount, category, description, frequency, start_date, interval, currency=currency, account=account))
+    save_recurring(rules)
+    print("Recurring transaction added successfully!")
+
+def delete_recurring(rules, index):
+    """
+    Delete a recurring rule by index.
+    
+    Already materialized entries are kept.
+    
+    Args:
+        rules (list): List of RecurringRule objects
+        index (int): Index of the rule to delete
+    """
+    if 0 <= index < len(rules):
+        del rules[index]
+    else:
+        raise ValueError("Invalid recurring transaction index")
+
+def materialize_recurring(rules, expenses, incomes, today=None):
+    """
+    Add every due occurrence of the recurring rules to the ledger in one batch.
+    
+    All new entries are appended first and each file is written once at the
+    end, so catching up over many missed periods stays linear. The records and
+    the rules' last dates are committed together, so a crash cannot make the
+    next run add the same entries again.
+    
+    Args:
+        rules (list): List of RecurringRule objects
+        expenses (list): List of Expense objects
+        incomes (list): List of Income objects
+        today (date): Materialize up to this date, defaults to today
         
-        for category, amount in income_by_category.items():
-            percentage = (amount / total_income) * 100
-            print(f"{category}: ${amount:.2f} ({percentage:.1f}%)")
-    
-    # Analyze expense categories
-    if expenses:
-        print("\n--- Expenses by Category ---")
-        expenses_by_category = {}
-        for expense in expenses:
-            category = expense.category
-            amount = float(expense.amount)
-            if category in expenses_by_category:
-                expenses_by_category[category] += amount
-            else:
-                expenses_by_category[category] = amount
+    Returns:
+        tuple: (number of expenses added, number of incomes added)
+    """
+    if not rules:
+        return 0, 0
+    
+    until = today or datetime.now().date()
+    new_expenses, new_incomes = collect_due(rules, until)
+    
+    for expense in new_expenses:
+        expenses.append(expense)
+        notify_listeners("add", "expense", expense, len(expenses) - 1)
+    for income in new_incomes:
+        incomes.append(income)
+        notify_listeners("add", "income", income, len(incomes) - 1)
+    
+    # Single all-or-nothing write for the whole batch
+    if new_expenses or new_incomes:
+        save_recurring_batch(rules, expenses if new_expenses else None, incomes if new_incomes else None)
+    
+    return len(new_expenses), len(new_incomes)
+
+## -------------------------------------------------------------------------------------------------------------------------------------
+
+## Category rules ---------------------------------------------------------------------------------------------------------------------
+def view_category_rules(rules):
+    """
+    Display the categorization rules in priority order.
+    
+    Args:
+        rules (list): List of CategoryRule objects
+    """
+    if not rules:
+        print("No category rules set up yet.")
+        return
+    
+    print("\n--- Category Rules (first match wins) ---")
+    print("Index | Category    | Keywords                   | Pattern         | Amount range")
+    print("-" * 85)
+    
+    for i, rule in enumerate(rules):
+        keywords = ", ".join(rule.keywords) or "-"
+        low = format_amount(rule.min_amount) if rule.min_amount is not None else "any"
+        high = format_amount(rule.max_amount) if rule.max_amount is not None else "any"
+        amount_range = "any" if rule.min_amount is None and rule.max_amount is None else f"{low} - {high}"
+        print(f"{i:<6}| {rule.category:<10}  | {keywords:<25}  | {rule.pattern or '-':<15} | {amount_range}")
+
+def handle_add_category_rule(categorizer):
+    """
+    Handle the process of adding a new categorization rule.
+    
+    This function:
+    1. Prompts the user for the category, keywords, pattern and amount range
+    2. Adds the rule at the end of the list (lowest priority) and recompiles
+    3. Saves the rules
+    
+    Args:
+        categorizer (Categorizer): The active ledger's categorizer
+    """
+    print("\n--- Add Category Rule ---")
+    
+    while True:
+        category = input("Enter category to assign (e.g., food > groceries): ").strip()
+        if category:
+            break
+        print("Error: Category cannot be empty")
+    
+    keywords = input("Enter description keywords or merchants, comma-separated (optional): ").split(",")
+    pattern = input("Enter a regular expression to match the description (optional): ").strip() or None
+    
+    amounts = []
+    for prompt in ("Enter minimum amount (optional): ", "Enter maximum amount (optional): "):
+        while True:
+            amount_str = input(prompt).strip()
+            if not amount_str:
+                amounts.append(None)
+                break
+            try:
+                amounts.append(validate_amount(amount_str))
+                break
+            except ValueError as e:
+                print(f"Error: {e}")
+    
+    try:
+        rule = CategoryRule(category, keywords, pattern, amounts[0], amounts[1])
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    categorizer.rules.append(rule)
+    categorizer.compile()
+    save_category_rules(categorizer.rules)
+    print("Category rule added successfully!")
+
+def delete_category_rule(categorizer, index):
+    """
+    Delete a categorization rule by index.
+    
+    Categories already assigned by the rule are kept. The rules are saved.
+    
+    Args:
+        categorizer (Categorizer): The active ledger's categorizer
+        index (int): Index of the rule to delete
+    """
+    if 0 <= index < len(categorizer.rules):
+        del categorizer.rules[index]
+        categorizer.compile()
+        save_category_rules(categorizer.rules)
+    else:
+        raise ValueError("Invalid category rule index")
+
+def apply_category_rules(categorizer, expenses):
+    """
+    Categorize every uncategorized expense with the current rules.
+    
+    Each change is reported to the listeners as a delete and an add at the
+    same index, so aggregates and history stay current. The file is written once.
+    
+    Args:
+        categorizer (Categorizer): The active ledger's categorizer
+        expenses (list): List of Expense objects
         
-        for category, amount in expenses_by_category.items():
-            percentage = (amount / total_expenses) * 100
-            print(f"{category}: ${amount:.2f} ({percentage:.1f}%)")
\ No newline at end of file
+    Returns:
+        int: Number of expenses categorized
+    """
+    changed = 0
+    for index, expense in enumerate(expenses):
+        if expense.category != UNCATEGORIZED:
+            continue
+        category = categorizer.suggest(expense.description, record_amount(expense))
+        if category and category != expense.category:
+            notify_listeners("delete", "expense", expense, index)
+            expense = expenses[index] = Expense(expense.date, expense.amount, category, expense.description,
+                                               expense.currency, expense.account)
+            notify_listeners("add", "expense", expense, index)
+            changed += 1
+    if changed:
+        save_expenses(expenses)
+    return changed
+
+## -------------------------------------------------------------------------------------------------------------------------------------
+
+## Accounts and goals -----------------------------------------------------------------------------------------------------------------
+def build_accounts_report(balances, date_str=None):
+    """
+    Build the account balances report with the net worth.
+    
+    Args:
+        balances (BalanceLedger): The active ledger's running balances
+        date_str (str): Date in YYYY-MM-DD format, or None for the current balances
+    
+    Returns:
+        Report: The report
+    """
+    report = Report(f"Account Balances as of {date_str}" if date_str else "Account Balances")
+    types = {account.name: account.account_type for account in balances.accounts}
+    rows = [[name, types.get(name, "-"), balances.balance(name, date_str)] for name in balances.account_names()]
+    report.add_table([("Account", TEXT), ("Type", TEXT), ("Balance", AMOUNT)], rows,
+                     footer=[("Net Worth", sum(row[2] for row in rows), AMOUNT)])
+    return report
+
+def view_accounts(balances, date_str=None):
+    """
+    Display every account's balance and the net worth.
+    
+    Args:
+        balances (BalanceLedger): The active ledger's running balances
+        date_str (str): Date in YYYY-MM-DD format, or None for the current balances
+    """
+    show_report("accounts", lambda: build_accounts_report(balances, date_str))
+
+def handle_add_account(accounts, goals):
+    """
+    Handle the process of adding a new account.
+    
+    Args:
+        accounts (list): List of Account objects
+        goals (list): List of SavingsGoal objects (saved alongside the accounts)
+    """
+    print("\n--- Add Account ---")
+    
+    name = input("Enter account name (e.g., savings, wallet): ").strip()
+    if any(account.name == name.lower() for account in accounts):
+        print(f"Error: An account named '{name.lower()}' already exists")
+        return
+    
+    while True:
+        account_type = input(f"Enter account type ({', '.join(ACCOUNT_TYPES)}): ").strip().lower()
+        if account_type in ACCOUNT_TYPES:
+            break
+        print(f"Invalid choice. Please enter one of: {', '.join(ACCOUNT_TYPES)}.")
+    
+    while True:
+        opening_str = input(f"Enter opening balance in {currency_symbol().strip()} (default 0): ").strip()
+        if not opening_str:
+            opening_balance = 0.0
+            break
+        try:
+            opening_balance = float(opening_str)
+            break
+        except ValueError:
+            print("Error: Please enter a valid number")
+    
+    try:
+        accounts.append(Account(name, account_type, opening_balance))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    save_accounts(accounts, goals)
+    print("Account added successfully!")
+
+def build_goals_report(balances, goals, today=None):
+    """
+    Build the savings goal progress report from the account balances.
+    
+    Args:
+        balances (BalanceLedger): The active ledger's running balances
+        goals (list): List of SavingsGoal objects
+        today (str): Date in YYYY-MM-DD format, or None for today
+    
+    Returns:
+        Report: The report
+    """
+    report = Report("Savings Goals")
+    if not goals:
+        report.add_notes(["No savings goals set up yet."])
+        return report
+    
+    rows = []
+    for i, goal in enumerate(goals):
+        progress = balances.goal_progress(goal, today)
+        rows.append([i, goal.name, goal.account, goal.target, progress["saved"], progress["percent"],
+                     progress["remaining"], progress["last_30_days"], goal.target_date, progress["monthly_needed"]])
+    report.add_table([("Index", NUMBER), ("Goal", TEXT), ("Account", TEXT), ("Target", AMOUNT), ("Saved", AMOUNT),
+                      ("Progress", PERCENT), ("Remaining", AMOUNT), ("Last 30 Days", AMOUNT), ("Target Date", TEXT),
+                      ("Needed / Month", AMOUNT)], rows)
+    return report
+
+def view_goals(balances, goals):
+    """
+    Display progress towards every savings goal.
+    
+    Args:
+        balances (BalanceLedger): The active ledger's running balances
+        goals (list): List of SavingsGoal objects
+    """
+    show_report("goals", lambda: build_goals_report(balances, goals))
+
+def handle_add_goal(accounts, goals):
+    """
+    Handle the process of adding a new savings goal.
+    
+    Args:
+        accounts (list): List of Account objects
+        goals (list): List of SavingsGoal objects
+    """
+    print("\n--- Add Savings Goal ---")
+    
+    while True:
+        name = input("Enter goal name (e.g., emergency fund): ").strip()
+        if name:
+            break
+        print("Error: Goal name cannot be empty")
+    
+    while True:
+        try:
+            target = validate_amount(input(f"Enter target balance in {currency_symbol().strip()}: "))
+            break
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    names = ", ".join(account.name for account in accounts)
+    while True:
+        try:
+            account = find_account(accounts, input(f"Enter account that holds the savings ({names}): ")).name
+            break
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    while True:
+        target_date = input("Enter target date (YYYY-MM-DD) or leave empty for none: ").strip()
+        if validate_date(target_date):
+            break
+        print("Invalid date format. Please use YYYY-MM-DD format.")
+    
+    goals.append(SavingsGoal(name, target, account, target_date or None))
+    save_accounts(accounts, goals)
+    print("Savings goal added successfully!")
+
+def delete_goal(accounts, goals, index):
+    """
+    Delete a savings goal by index.
+    
+    Args:
+        accounts (list): List of Account objects (saved alongside the goals)
+        goals (list): List of SavingsGoal objects
+        index (int): Index of the goal to delete
+    """
+    if 0 <= index < len(goals):
+        del goals[index]
+        save_accounts(accounts, goals)
+    else:
+        raise ValueError("Invalid goal index")
@@ -0,0 +1,465 @@
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from storage import (load_expenses, load_incomes, load_budget, load_recurring, load_rates, load_category_rules,
+                     load_accounts, recover_commit, COMMIT_JOURNAL)
+from currency import RateTable
+from expense import Expense
+from income import Income
+from rollups import CashFlowCube
+from search import SearchIndex
+from history import OperationLog
+from budget import BudgetTree
+from reports import ReportCache
+from categorize import Categorizer
+from accounts import Account, BalanceLedger, DEFAULT_ACCOUNT
+from anomaly import AnomalyDetector
+from cache import DerivedCache
+from feed import ChangeFeed, CHANGES_FILENAME
+
+"""
+Dezy's Budget Tracker - Profiles Module
+
+This module lets one long-running process serve many ledgers (household members,
+teams, years). Each profile has its own storage root; the "default" profile keeps
+using the files in the current directory so existing data is unaffected.
+
+Loaded ledgers and their aggregates (cash-flow cube, search indexes) are kept in an
+LRU cache. When the estimated memory of the cache passes the budget, or a profile
+sits idle too long, the least recently used ledgers are evicted. Per-profile
+load, hit and eviction counts are available through ProfileManager.stats().
+
+Across runs, each ledger's records and aggregates are kept in a sidecar cache
+(see cache.py) keyed by the fingerprints of CACHE_SOURCES. A ledger loads from it
+when none of those files changed, and writes it back when it is closed or evicted.
+
+Each ledger publishes its changes through a change feed (see feed.py), written
+to changes.jsonl in the profile's directory.
+"""
+
+DEFAULT_PROFILE = "default"
+PROFILE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+# Files the cached records and aggregates are derived from
+CACHE_SOURCES = ("expenses.json", "incomes.json", "budget.json", "rates.json", "category_rules.json", "accounts.json")
+
+class Ledger:
+    """
+    A loaded profile: its records plus the aggregates derived from them.
+
+    Attributes:
+        name (str): The profile name
+        root (str): The directory holding the profile's files
+        expenses (list): List of Expense objects
+        incomes (list): List of Income objects
+        budget (Budget): The Budget object, or None
+        rules (list): List of RecurringRule objects
+        rates (RateTable): Exchange rates used to convert amounts to the base currency
+        categorizer (Categorizer): Compiled categorization rules
+        auto_categorized (int): Number of uncategorized expenses the rules filled in while loading
+        accounts (list): List of Account objects
+        goals (list): List of SavingsGoal objects
+        cube (CashFlowCube): Cash-flow rollups
+        expense_index (SearchIndex): Description search over expenses
+        income_index (SearchIndex): Description search over incomes
+        budget_tree (BudgetTree): Hierarchical budget evaluation with cached category totals
+        balances (BalanceLedger): Running account balances with checkpoints
+        anomalies (AnomalyDetector): Per-category spending statistics and flagged expenses
+        history (OperationLog): Change log used for undo/redo and point-in-time views
+        feed (ChangeFeed): Change feed for subscribers and the change file
+        reports (ReportCache): Rendered reports, reused until the ledger changes
+        quarantine (dict): Rows rejected while loading, format: {"expenses": [...], "incomes": [...]}
+        cache (DerivedCache): The sidecar cache the ledger was loaded from and is saved to, or None
+        changed (bool): Whether the records changed since they were loaded from or saved to the cache
+    """
+    def __init__(self, name, root, expenses, incomes, budget, rules, rates=None, category_rules=None,
+                 accounts=None, goals=None, derived=None):
+        self.name = name
+        self.root = root
+        self.expenses = expenses
+        self.incomes = incomes
+        self.budget = budget
+        self.rules = rules
+        # The aggregates convert amounts with the ledger's own rates, so an inactive
+        # ledger (consolidation, a profile being evicted) never uses another's
+        self.rates = rates or RateTable()
+        self.categorizer = Categorizer(category_rules)
+        self.accounts = accounts if accounts is not None else [Account(DEFAULT_ACCOUNT)]
+        self.goals = goals if goals is not None else []
+        if derived is not None:
+            # Aggregates from the sidecar cache, built from these same files on an earlier run
+            self.auto_categorized = 0
+            self.cube = derived["cube"]
+            self.expense_index = derived["expense_index"]
+            self.income_index = derived["income_index"]
+            self.budget_tree = derived["budget_tree"]
+            self.balances = derived["balances"]
+            self.balances.accounts = self.accounts
+            self.anomalies = derived["anomalies"]
+            for aggregate in (self.cube, self.budget_tree, self.balances, self.anomalies):
+                aggregate.rates = self.rates
+        else:
+            # Imported rows without a category are categorized before anything is aggregated
+            self.auto_categorized = self.categorizer.categorize(expenses)
+            self.cube = CashFlowCube.build(expenses, incomes, self.rates)
+            self.expense_index = SearchIndex.build(expenses, "expense")
+            self.income_index = SearchIndex.build(incomes, "income")
+            self.budget_tree = BudgetTree.build(budget, expenses, self.rates)
+            self.balances = BalanceLedger.build(self.accounts, expenses, incomes, rates=self.rates)
+            self.anomalies = AnomalyDetector.build(expenses, self.rates)
+        self.history = OperationLog(os.path.join(root, "history"), expenses, incomes, budget)
+        self.feed = ChangeFeed(os.path.join(root, CHANGES_FILENAME))
+        self.reports = ReportCache()
+        self.quarantine = {"expenses": [], "incomes": []}
+        self.cache = None
+        self.changed = derived is None
+
+    @classmethod
+    def load(cls, name, root):
+        """
+        Load a ledger and build its aggregates.
+
+        The records and aggregates come from the sidecar cache when none of
+        CACHE_SOURCES changed since it was written; otherwise they are loaded and
+        built from the files.
+
+        Args:
+            name (str): The profile name
+            root (str): The directory holding the profile's files
+
+        Returns:
+            Ledger: The loaded ledger
+        """
+        # A multi-file save cut short by a crash is finished before anything is read
+        recover_commit(os.path.join(root, COMMIT_JOURNAL))
+        cache = DerivedCache(root, CACHE_SOURCES)
+        derived = cache.load()
+        if derived is not None:
+            try:
+                derived = restore_derived(derived)
+            except (KeyError, IndexError, TypeError, ValueError):
+                # Well-formed JSON that does not fit the layout is just a cache miss
+                cache.status = "unreadable"
+                cache.known = cache.fingerprints()
+                derived = None
+        if derived is not None:
+            expenses, incomes, quarantine = derived["expenses"], derived["incomes"], derived["quarantine"]
+        else:
+            quarantine = {"expenses": [], "incomes": []}
+            expenses = load_expenses(os.path.join(root, "expenses.json"), quarantine["expenses"])
+            incomes = load_incomes(os.path.join(root, "incomes.json"), quarantine["incomes"])
+        accounts, goals = load_accounts(os.path.join(root, "accounts.json"))
+        ledger = cls(
+            name,
+            root,
+            expenses,
+            incomes,
+            load_budget(os.path.join(root, "budget.json")),
+            load_recurring(os.path.join(root, "recurring.json")),
+            load_rates(os.path.join(root, "rates.json")),
+            load_category_rules(os.path.join(root, "category_rules.json")),
+            accounts,
+            goals,
+            derived
+        )
+        ledger.quarantine = quarantine
+        ledger.cache = cache
+        return ledger
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback: any change means the sidecar cache must be rewritten.
+        """
+        self.changed = True
+
+    def derived_data(self):
+        """
+        Get the records and aggregates stored in the sidecar cache, as plain data.
+
+        References to records (index entries, anomaly flags) are stored as positions
+        in the expense and income lists, and re-linked by restore_derived.
+
+        Returns:
+            dict: JSON-serializable data, restored with restore_derived on the next load
+        """
+        expense_positions = {id(expense): position for position, expense in enumerate(self.expenses)}
+        income_positions = {id(income): position for position, income in enumerate(self.incomes)}
+        return {
+            "expenses": [expense.to_dict() for expense in self.expenses],
+            "incomes": [income.to_dict() for income in self.incomes],
+            "quarantine": self.quarantine,
+            "cube": self.cube.to_dict(),
+            "expense_index": self.expense_index.to_dict(expense_positions),
+            "income_index": self.income_index.to_dict(income_positions),
+            "budget_tree": self.budget_tree.to_dict(),
+            "balances": self.balances.to_dict(),
+            "anomalies": self.anomalies.to_dict(expense_positions)
+        }
+
+    def save_cache(self):
+        """
+        Write the records and aggregates to the sidecar cache, if they changed.
+
+        Call this only when every change has been saved to the files (the
+        operations save after each change). The entry is keyed by the files as
+        this process last saved them (see DerivedCache.record), so a change made
+        by another writer during the session invalidates it.
+        """
+        if self.cache is None or not self.changed or self.auto_categorized:
+            return
+        self.cache.save(self.derived_data())
+        self.changed = False
+
+    def listeners(self):
+        """
+        Get the callbacks that keep this ledger's aggregates and history current.
+
+        The feed comes last, so its subscribers see the aggregates already updated.
+
+        Returns:
+            list: Callbacks to register with operations.add_listener
+        """
+        return [self.cube.apply, self.expense_index.apply, self.income_index.apply,
+                self.budget_tree.apply, self.balances.apply, self.anomalies.apply, self.history.apply, self.reports.apply, self.apply,
+                self.feed.apply]
+
+    def save_listeners(self):
+        """
+        Get the callbacks to call once this ledger's changes are saved.
+
+        Returns:
+            list: Callbacks to register with storage.add_save_listener
+        """
+        return [self.feed.publish] + ([self.cache.record] if self.cache else [])
+
+    def estimate_size(self):
+        """
+        Estimate the memory used by the ledger in bytes.
+
+        This is an approximation: each record is measured once (object, attribute
+        dict and field values), and the derived structures are assumed to cost
+        about as much again as the records they index.
+
+        Returns:
+            int: Estimated size in bytes
+        """
+        size = 0
+        for record in self.expenses + self.incomes:
+            size += sys.getsizeof(record) + sys.getsizeof(record.__dict__)
+            size += sum(sys.getsizeof(value) for value in record.__dict__.values())
+        return size * 2
+
+def restore_derived(data):
+    """
+    Rebuild the records and aggregates from sidecar cache data (see Ledger.derived_data).
+
+    Args:
+        data (dict): The cached data
+
+    Returns:
+        dict: The data passed to Ledger(derived=...): the record lists and the
+              aggregates, linked to those records. The balances have no accounts yet.
+    """
+    expenses = [Expense.from_dict(expense) for expense in data["expenses"]]
+    incomes = [Income.from_dict(income) for income in data["incomes"]]
+    return {
+        "expenses": expenses,
+        "incomes": incomes,
+        "quarantine": data["quarantine"],
+        "cube": CashFlowCube.from_dict(data["cube"]),
+        "expense_index": SearchIndex.from_dict(data["expense_index"], expenses),
+        "income_index": SearchIndex.from_dict(data["income_index"], incomes),
+        "budget_tree": BudgetTree.from_dict(data["budget_tree"], expenses),
+        "balances": BalanceLedger.from_dict(data["balances"], None),
+        "anomalies": AnomalyDetector.from_dict(data["anomalies"], expenses)
+    }
+
+class ProfileManager:
+    """
+    LRU cache of loaded ledgers under a memory budget.
+
+    Attributes:
+        base_dir (str): Directory that holds one subdirectory per profile
+        memory_budget (int): Maximum estimated bytes of cached ledgers
+        max_idle (float): Seconds a profile may go unused before eviction, or None
+    """
+    def __init__(self, base_dir="profiles", memory_budget=256 * 1024 * 1024, max_idle=None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.memory_budget = memory_budget
+        self.max_idle = max_idle
+        self._cache = OrderedDict()  # Format: {name: Ledger}, least recently used first
+        self._sizes = {}
+        self._last_used = {}
+        self._stats = {}
+
+    def profile_root(self, name):
+        """
+        Get the storage root for a profile.
+
+        Args:
+            name (str): The profile name
+
+        Returns:
+            str: Absolute path of the profile's directory
+
+        Raises:
+            ValueError: If the name contains anything other than letters, digits, - or _
+        """
+        if not PROFILE_NAME_PATTERN.match(name):
+            raise ValueError("Profile name may only contain letters, numbers, - and _")
+        if name == DEFAULT_PROFILE:
+            return os.path.abspath("")
+        return os.path.join(self.base_dir, name)
+
+    def list_profiles(self):
+        """
+        List the default profile and every profile directory under base_dir.
+
+        Returns:
+            list: Sorted profile names
+        """
+        names = {DEFAULT_PROFILE}
+        if os.path.isdir(self.base_dir):
+            names.update(entry for entry in os.listdir(self.base_dir)
+                         if os.path.isdir(os.path.join(self.base_dir, entry)) and PROFILE_NAME_PATTERN.match(entry))
+        return sorted(names)
+
+    def _stat(self, name):
+        return self._stats.setdefault(name, {"loads": 0, "hits": 0, "evictions": 0, "load_seconds": 0.0})
+
+    def get(self, name):
+        """
+        Get a profile's ledger, loading it on a cache miss.
+
+        Args:
+            name (str): The profile name
+
+        Returns:
+            Ledger: The loaded ledger
+        """
+        stat = self._stat(name)
+        ledger = self._cache.get(name)
+        if ledger is not None:
+            stat["hits"] += 1
+            self._cache.move_to_end(name)
+        else:
+            root = self.profile_root(name)
+            start = time.perf_counter()
+            ledger = Ledger.load(name, root)
+            stat["loads"] += 1
+            stat["load_seconds"] += time.perf_counter() - start
+            self._cache[name] = ledger
+            self._sizes[name] = ledger.estimate_size()
+
+        self._last_used[name] = time.monotonic()
+        self._evict_over_budget(keep=name)
+        return ledger
+
+    def refresh_size(self, name):
+        """
+        Re-estimate a cached profile's memory after its ledger has changed.
+
+        Args:
+            name (str): The profile name
+        """
+        ledger = self._cache.get(name)
+        if ledger is not None:
+            self._sizes[name] = ledger.estimate_size()
+
+    def evict(self, name):
+        """
+        Drop a profile's ledger from the cache, writing its sidecar cache first.
+
+        Args:
+            name (str): The profile name
+
+        Returns:
+            bool: True if the profile was cached
+        """
+        ledger = self._cache.pop(name, None)
+        if ledger is None:
+            return False
+        ledger.feed.publish()  # Events still waiting for a save would otherwise be lost
+        ledger.save_cache()
+        self._sizes.pop(name, None)
+        self._last_used.pop(name, None)
+        self._stat(name)["evictions"] += 1
+        return True
+
+    def evict_idle(self, keep=None):
+        """
+        Evict every profile that has been idle longer than max_idle.
+
+        Args:
+            keep (str): A profile that must stay loaded (e.g. the active one)
+
+        Returns:
+            list: Names of the evicted profiles
+        """
+        if self.max_idle is None:
+            return []
+        cutoff = time.monotonic() - self.max_idle
+        idle = [name for name in self._cache if name != keep and self._last_used[name] < cutoff]
+        for name in idle:
+            self.evict(name)
+        return idle
+
+    def _evict_over_budget(self, keep):
+        self.evict_idle(keep)
+        for name in list(self._cache):
+            if self.cached_bytes() <= self.memory_budget:
+                break
+            if name != keep:
+                self.evict(name)
+
+    def close(self):
+        """
+        Publish pending change feed events and write the sidecar cache of every
+        loaded ledger. Call before exiting.
+        """
+        for ledger in self._cache.values():
+            ledger.feed.publish()
+            ledger.save_cache()
+
+    def cached_bytes(self):
+        """
+        Get the estimated memory of all cached ledgers in bytes.
+        """
+        return sum(self._sizes.values())
+
+    def stats(self):
+        """
+        Get per-profile cache statistics.
+
+        Returns:
+            dict: Format: {name: {"loads", "hits", "evictions", "load_seconds", "cached", "bytes", "disk_cache"}}
+                  where disk_cache is the sidecar cache status of the last load (see DerivedCache.status)
+        """
+        report = {}
+        for name, stat in self._stats.items():
+            ledger = self._cache.get(name)
+            disk_cache = ledger.cache.status if ledger is not None and ledger.cache else None
+            report[name] = dict(stat, cached=name in self._cache, bytes=self._sizes.get(name, 0), disk_cache=disk_cache)
+        return report
+
+def view_profile_stats(manager, active=None):
+    """
+    Display the known profiles and their cache statistics.
+
+    Args:
+        manager (ProfileManager): The profile manager
+        active (str): Name of the active profile, marked with *
+    """
+    stats = manager.stats()
+    print("\n--- Profiles ---")
+    print("Profile           | Cached | Loads | Hits  | Evictions | Size (KB)  | Disk cache")
+    print("-" * 85)
+    for name in sorted(set(manager.list_profiles()) | set(stats)):
+        stat = stats.get(name, {"loads": 0, "hits": 0, "evictions": 0, "cached": False, "bytes": 0, "disk_cache": None})
+        label = f"{name} *" if name == active else name
+        cached = "yes" if stat["cached"] else "no"
+        print(f"{label:<17} | {cached:<6} | {stat['loads']:<5} | {stat['hits']:<5} | {stat['evictions']:<9} | "
+              f"{stat['bytes'] / 1024:<10.1f} | {stat['disk_cache'] or '-'}")
+    print("-" * 85)
+    print(f"Cache usage: {manager.cached_bytes() / 1024:.1f} KB of {manager.memory_budget / 1024:.1f} KB")
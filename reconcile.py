@@ -0,0 +1,159 @@
+from datetime import date
+from search import tokenize
+from operations import delete_records
+from storage import save_expenses, save_incomes
+from currency import format_amount
+
+"""
+Dezy's Budget Tracker - Reconcile Module
+
+This module finds duplicated entries left behind by repeated imports or
+double manual entry, and removes them in one batch.
+
+- Exact duplicates: records are normalized to a (date, currency, cents, category, words)
+  tuple and grouped by hash, one pass over the ledger.
+- Near duplicates: records are blocked by currency and amount (in cents), so only
+  records with the same amount are compared, and a pair matches when the dates are within
+  a few days and the descriptions share enough words.
+"""
+
+def normalize(record):
+    """
+    Get the normalized key used to detect exact duplicates.
+
+    Case, spacing and punctuation in the category and description are ignored,
+    and the amount is compared in whole cents of the record's own currency.
+
+    Example:
+        >>> normalize(Expense("2025-03-01", 12.5, "Food ", "Lunch, cafe"))
+        ('2025-03-01', None, 1250, 'food', 'lunch cafe')
+    """
+    return (
+        record.date,
+        record.currency,
+        round(float(record.amount) * 100),
+        record.category.strip().lower(),
+        " ".join(tokenize(record.description))
+    )
+
+def find_exact_duplicates(records):
+    """
+    Group records that are identical after normalization.
+
+    Args:
+        records (list): List of Expense or Income objects
+
+    Returns:
+        list: Groups of list indices (first occurrence first), one per duplicated record
+    """
+    groups = {}
+    for index, record in enumerate(records):
+        groups.setdefault(normalize(record), []).append(index)
+    return [indices for indices in groups.values() if len(indices) > 1]
+
+def description_similarity(first, second):
+    """
+    Get the share of words two descriptions have in common (Jaccard index).
+
+    Returns:
+        float: 1.0 for the same words, 0.0 for no words in common
+    """
+    first_words = set(tokenize(first))
+    second_words = set(tokenize(second))
+    if not first_words and not second_words:
+        return 1.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+def find_near_duplicates(records, max_days=3, min_similarity=0.5):
+    """
+    Find pairs of records with the same amount, close dates and similar descriptions.
+
+    Records are blocked by currency and amount so only records with the same amount are
+    compared. Inside a block they are sorted by date and compared only while the
+    dates are within max_days. Exact duplicates are not repeated here.
+
+    Args:
+        records (list): List of Expense or Income objects
+        max_days (int): Largest date difference for a match
+        min_similarity (float): Smallest description similarity for a match (0-1)
+
+    Returns:
+        list: (first index, second index, similarity) tuples, first index earlier in the list
+    """
+    blocks = {}
+    for index, record in enumerate(records):
+        blocks.setdefault((record.currency, round(float(record.amount) * 100)), []).append(index)
+
+    pairs = []
+    for indices in blocks.values():
+        if len(indices) < 2:
+            continue
+        dated = sorted((date.fromisoformat(records[index].date).toordinal(), index) for index in indices)
+        for position, (day, index) in enumerate(dated):
+            for other_day, other in dated[position + 1:]:
+                if other_day - day > max_days:
+                    break
+                if normalize(records[index]) == normalize(records[other]):
+                    continue
+                similarity = description_similarity(records[index].description, records[other].description)
+                if similarity >= min_similarity:
+                    pairs.append((min(index, other), max(index, other), similarity))
+    pairs.sort()
+    return pairs
+
+def handle_reconcile(records, kind):
+    """
+    Handle finding and removing duplicates interactively.
+
+    This function:
+    1. Lists exact duplicates and offers to delete every extra copy
+    2. Lists near duplicates and lets the user pick which pairs to merge
+       (the later entry of each pair is deleted)
+    3. Deletes all chosen records in one batch and saves once
+
+    Args:
+        records (list): List of Expense or Income objects
+        kind (str): "expense" or "income"
+    """
+    print(f"\n--- Find Duplicate {kind.capitalize()}s ---")
+    to_delete = set()
+
+    exact = find_exact_duplicates(records)
+    if exact:
+        print(f"\nExact duplicates ({len(exact)} group(s)):")
+        for indices in exact:
+            record = records[indices[0]]
+            print(f"{record.date} | {record.category:<10}  | {record.description:<25}  | {format_amount(record.amount, record.currency)}  x{len(indices)} (indices {', '.join(map(str, indices))})")
+        if input("Delete the extra copies, keeping the first of each? (y/n): ").lower() == 'y':
+            for indices in exact:
+                to_delete.update(indices[1:])
+    else:
+        print("No exact duplicates found.")
+
+    near = [pair for pair in find_near_duplicates(records) if pair[0] not in to_delete and pair[1] not in to_delete]
+    if near:
+        print(f"\nPossible duplicates ({len(near)} pair(s)):")
+        for number, (first, second, similarity) in enumerate(near, 1):
+            a, b = records[first], records[second]
+            print(f"{number}. [{first}] {a.date} {a.description}  <->  [{second}] {b.date} {b.description}  {format_amount(a.amount, a.currency)} ({similarity:.0%} similar)")
+        choice = input("Enter pair numbers to merge (e.g., 1,3), 'all', or leave empty to skip: ").strip().lower()
+        if choice == "all":
+            chosen = range(1, len(near) + 1)
+        else:
+            chosen = [int(part) for part in choice.replace(",", " ").split() if part.isdigit()]
+        for number in chosen:
+            if 1 <= number <= len(near):
+                to_delete.add(near[number - 1][1])
+    else:
+        print("No possible duplicates found.")
+
+    if not to_delete:
+        print("Nothing deleted.")
+        return
+
+    delete_records(records, to_delete, kind)
+    if kind == "expense":
+        save_expenses(records)
+    else:
+        save_incomes(records)
+    print(f"Deleted {len(to_delete)} duplicate {kind}(s).")
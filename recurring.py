@@ -0,0 +1,167 @@
+import calendar
+from datetime import date, timedelta
+from expense import Expense
+from income import Income
+
+"""
+Dezy's Budget Tracker - Recurring Module
+
+This module contains recurring transaction rules (salary, rent, subscriptions)
+and the scheduling logic that works out which occurrences are due.
+
+Due dates are computed arithmetically from the rule's start date, so catching up
+over many missed periods costs one step per occurrence and never walks the
+calendar day by day.
+"""
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+class RecurringRule:
+    """
+    Represents a transaction that repeats on a fixed schedule.
+
+    Attributes:
+        kind (str): "expense" or "income"
+        amount (float): The amount of each occurrence
+        category (str): The category of each occurrence
+        description (str): The description of each occurrence
+        frequency (str): "daily", "weekly" or "monthly"
+        interval (int): Repeat every N days, weeks or months
+        start_date (str): First possible occurrence in YYYY-MM-DD format
+        day (int): Day of the month for monthly rules (clamped to the month length)
+        last_date (str): Date of the last materialized occurrence, or None
+        currency (str): The currency code of the amount, or None for the base currency
+        account (str): The account of each occurrence, or None for the default account
+    """
+    def __init__(self, kind, amount, category, description, frequency, start_date, interval=1, day=None, last_date=None, currency=None, account=None):
+        if kind not in ("expense", "income"):
+            raise ValueError("Kind must be 'expense' or 'income'")
+        if frequency not in FREQUENCIES:
+            raise ValueError("Frequency must be daily, weekly or monthly")
+        if int(interval) <= 0:
+            raise ValueError("Interval must be greater than 0")
+
+        self.kind = kind
+        self.amount = float(amount)
+        self.category = category
+        self.description = description
+        self.frequency = frequency
+        self.start_date = start_date
+        self.interval = int(interval)
+        self.day = int(day) if day else date.fromisoformat(start_date).day
+        self.last_date = last_date
+        self.currency = currency
+        self.account = account
+
+    def due_dates(self, until):
+        """
+        Yield every occurrence after last_date up to and including a date.
+
+        Args:
+            until (date): The last date to generate occurrences for
+
+        Yields:
+            date: Each due occurrence, oldest first
+        """
+        start = date.fromisoformat(self.start_date)
+        last = date.fromisoformat(self.last_date) if self.last_date else None
+
+        if self.frequency == "monthly":
+            yield from self._monthly_dates(start, last, until)
+            return
+
+        step = self.interval * (7 if self.frequency == "weekly" else 1)
+        current = start
+        if last and last >= start:
+            # Jump straight past the last materialized occurrence
+            current = start + timedelta(days=((last - start).days // step + 1) * step)
+        while current <= until:
+            yield current
+            current += timedelta(days=step)
+
+    def _monthly_dates(self, start, last, until):
+        month_index = start.year * 12 + start.month - 1
+        if last and last >= start:
+            last_index = last.year * 12 + last.month - 1
+            month_index += ((last_index - month_index) // self.interval + 1) * self.interval
+
+        while True:
+            year, month = divmod(month_index, 12)
+            month += 1
+            day = min(self.day, calendar.monthrange(year, month)[1])
+            current = date(year, month, day)
+            if current > until:
+                return
+            if current >= start:
+                yield current
+            month_index += self.interval
+
+    def create_record(self, occurrence):
+        """
+        Create the Expense or Income object for one occurrence.
+
+        Args:
+            occurrence (date): The date of the occurrence
+
+        Returns:
+            Expense or Income: The new record
+        """
+        record_class = Expense if self.kind == "expense" else Income
+        return record_class(occurrence.isoformat(), self.amount, self.category, self.description, self.currency, self.account)
+
+    def to_dict(self):
+        """
+        Convert the rule to a dictionary for storage.
+        """
+        return {
+            "kind": self.kind,
+            "amount": self.amount,
+            "category": self.category,
+            "description": self.description,
+            "frequency": self.frequency,
+            "interval": self.interval,
+            "start_date": self.start_date,
+            "day": self.day,
+            "last_date": self.last_date,
+            "currency": self.currency,
+            "account": self.account
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a RecurringRule object from dictionary data.
+        """
+        return cls(
+            kind=data["kind"],
+            amount=data["amount"],
+            category=data["category"],
+            description=data["description"],
+            frequency=data["frequency"],
+            start_date=data["start_date"],
+            interval=data.get("interval", 1),
+            day=data.get("day"),
+            last_date=data.get("last_date"),
+            currency=data.get("currency"),
+            account=data.get("account")
+        )
+
+def collect_due(rules, until):
+    """
+    Materialize every due occurrence of every rule, advancing last_date.
+
+    Args:
+        rules (list): List of RecurringRule objects
+        until (date): The last date to generate occurrences for
+
+    Returns:
+        tuple: (list of new Expense objects, list of new Income objects)
+    """
+    new_expenses = []
+    new_incomes = []
+    for rule in rules:
+        target = new_expenses if rule.kind == "expense" else new_incomes
+        for occurrence in rule.due_dates(until):
+            target.append(rule.create_record(occurrence))
+            rule.last_date = occurrence.isoformat()
+    return new_expenses, new_incomes
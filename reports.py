@@ -0,0 +1,307 @@
+import json
+import sys
+from html import escape
+from budget import split_category
+from currency import format_amount, base_currency
+
+"""
+Dezy's Budget Tracker - Reports Module
+
+This module separates what a report contains from how it is shown.
+
+A report is built once as a data model (Report: a title plus blocks of fields,
+tables and notes) and rendered to text, JSON or HTML. Text tables size their
+columns from the content, so long category names no longer break the layout.
+Each rendering is produced as one string and written in a single call.
+
+ReportCache keeps rendered reports keyed by the ledger version. The version is
+bumped by the operations listener hooks, so re-opening a report when nothing
+has changed returns the cached string without rebuilding or re-rendering it.
+"""
+
+# Column and field kinds
+TEXT = "text"
+NUMBER = "number"
+AMOUNT = "amount"
+PERCENT = "percent"
+CATEGORY = "category"  # A category path, shown indented under its parent
+
+FORMATS = ("text", "json", "html")
+
+class Report:
+    """
+    A report as data: a title plus an ordered list of blocks.
+
+    Block types:
+    - fields: (label, value, kind) lines, e.g. "Total expenses: $120.00"
+    - table: columns of (name, kind), rows of values, and optional footer fields
+    - notes: free text lines, e.g. warnings
+
+    Amount values are in the base currency, or (amount, currency) pairs for
+    amounts shown in their own currency.
+
+    Attributes:
+        title (str): The report title
+        blocks (list): The blocks, in display order
+    """
+    def __init__(self, title):
+        self.title = title
+        self.blocks = []
+
+    def add_fields(self, fields, title=None):
+        """
+        Add labelled values.
+
+        Args:
+            fields (list): (label, value, kind) tuples
+            title (str): Optional block heading
+        """
+        self.blocks.append({"type": "fields", "title": title, "fields": list(fields)})
+
+    def add_table(self, columns, rows, title=None, footer=None):
+        """
+        Add a table.
+
+        Args:
+            columns (list): (name, kind) tuples
+            rows (list): Lists of values, one per column
+            title (str): Optional block heading
+            footer (list): Optional (label, value, kind) tuples shown under the table
+        """
+        self.blocks.append({"type": "table", "title": title, "columns": list(columns),
+                            "rows": [list(row) for row in rows], "footer": list(footer or [])})
+
+    def add_notes(self, notes, title=None):
+        """
+        Add free text lines.
+
+        Args:
+            notes (list): The lines
+            title (str): Optional block heading
+        """
+        self.blocks.append({"type": "notes", "title": title, "notes": list(notes)})
+
+    def to_dict(self):
+        """
+        Convert the report to plain data for JSON output.
+        """
+        blocks = []
+        for block in self.blocks:
+            data = {"type": block["type"], "title": block["title"]}
+            if block["type"] == "fields":
+                data["fields"] = _json_fields(block["fields"])
+            elif block["type"] == "table":
+                data["rows"] = [_json_row(block["columns"], row) for row in block["rows"]]
+                data["footer"] = _json_fields(block["footer"])
+            else:
+                data["notes"] = block["notes"]
+            blocks.append(data)
+        return {"title": self.title, "currency": base_currency(), "blocks": blocks}
+
+def _json_value(value, kind):
+    if kind == AMOUNT and isinstance(value, tuple):
+        return value[0]
+    if kind in (AMOUNT, PERCENT) and value is not None:
+        return round(value, 2)
+    return value
+
+def _json_fields(fields):
+    return {label: _json_value(value, kind) for label, value, kind in fields}
+
+def _json_row(columns, row):
+    data = {}
+    for (name, kind), value in zip(columns, row):
+        data[name] = _json_value(value, kind)
+        if kind == AMOUNT and isinstance(value, tuple):
+            data["currency"] = value[1] or base_currency()
+    return data
+
+## Rendering ------------------------------------------------------------------------------------------------------------------------
+def format_value(value, kind):
+    """
+    Format one value for text or HTML output.
+
+    Example:
+        >>> format_value(12.5, AMOUNT)
+        '$12.50'
+        >>> format_value("food > groceries", CATEGORY)
+        '  groceries'
+    """
+    if value is None:
+        return ""
+    if kind == AMOUNT:
+        return format_amount(*value) if isinstance(value, tuple) else format_amount(value)
+    if kind == PERCENT:
+        return f"{value:.1f}%"
+    if kind == CATEGORY:
+        path = split_category(value)
+        return "  " * (len(path) - 1) + (path[-1] if path else "")
+    return str(value)
+
+def _right_aligned(kind):
+    return kind in (NUMBER, AMOUNT, PERCENT)
+
+def render_text(report):
+    """
+    Render a report as plain text with columns sized to their content.
+
+    Returns:
+        str: The rendered report
+    """
+    lines = [f"\n--- {report.title} ---"]
+    for block in report.blocks:
+        if block["title"]:
+            lines.append(f"\n{block['title']}:")
+        if block["type"] == "fields":
+            lines.extend(f"{label}: {format_value(value, kind)}" for label, value, kind in block["fields"])
+        elif block["type"] == "notes":
+            lines.extend(block["notes"])
+        else:
+            columns = block["columns"]
+            cells = [[format_value(value, kind) for value, (name, kind) in zip(row, columns)] for row in block["rows"]]
+            widths = [max([len(name)] + [len(row[i]) for row in cells]) for i, (name, kind) in enumerate(columns)]
+
+            def line(values):
+                return " | ".join(
+                    value.rjust(width) if _right_aligned(kind) else value.ljust(width)
+                    for value, width, (name, kind) in zip(values, widths, columns)
+                ).rstrip()
+
+            rule = "-" * (sum(widths) + 3 * (len(widths) - 1))
+            lines.append(line([name for name, kind in columns]))
+            lines.append(rule)
+            lines.extend(line(row) for row in cells)
+            if block["footer"]:
+                lines.append(rule)
+                lines.extend(f"{label}: {format_value(value, kind)}" for label, value, kind in block["footer"])
+    return "\n".join(lines) + "\n"
+
+def render_json(report):
+    """
+    Render a report as JSON (raw numbers, no currency symbols).
+
+    Returns:
+        str: The rendered report
+    """
+    return json.dumps(report.to_dict(), indent=4) + "\n"
+
+def _html_fields(fields):
+    items = "".join(f"<dt>{escape(label)}</dt><dd>{escape(format_value(value, kind))}</dd>" for label, value, kind in fields)
+    return f"<dl>{items}</dl>"
+
+def _html_cell(value, kind, tag="td"):
+    if kind == CATEGORY and value:
+        path = split_category(value)
+        return f'<{tag} style="padding-left: {len(path) - 1}em">{escape(path[-1])}</{tag}>'
+    css = ' class="number"' if _right_aligned(kind) else ""
+    return f"<{tag}{css}>{escape(format_value(value, kind))}</{tag}>"
+
+def render_html(report):
+    """
+    Render a report as a standalone HTML page.
+
+    Returns:
+        str: The rendered report
+    """
+    parts = [
+        "<!DOCTYPE html>",
+        f'<html><head><meta charset="utf-8"><title>{escape(report.title)}</title>',
+        "<style>table { border-collapse: collapse } th, td { padding: 2px 8px } .number { text-align: right }</style>",
+        f"</head><body><h1>{escape(report.title)}</h1>"
+    ]
+    for block in report.blocks:
+        if block["title"]:
+            parts.append(f"<h2>{escape(block['title'])}</h2>")
+        if block["type"] == "fields":
+            parts.append(_html_fields(block["fields"]))
+        elif block["type"] == "notes":
+            parts.append("<ul>" + "".join(f"<li>{escape(note)}</li>" for note in block["notes"]) + "</ul>")
+        else:
+            columns = block["columns"]
+            header = "".join(f"<th>{escape(name)}</th>" for name, kind in columns)
+            rows = "".join(
+                "<tr>" + "".join(_html_cell(value, kind) for value, (name, kind) in zip(row, columns)) + "</tr>"
+                for row in block["rows"]
+            )
+            parts.append(f"<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>")
+            if block["footer"]:
+                parts.append(_html_fields(block["footer"]))
+    parts.append("</body></html>")
+    return "\n".join(parts) + "\n"
+
+RENDERERS = {
+    "text": render_text,
+    "json": render_json,
+    "html": render_html
+}
+
+def render(report, file_format="text"):
+    """
+    Render a report in one of FORMATS.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if file_format not in RENDERERS:
+        raise ValueError("Format must be 'text', 'json' or 'html'")
+    return RENDERERS[file_format](report)
+
+## Cache ----------------------------------------------------------------------------------------------------------------------------
+class ReportCache:
+    """
+    Rendered reports keyed by name, format and ledger version.
+
+    Register apply() with operations.add_listener so every change to the
+    ledger bumps the version; cached renderings from an older version are
+    rebuilt on their next use.
+
+    Attributes:
+        version (int): Number of changes seen
+        hits (int): Renderings served from the cache
+        misses (int): Renderings built
+    """
+    def __init__(self):
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._rendered = {}  # Format: {(name, format): (version, rendered string)}
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback: any change makes the cached reports stale.
+        """
+        self.version += 1
+
+    def render(self, name, file_format, build):
+        """
+        Get a rendered report, building it only if the ledger changed.
+
+        Args:
+            name (str): Report name, unique per builder
+            file_format (str): One of FORMATS
+            build (function): Called with no arguments to build the Report
+
+        Returns:
+            str: The rendered report
+        """
+        key = (name, file_format)
+        cached = self._rendered.get(key)
+        if cached and cached[0] == self.version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        rendered = render(build(), file_format)
+        self._rendered[key] = (self.version, rendered)
+        return rendered
+
+def show_report(name, build, cache=None):
+    """
+    Write a report to the terminal as text in a single write.
+
+    Args:
+        name (str): Report name used as the cache key
+        build (function): Called with no arguments to build the Report
+        cache (ReportCache): Cache to use, or None to always rebuild
+    """
+    text = cache.render(name, "text", build) if cache else render(build(), "text")
+    sys.stdout.write(text)
@@ -0,0 +1,291 @@
+from datetime import date, datetime
+from currency import format_amount, currency_symbol, record_amount
+
+"""
+Dezy's Budget Tracker - Rollups Module
+
+This module maintains a precomputed cash-flow cube over
+(period x category x income/expense) at day, week and month granularity.
+
+The cube is built in a single pass over the ledger and then kept current
+incrementally through the operations listener hooks, so trend reports,
+month-over-month deltas and budget burn-down never re-scan the raw
+Expense and Income lists.
+
+All cells hold amounts converted to the base currency (see currency.py).
+"""
+
+GRANULARITIES = ("day", "week", "month")
+KINDS = ("expense", "income")
+
+# Key used inside each period for the all-categories total
+ALL_CATEGORIES = None
+
+class CashFlowCube:
+    """
+    Aggregated cash flow by period, category and kind.
+
+    Attributes:
+        cells (dict): Format: {granularity: {period: {kind: {category: [total, count]}}}}
+                      The ALL_CATEGORIES key holds the total for every category.
+        rates (RateTable): The ledger's rate table, or None for the active one
+    """
+    def __init__(self, rates=None):
+        self.rates = rates
+        self.cells = {granularity: {} for granularity in GRANULARITIES}
+        self._week_keys = {}  # Memoized date string -> ISO week key
+
+    @classmethod
+    def build(cls, expenses, incomes, rates=None):
+        """
+        Build a cube from the full ledger in a single pass.
+
+        Args:
+            expenses (list): List of Expense objects
+            incomes (list): List of Income objects
+            rates (RateTable): The ledger's rate table, or None for the active one
+
+        Returns:
+            CashFlowCube: The populated cube
+        """
+        cube = cls(rates)
+        for expense in expenses:
+            cube.add(expense, "expense")
+        for income in incomes:
+            cube.add(income, "income")
+        return cube
+
+    def to_dict(self):
+        """
+        Convert the cube to plain data for the sidecar cache.
+
+        Returns:
+            dict: Format: {granularity: {period: {kind: [[category, total, count]]}}}, where the
+                  ALL_CATEGORIES cell has the category None
+        """
+        return {granularity: {period: {kind: [[category, cell[0], cell[1]] for category, cell in by_category.items()]
+                                       for kind, by_category in by_kind.items()}
+                              for period, by_kind in periods.items()}
+                for granularity, periods in self.cells.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a cube from data returned by to_dict.
+        """
+        cube = cls()
+        for granularity, periods in data.items():
+            cube.cells[granularity] = {period: {kind: {category: [total, count] for category, total, count in cells}
+                                                for kind, cells in by_kind.items()}
+                                       for period, by_kind in periods.items()}
+        return cube
+
+    def period_keys(self, date_str):
+        """
+        Get the day, week and month period keys for a date.
+
+        Args:
+            date_str (str): Date in YYYY-MM-DD format
+
+        Returns:
+            tuple: (day, week, month) keys, e.g. ("2025-03-20", "2025-W12", "2025-03")
+        """
+        week = self._week_keys.get(date_str)
+        if week is None:
+            year, week_number, _ = date.fromisoformat(date_str).isocalendar()
+            week = f"{year}-W{week_number:02d}"
+            self._week_keys[date_str] = week
+        return date_str, week, date_str[:7]
+
+    def add(self, record, kind, sign=1):
+        """
+        Add a record's amount to every cell it belongs to.
+
+        Args:
+            record (Expense or Income): The record to add
+            kind (str): "expense" or "income"
+            sign (int): 1 to add the record, -1 to remove it
+        """
+        amount = record_amount(record, self.rates) * sign
+        for granularity, period in zip(GRANULARITIES, self.period_keys(record.date)):
+            by_kind = self.cells[granularity].setdefault(period, {})
+            by_category = by_kind.setdefault(kind, {})
+            for category in (record.category, ALL_CATEGORIES):
+                cell = by_category.setdefault(category, [0.0, 0])
+                cell[0] += amount
+                cell[1] += sign
+                if cell[1] <= 0:
+                    del by_category[category]
+            if not by_category:
+                del by_kind[kind]
+            if not by_kind:
+                del self.cells[granularity][period]
+
+    def remove(self, record, kind):
+        """
+        Remove a record's amount from every cell it belongs to.
+
+        Args:
+            record (Expense or Income): The record to remove
+            kind (str): "expense" or "income"
+        """
+        self.add(record, kind, sign=-1)
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that keeps the cube in sync with the ledger.
+
+        Args:
+            action (str): "add" or "delete"
+            kind (str): "expense" or "income"
+            record (Expense or Income): The changed record
+            index (int): Position of the record in its list (unused)
+        """
+        if kind not in KINDS:
+            return
+        if action == "add":
+            self.add(record, kind)
+        elif action == "delete":
+            self.remove(record, kind)
+
+    def total(self, granularity, period, kind, category=ALL_CATEGORIES):
+        """
+        Get the total for one cell of the cube.
+
+        Args:
+            granularity (str): "day", "week" or "month"
+            period (str): The period key
+            kind (str): "expense" or "income"
+            category (str): A category, or ALL_CATEGORIES for the period total
+
+        Returns:
+            float: The total amount, or 0 if the cell is empty
+        """
+        cell = self.cells[granularity].get(period, {}).get(kind, {}).get(category)
+        return cell[0] if cell else 0.0
+
+    def category_totals(self, granularity, period, kind):
+        """
+        Get the per-category totals for one period.
+
+        Returns:
+            dict: Format: {category: total}
+        """
+        by_category = self.cells[granularity].get(period, {}).get(kind, {})
+        return {category: cell[0] for category, cell in by_category.items() if category is not ALL_CATEGORIES}
+
+    def periods(self, granularity):
+        """
+        Get the sorted list of periods that have any data.
+
+        Args:
+            granularity (str): "day", "week" or "month"
+
+        Returns:
+            list: Sorted period keys
+        """
+        return sorted(self.cells[granularity])
+
+    def series(self, granularity, kind, category=ALL_CATEGORIES):
+        """
+        Get a time series of totals, oldest period first.
+
+        Args:
+            granularity (str): "day", "week" or "month"
+            kind (str): "expense" or "income"
+            category (str): A category, or ALL_CATEGORIES for the overall series
+
+        Returns:
+            list: List of (period, total) tuples
+        """
+        return [(period, self.total(granularity, period, kind, category)) for period in self.periods(granularity)]
+
+## Reports -----------------------------------------------------------------------------------------------------------------------------
+def view_trend(cube, granularity="month", limit=12):
+    """
+    Display income, expenses and net cash flow for the most recent periods.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        granularity (str): "day", "week" or "month"
+        limit (int): Maximum number of periods to show
+    """
+    periods = cube.periods(granularity)[-limit:]
+    if not periods:
+        print("No financial data to analyze.")
+        return
+
+    print(f"\n--- Cash Flow Trend (by {granularity}) ---")
+    print("Period      | Income       | Expenses     | Net")
+    print("-" * 55)
+    for period in periods:
+        income = cube.total(granularity, period, "income")
+        spent = cube.total(granularity, period, "expense")
+        print(f"{period:<11} | {format_amount(income):>11} | {format_amount(spent):>11} | {format_amount(income - spent):>11}")
+
+def view_month_over_month(cube, month=None):
+    """
+    Display per-category expense changes between a month and the previous month.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        month (str): Month in YYYY-MM format, defaults to the current month
+    """
+    if not month:
+        month = datetime.now().strftime("%Y-%m")
+    year, month_number = int(month[:4]), int(month[5:7])
+    previous = f"{year - 1}-12" if month_number == 1 else f"{year}-{month_number - 1:02d}"
+
+    current_totals = cube.category_totals("month", month, "expense")
+    previous_totals = cube.category_totals("month", previous, "expense")
+    if not current_totals and not previous_totals:
+        print(f"No expenses recorded in {previous} or {month}.")
+        return
+
+    print(f"\n--- Month over Month Expenses ({previous} -> {month}) ---")
+    print("Category          | Previous     | Current      | Change")
+    print("-" * 60)
+    for category in sorted(set(current_totals) | set(previous_totals)):
+        before = previous_totals.get(category, 0.0)
+        after = current_totals.get(category, 0.0)
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "new"
+        print(f"{category:<17} | {format_amount(before):>11} | {format_amount(after):>11} | {change}")
+
+    before = cube.total("month", previous, "expense")
+    after = cube.total("month", month, "expense")
+    print("-" * 60)
+    print(f"{'Total':<17} | {format_amount(before):>11} | {format_amount(after):>11} | {currency_symbol()}{after - before:+.2f}")
+
+def view_burn_down(cube, budget, month=None):
+    """
+    Display how the monthly budget is being used up day by day.
+
+    Args:
+        cube (CashFlowCube): The cash-flow cube
+        budget (Budget): The Budget object
+        month (str): Month in YYYY-MM format, defaults to the current month
+    """
+    if not budget:
+        print("No budget has been set.")
+        return
+    if not month:
+        month = datetime.now().strftime("%Y-%m")
+
+    days = [period for period in cube.periods("day") if period.startswith(month)]
+    if not days:
+        print(f"No expenses recorded in {month}.")
+        return
+
+    print(f"\n--- Budget Burn-down ({month}) ---")
+    print("Date       | Spent        | Remaining")
+    print("-" * 40)
+    remaining = budget.amount
+    for day in days:
+        spent = cube.total("day", day, "expense")
+        if not spent:
+            continue
+        remaining -= spent
+        print(f"{day} | {format_amount(spent):>11} | {format_amount(remaining):>11}")
+
+    if remaining < 0:
+        print(f"Budget exceeded by {format_amount(abs(remaining))}")
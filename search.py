@@ -0,0 +1,218 @@
+import re
+from bisect import bisect_left, insort
+from currency import format_amount, record_amount
+
+"""
+Dezy's Budget Tracker - Search Module
+
+This module provides an in-process inverted index over transaction descriptions.
+
+Each token maps to a posting list (set) of record IDs. A sorted vocabulary is kept
+alongside so prefix queries ("air" -> "airport", "airline") are a binary search plus
+a short range walk. Multi-term queries ("uber airport") intersect the posting lists,
+starting from the smallest, so queries stay fast on very large ledgers.
+
+The index is built once at load and kept current through the operations listener hooks.
+"""
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """
+    Split text into lowercase alphanumeric tokens.
+
+    Example:
+        >>> tokenize("Uber to the Airport!")
+        ['uber', 'to', 'the', 'airport']
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+class SearchIndex:
+    """
+    Inverted index from description tokens to records.
+
+    Attributes:
+        kind (str): The kind of record indexed ("expense" or "income")
+        postings (dict): Format: {token: set of record IDs}
+        records (dict): Format: {record ID: record}
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self.postings = {}
+        self.records = {}
+        self._vocabulary = []  # Sorted list of tokens, for prefix lookups
+        self._ids = {}  # Python object id -> record ID
+        self._next_id = 0
+
+    @classmethod
+    def build(cls, records, kind):
+        """
+        Build an index over a list of records.
+
+        Args:
+            records (list): List of Expense or Income objects
+            kind (str): "expense" or "income"
+
+        Returns:
+            SearchIndex: The populated index
+        """
+        index = cls(kind)
+        for record in records:
+            record_id = index._register(record)
+            for token in set(tokenize(record.description)):
+                index.postings.setdefault(token, set()).add(record_id)
+        # Sort the vocabulary once instead of inserting token by token
+        index._vocabulary = sorted(index.postings)
+        return index
+
+    def to_dict(self, positions):
+        """
+        Convert the index to plain data for the sidecar cache.
+
+        Args:
+            positions (dict): Format: {id(record): position in the ledger's list}; records
+                              are stored by position, so they can be re-linked on load
+
+        Returns:
+            dict: The index as lists and dicts of strings and numbers
+        """
+        return {
+            "kind": self.kind,
+            "next_id": self._next_id,
+            "records": [[record_id, positions[id(record)]] for record_id, record in self.records.items()],
+            "postings": {token: sorted(record_ids) for token, record_ids in self.postings.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, records):
+        """
+        Create an index from data returned by to_dict.
+
+        Args:
+            data (dict): The stored index
+            records (list): The ledger's records, in the order positions refer to
+
+        Returns:
+            SearchIndex: The index, pointing at the given record objects
+        """
+        index = cls(data["kind"])
+        index._next_id = data["next_id"]
+        index.records = {record_id: records[position] for record_id, position in data["records"]}
+        index.postings = {token: set(record_ids) for token, record_ids in data["postings"].items()}
+        index._vocabulary = sorted(index.postings)
+        # Object ids are only meaningful in this process, so they are rebuilt
+        index._ids = {id(record): record_id for record_id, record in index.records.items()}
+        return index
+
+    def _register(self, record):
+        record_id = self._next_id
+        self._next_id += 1
+        self.records[record_id] = record
+        self._ids[id(record)] = record_id
+        return record_id
+
+    def add(self, record):
+        """
+        Add a record to the index.
+
+        Args:
+            record (Expense or Income): The record to add
+        """
+        record_id = self._register(record)
+        for token in set(tokenize(record.description)):
+            if token not in self.postings:
+                self.postings[token] = set()
+                insort(self._vocabulary, token)
+            self.postings[token].add(record_id)
+
+    def remove(self, record):
+        """
+        Remove a record from the index.
+
+        Args:
+            record (Expense or Income): The record to remove
+        """
+        record_id = self._ids.pop(id(record), None)
+        if record_id is None:
+            return
+        del self.records[record_id]
+        for token in set(tokenize(record.description)):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(record_id)
+            if not posting:
+                del self.postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def apply(self, action, kind, record, index=None):
+        """
+        Listener callback that keeps the index in sync with the ledger.
+
+        Args:
+            action (str): "add" or "delete"
+            kind (str): "expense" or "income"
+            record (Expense or Income): The changed record
+            index (int): Position of the record in its list (unused)
+        """
+        if kind != self.kind:
+            return
+        if action == "add":
+            self.add(record)
+        elif action == "delete":
+            self.remove(record)
+
+    def _prefix_matches(self, prefix):
+        # Union of the posting lists of every token starting with prefix
+        matches = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            matches |= self.postings[self._vocabulary[position]]
+            position += 1
+        return matches
+
+    def search(self, query):
+        """
+        Find records whose description contains every term of the query.
+
+        Each term matches as a prefix, so "air" finds "airport".
+
+        Args:
+            query (str): One or more search terms
+
+        Returns:
+            list: Matching records in the order they were added
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        posting_sets = sorted((self._prefix_matches(term) for term in set(terms)), key=len)
+        result = posting_sets[0]
+        for posting in posting_sets[1:]:
+            if not result:
+                break
+            result = result & posting
+        return [self.records[record_id] for record_id in sorted(result)]
+
+def view_search_results(results, query):
+    """
+    Display the records found by a search.
+
+    Args:
+        results (list): List of Expense or Income objects
+        query (str): The search query
+    """
+    if not results:
+        print(f"No matches found for '{query}'.")
+        return
+
+    print(f"\n--- Search Results for '{query}' ---")
+    print("Date       | Category    | Description                | Amount")
+    print("-" * 70)
+    total = 0
+    for record in results:
+        print(f"{record.date} | {record.category:<10}  | {record.description:<25}  | {format_amount(record.amount, record.currency)}")
+        total += record_amount(record)
+    print("-" * 70)
+    print(f"{len(results)} match(es), total {format_amount(total)}")
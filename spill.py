@@ -0,0 +1,178 @@
+import heapq
+import pickle
+import sys
+import tempfile
+from itertools import groupby
+
+"""
+Dezy's Budget Tracker - Spill Module
+
+This module keeps group-by and sort operations within a memory cap, so reports
+and exports over very large ledgers finish on small machines.
+
+Both operations work in memory until their estimated footprint reaches the cap.
+Then the partial result is sorted and written to a temporary file (a "run"),
+memory is released, and work continues. At the end the runs are merged with
+heapq.merge, which holds one batch per run in memory at a time:
+- group_totals spills partial (key, total, count) aggregates and adds up equal
+  keys while merging, so high-cardinality keys (per-merchant categories) work
+- sort_external spills sorted runs of items (an external merge sort)
+
+Sizes are estimates (sys.getsizeof plus container overhead), not measurements;
+the cap bounds the working set, not the whole process. Runs are anonymous
+temporary files, removed when the operation finishes or is abandoned.
+"""
+
+DEFAULT_MEMORY_CAP = 64 * 1024 * 1024
+# Items per pickled batch in a run file: larger batches are faster, smaller ones use less memory while merging
+RUN_BATCH_SIZE = 1024
+# Estimated bytes of one grouped entry besides its key: dict slot, [total, count] list, float and int
+GROUP_ENTRY_OVERHEAD = 160
+
+# The memory cap for group-by and sort operations, in bytes
+_memory_cap = DEFAULT_MEMORY_CAP
+
+def set_memory_cap(cap):
+    """
+    Set the memory cap used by group_totals and sort_external.
+
+    Args:
+        cap (int): The cap in bytes
+
+    Raises:
+        ValueError: If the cap is not positive
+    """
+    global _memory_cap
+    if cap <= 0:
+        raise ValueError("Memory cap must be greater than 0")
+    _memory_cap = cap
+
+def get_memory_cap():
+    """
+    Get the memory cap in bytes.
+    """
+    return _memory_cap
+
+def _item_size(item):
+    # Shallow size plus the size of each field, for tuples and lists of scalars and dicts of them
+    size = sys.getsizeof(item)
+    if isinstance(item, (tuple, list)):
+        size += sum(sys.getsizeof(field) for field in item)
+    elif isinstance(item, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in item.items())
+    return size
+
+def _write_run(items):
+    # Write sorted items to an anonymous temporary file in pickled batches
+    run = tempfile.TemporaryFile()
+    for start in range(0, len(items), RUN_BATCH_SIZE):
+        pickle.dump(items[start:start + RUN_BATCH_SIZE], run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+def _read_run(run):
+    # Stream the items of a run back, one batch in memory at a time
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        yield from batch
+
+def _merge_runs(runs, key=None, reverse=False):
+    # Merge sorted runs, closing them when the merge is finished or abandoned
+    try:
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=key, reverse=reverse)
+    finally:
+        for run in runs:
+            run.close()
+
+def group_totals(pairs, cap=None, stats=None):
+    """
+    Sum amounts by key within a memory cap.
+
+    Args:
+        pairs (iterable): (key, amount) pairs; keys must be orderable and picklable
+        cap (int): Memory cap in bytes, or None for the module setting
+        stats (dict): Optional dict that receives {"runs": number of spilled runs}
+
+    Yields:
+        tuple: (key, total, count) for each key, in key order
+
+    Example:
+        >>> list(group_totals([("food", 5.0), ("bills", 20.0), ("food", 2.5)]))
+        [('bills', 20.0, 1), ('food', 7.5, 2)]
+    """
+    cap = cap or _memory_cap
+    groups = {}  # Format: {key: [total, count]}
+    used = 0
+    runs = []
+    for key, amount in pairs:
+        group = groups.get(key)
+        if group is None:
+            if used >= cap:
+                runs.append(_write_run(sorted((key, group[0], group[1]) for key, group in groups.items())))
+                groups = {}
+                used = 0
+            group = groups[key] = [0.0, 0]
+            used += sys.getsizeof(key) + GROUP_ENTRY_OVERHEAD
+        group[0] += amount
+        group[1] += 1
+    if stats is not None:
+        stats["runs"] = len(runs)
+
+    current = sorted((key, group[0], group[1]) for key, group in groups.items())
+    if not runs:
+        yield from current
+        return
+    del groups
+    runs.append(_write_run(current))
+    del current
+    # Equal keys from different runs arrive together; add up their partial aggregates
+    for key, partials in groupby(_merge_runs(runs, key=lambda entry: entry[0]), key=lambda entry: entry[0]):
+        total = 0.0
+        count = 0
+        for _, partial_total, partial_count in partials:
+            total += partial_total
+            count += partial_count
+        yield key, total, count
+
+def sort_external(items, key=None, reverse=False, cap=None, stats=None):
+    """
+    Sort items within a memory cap (an external merge sort).
+
+    The sort is stable, like sorted(): items with equal keys keep their input order.
+
+    Args:
+        items (iterable): The items to sort; they must be picklable
+        key (function): Sort key, as for sorted()
+        reverse (bool): Sort in descending order
+        cap (int): Memory cap in bytes, or None for the module setting
+        stats (dict): Optional dict that receives {"runs": number of spilled runs}
+
+    Yields:
+        Each item, in sorted order
+    """
+    cap = cap or _memory_cap
+    buffer = []
+    used = 0
+    runs = []
+    for item in items:
+        buffer.append(item)
+        used += _item_size(item)
+        if used >= cap:
+            buffer.sort(key=key, reverse=reverse)
+            runs.append(_write_run(buffer))
+            buffer = []
+            used = 0
+    if stats is not None:
+        stats["runs"] = len(runs)
+
+    buffer.sort(key=key, reverse=reverse)
+    if not runs:
+        yield from buffer
+        return
+    runs.append(_write_run(buffer))
+    del buffer
+    # heapq.merge prefers earlier runs on ties, and runs are in input order, so the sort stays stable
+    yield from _merge_runs(runs, key=key, reverse=reverse)
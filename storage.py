@@ -1,8 +1,350 @@
 import json
+import math
+import os
 from datetime import datetime
 from expense import Expense
 from budget import Budget
 from income import Income
+from recurring import RecurringRule
+from currency import RateTable, validate_currency
+from categorize import CategoryRule, UNCATEGORIZED
+from accounts import Account, SavingsGoal, DEFAULT_ACCOUNT
+from validation import (validate_dates, validate_amounts, validate_descriptions, validate_amount, validate_description,
+                        BAD_DATE, AMOUNT_MESSAGES, DESCRIPTION_MESSAGES)
+
+## Data directory--------------------------------------------------------------------------------------------------
+
+# Relative filenames are resolved against this directory ("" means the current directory)
+DATA_DIR = ""
+
+def set_data_dir(path):
+    """
+    Set the directory that relative storage filenames are resolved against.
+    
+    Used by profiles so each ledger keeps its files under its own root.
+    
+    Args:
+        path (str): The directory to use, or "" for the current directory
+    """
+    global DATA_DIR
+    if path:
+        os.makedirs(path, exist_ok=True)
+    DATA_DIR = path
+
+def _resolve(filename):
+    # Absolute paths are returned unchanged by os.path.join
+    return os.path.join(DATA_DIR, filename)
+
+## Save listeners--------------------------------------------------------------------------------------------------
+
+_save_listeners = []
+
+def add_save_listener(callback):
+    """
+    Register a callback that is called after ledger data has been written.
+    
+    The change feed publishes its pending events from here, so consumers only
+    see changes that are on disk, and the sidecar cache fingerprints the file
+    this process just wrote. The callback is called as callback(path), with the
+    resolved path of the file, after any ledger file is saved, the budget is
+    removed, or a multi-file commit finishes (once per file).
+    
+    Args:
+        callback (callable): The function to call after each save
+    """
+    if callback not in _save_listeners:
+        _save_listeners.append(callback)
+
+def remove_save_listener(callback):
+    """
+    Unregister a callback previously added with add_save_listener.
+    """
+    if callback in _save_listeners:
+        _save_listeners.remove(callback)
+
+def _notify_saved(filename):
+    path = _resolve(filename)
+    for callback in list(_save_listeners):
+        callback(path)
+
+## Row schemas----------------------------------------------------------------------------------------------------
+
+class RowError(ValueError):
+    """
+    Raised when a stored row does not match its schema.
+    
+    Attributes:
+        field (str): The field that failed, or None if the row itself is malformed
+        message (str): What was wrong with the field
+    """
+    def __init__(self, field, message):
+        super().__init__(f"{field}: {message}" if field else message)
+        self.field = field
+        self.message = message
+
+# Dates repeat heavily across a ledger, so each distinct string is validated once
+# Format: {stored string: zero-padded date, or None if invalid}
+_valid_dates = {}
+
+def _check_date(value):
+    # Older files may hold one-digit months and days; they load zero-padded
+    normalized = _valid_dates.get(value, False)
+    if normalized is False:
+        if not isinstance(value, str) or not value:
+            raise ValueError("Date must be a YYYY-MM-DD string")
+        normalized = _valid_dates[value] = validate_dates([value], allow_empty=False)[2][0]
+    if normalized is None:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD")
+    return normalized
+
+def _check_amount(value):
+    # Fast path: amounts written by save_expenses/save_incomes are already positive floats
+    if type(value) is float and 0 < value < math.inf:
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("Please enter a valid number")
+    amount = validate_amount(value)
+    if not math.isfinite(amount):
+        raise ValueError("Please enter a valid number")
+    return amount
+
+def _check_category(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Category cannot be empty")
+    return value
+
+def _check_description(value):
+    if not isinstance(value, str):
+        raise ValueError("Description must be text")
+    return validate_description(value)
+
+def _check_currency(value):
+    if not isinstance(value, str):
+        raise ValueError("Currency must be a three-letter code, e.g. USD")
+    return validate_currency(value)
+
+def _check_account(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Account must be a name")
+    return value.strip().lower()
+
+# Marks a schema field that has no default and must be present in every row
+REQUIRED = object()
+
+# Field order matches the Expense and Income constructors; a third item is the
+# default for rows written before the field existed
+RECORD_SCHEMA = (
+    ("date", _check_date),
+    ("amount", _check_amount),
+    ("category", _check_category, UNCATEGORIZED),  # Imported rows may have none; see categorize.py
+    ("description", _check_description),
+    ("currency", _check_currency, None),
+    ("account", _check_account, None)
+)
+
+def compile_row_schema(record_class, schema=RECORD_SCHEMA):
+    """
+    Build a converter that validates a stored row and creates a record in one pass.
+    
+    The schema is resolved once into a tuple of (key, check) pairs, so the per-row
+    work is one lookup and one check per field with no dictionary re-walking.
+    
+    Args:
+        record_class (type): The class to create (Expense or Income)
+        schema (tuple): Sequence of (field name, check function) pairs in constructor order,
+                        optionally with a third item used when the field is missing
+        
+    Returns:
+        function: convert(row) -> record, raising RowError for a bad row
+    """
+    fields = tuple((entry[0], entry[1], entry[2] if len(entry) > 2 else REQUIRED) for entry in schema)
+    
+    def convert(row):
+        values = []
+        for key, check, default in fields:
+            # Optional fields are usually absent, so test for them instead of catching KeyError
+            if default is not REQUIRED and isinstance(row, dict) and key not in row:
+                values.append(default)
+                continue
+            try:
+                value = row[key]
+            except KeyError:
+                raise RowError(key, "Missing field")
+            except TypeError:
+                raise RowError(None, "Row must be an object")
+            try:
+                values.append(check(value))
+            except (ValueError, TypeError) as e:
+                raise RowError(key, str(e))
+        return record_class(*values)
+    
+    return convert
+
+def _batch(validator, messages):
+    # Adapt a batch validator to a column check: (mask, error messages, values)
+    def check(values):
+        mask, codes, converted = validator(values)
+        return mask, [messages.get(code) for code in codes], converted
+    return check
+
+def _each(check):
+    # Adapt a single-value check to a column check, for fields without a batch validator
+    def check_column(values):
+        mask = []
+        messages = []
+        converted = []
+        for value in values:
+            try:
+                converted.append(check(value))
+            except (ValueError, TypeError) as e:
+                mask.append(False)
+                messages.append(str(e))
+                converted.append(None)
+                continue
+            mask.append(True)
+            messages.append(None)
+        return mask, messages, converted
+    return check_column
+
+# The record schema by column, for whole-file loads: each check validates a list of values
+# at once (see the batch validators in validation.py) and returns (mask, error messages, values)
+RECORD_COLUMN_SCHEMA = (
+    ("date", _batch(lambda values: validate_dates(values, allow_empty=False),
+                    {BAD_DATE: "Invalid date format. Please use YYYY-MM-DD"})),
+    ("amount", _batch(validate_amounts, AMOUNT_MESSAGES)),
+    ("category", _each(_check_category), UNCATEGORIZED),
+    ("description", _batch(validate_descriptions, DESCRIPTION_MESSAGES)),
+    ("currency", _each(_check_currency), None),
+    ("account", _each(_check_account), None)
+)
+
+def compile_column_schema(record_class, schema=RECORD_COLUMN_SCHEMA):
+    """
+    Build a converter that validates a whole list of stored rows column by column.
+    
+    Each field's values are gathered into one column and checked with a single
+    batch validator call, instead of one call per field per row. A row is
+    rejected for the first field (in schema order) that fails, as with
+    compile_row_schema.
+    
+    Args:
+        record_class (type): The class to create (Expense or Income)
+        schema (tuple): Sequence of (field name, column check) pairs in constructor order,
+                        optionally with a third item used when the field is missing
+        
+    Returns:
+        function: convert_rows(rows) -> (records, rejected), where rejected is a list
+                  of (row position, RowError) pairs
+    """
+    fields = tuple((entry[0], entry[1], entry[2] if len(entry) > 2 else REQUIRED) for entry in schema)
+    
+    def convert_rows(rows):
+        errors = {}  # Format: {row position: RowError}
+        for position, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors[position] = RowError(None, "Row must be an object")
+        
+        columns = []
+        for key, check, default in fields:
+            column = [default] * len(rows)
+            present = []
+            values = []
+            for position, row in enumerate(rows):
+                if position in errors:
+                    continue
+                if key in row:
+                    present.append(position)
+                    values.append(row[key])
+                elif default is REQUIRED:
+                    errors[position] = RowError(key, "Missing field")
+            mask, messages, converted = check(values)
+            for position, valid, message, value in zip(present, mask, messages, converted):
+                if valid:
+                    column[position] = value
+                else:
+                    errors[position] = RowError(key, message)
+            columns.append(column)
+        
+        records = [record_class(*values) for position, values in enumerate(zip(*columns)) if position not in errors]
+        return records, sorted(errors.items())
+    
+    return convert_rows
+
+_convert_expenses = compile_column_schema(Expense)
+_convert_incomes = compile_column_schema(Income)
+
+def _pad_dates(data, keys):
+    # Zero-pad the valid date fields of a stored dictionary, as the record loaders do
+    if isinstance(data, dict):
+        for key in keys:
+            if isinstance(data.get(key), str) and data[key]:
+                data[key] = validate_dates([data[key]])[2][0] or data[key]
+    return data
+
+def quarantine_filename(filename):
+    """
+    Get the name of the file that holds rows rejected while loading a file.
+    
+    Example:
+        >>> quarantine_filename("expenses.json")
+        'expenses.quarantine.json'
+    """
+    root, extension = os.path.splitext(filename)
+    return f"{root}.quarantine{extension or '.json'}"
+
+def _quarantine_key(entry):
+    # Rows are identified by their content and the reason they failed, not their position
+    return json.dumps([entry.get("data"), entry.get("field"), entry.get("error")], sort_keys=True, default=str)
+
+def _quarantine_rows(filename, rejected):
+    # Merge newly rejected rows into the quarantine file, keeping every earlier reject.
+    # A row already in the file keeps its first "quarantined" time, so loading the same
+    # bad file twice does not list its rows twice.
+    path = _resolve(quarantine_filename(filename))
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        entries = []
+    except ValueError:
+        # An unreadable quarantine file is set aside rather than overwritten
+        os.replace(path, f"{path}.{datetime.now().strftime('%Y%m%d%H%M%S')}.bad")
+        entries = []
+    if not isinstance(entries, list):
+        entries = [entries]
+    
+    seen = {_quarantine_key(entry) for entry in entries if isinstance(entry, dict)}
+    now = datetime.now().isoformat(timespec="seconds")
+    added = 0
+    for entry in rejected:
+        key = _quarantine_key(entry)
+        if key not in seen:
+            seen.add(key)
+            entries.append({**entry, "quarantined": now})
+            added += 1
+    if added:
+        _write_synced(path + ".tmp", entries)
+        os.replace(path + ".tmp", path)
+
+def _load_records(filename, convert_rows, quarantine):
+    # Shared loader: bad rows are reported instead of aborting the whole file
+    with open(_resolve(filename), "r") as f:
+        rows = json.load(f)
+    if not isinstance(rows, list):
+        raise ValueError(f"{filename} must contain a list of records")
+    
+    records, errors = convert_rows(rows)
+    rejected = [{"row": position, "field": e.field, "error": e.message, "data": rows[position]}
+                for position, e in errors]
+    
+    if rejected:
+        # Keep the bad rows on disk, since the next save rewrites the file without them
+        _quarantine_rows(filename, rejected)
+        if quarantine is not None:
+            quarantine.extend(rejected)
+    return records
+
+## Expenses--------------------------------------------------------------------------------------------------------
 
 #saving a list of expense objects to a JSON file
 def save_expenses(expenses, filename="expenses.json"):
@@ -11,26 +353,27 @@ def save_expenses(expenses, filename="expenses.json"):
 
     #write the JSON file
 
-    with open(filename, "w") as f: # "w" means write
+    with open(_resolve(filename), "w") as f: # "w" means write
         json.dump(expense_data, f, indent=4)
+    _notify_saved(filename)
 
-def load_expenses(filename="expenses.json"):
-    try:
-        with open(filename, "r") as f: # "r" means read
-            expenses_data = json.load(f)
-
-        #Convert Dictionary back into Expense object
-        expenses = []
-        for expense_dict in expenses_data:
-            expense = Expense(
-                date = expense_dict["date"],
-                amount = expense_dict["amount"],
-                category = expense_dict["category"],
-                description = expense_dict["description"]
-            )
-            expenses.append(expense)
+def load_expenses(filename="expenses.json", quarantine=None):
+    """
+    Load expenses from JSON file.
+    
+    Each row is validated against the record schema. Rows that fail are skipped
+    and added to the quarantine file (earlier rejects are kept) instead of
+    aborting the load.
+    
+    Args:
+        filename (str): Name of the file to load from
+        quarantine (list): Optional list that receives a report for each rejected row
         
-        return expenses
+    Returns:
+        list: List of Expense objects
+    """
+    try:
+        return _load_records(filename, _convert_expenses, quarantine)
     
     except FileNotFoundError:
         #if there is no file, the fuction will return an empty list
@@ -48,20 +391,31 @@ def save_budget(budget, filename="budget.json"):
     else:
         budget_data = {"amount": float(budget), "categories": {}}
         
-    with open(filename, "w") as f:
+    with open(_resolve(filename), "w") as f:
         json.dump(budget_data, f, indent=4)
+    _notify_saved(filename)
 
 def load_budget(filename="budget.json"):
     """
     Load budget from JSON file.
     """
     try:
-        with open(filename, "r") as f:
+        with open(_resolve(filename), "r") as f:
             budget_data = json.load(f)
         return Budget.from_dict(budget_data)
     except FileNotFoundError:
         return None
 
+def delete_budget(filename="budget.json"):
+    """
+    Remove the budget file, if there is one.
+    """
+    try:
+        os.remove(_resolve(filename))
+    except FileNotFoundError:
+        pass
+    _notify_saved(filename)
+
 ## Income--------------------------------------------------------------------------------------------------------
 
 def save_incomes(incomes, filename="incomes.json"):
@@ -74,35 +428,237 @@ def save_incomes(incomes, filename="incomes.json"):
     """
     income_data = [income.to_dict() for income in incomes]
     
-    with open(filename, "w") as f:
+    with open(_resolve(filename), "w") as f:
         json.dump(income_data, f, indent=4)
+    _notify_saved(filename)
 
-def load_incomes(filename="incomes.json"):
+def load_incomes(filename="incomes.json", quarantine=None):
     """
     Load incomes from JSON file.
     
+    Each row is validated against the record schema. Rows that fail are skipped
+    and added to the quarantine file (earlier rejects are kept) instead of
+    aborting the load.
+    
     Args:
         filename (str): Name of the file to load from
+        quarantine (list): Optional list that receives a report for each rejected row
         
     Returns:
         list: List of Income objects
     """
     try:
-        with open(filename, "r") as f:
-            incomes_data = json.load(f)
-            
-        incomes = []
-        for income_dict in incomes_data:
-            income = Income(
-                date=income_dict["date"],
-                amount=income_dict["amount"],
-                category=income_dict["category"],
-                description=income_dict["description"]
-            )
-            incomes.append(income)
+        return _load_records(filename, _convert_incomes, quarantine)
+    
+    except FileNotFoundError:
+        # If there is no file, the function will return an empty list
+        return []
+
+## Recurring--------------------------------------------------------------------------------------------------------
+
+def save_recurring(rules, filename="recurring.json"):
+    """
+    Save a list of recurring rules to a JSON file.
+    
+    Args:
+        rules (list): List of RecurringRule objects
+        filename (str): Name of the file to save to
+    """
+    rule_data = [rule.to_dict() for rule in rules]
+    
+    with open(_resolve(filename), "w") as f:
+        json.dump(rule_data, f, indent=4)
+    _notify_saved(filename)
+
+def load_recurring(filename="recurring.json"):
+    """
+    Load recurring rules from JSON file.
+    
+    Args:
+        filename (str): Name of the file to load from
         
-        return incomes
+    Returns:
+        list: List of RecurringRule objects
+    """
+    try:
+        with open(_resolve(filename), "r") as f:
+            rules_data = json.load(f)
+        return [RecurringRule.from_dict(_pad_dates(rule_dict, ("start_date", "last_date"))) for rule_dict in rules_data]
     
     except FileNotFoundError:
         # If there is no file, the function will return an empty list
-        return []
\ No newline at end of file
+        return []
+
+## Multi-file commits--------------------------------------------------------------------------------------------------
+
+# Journal of a multi-file commit whose files are written but not all in place yet
+COMMIT_JOURNAL = ".commit.json"
+
+def _write_synced(path, data):
+    # Write JSON and flush it to disk, so a crash cannot leave a half-written file behind a rename
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _finish_commit(journal):
+    # Move every written file into place, then drop the journal (safe to repeat)
+    with open(journal, "r") as f:
+        moves = json.load(f)
+    for temporary, path in moves:
+        if os.path.exists(temporary):
+            os.replace(temporary, path)
+    os.remove(journal)
+
+def commit_files(files):
+    """
+    Save several JSON files as one all-or-nothing change.
+    
+    Every file is first written in full to a temporary file; then a journal
+    listing the renames is written, and the temporary files replace the real
+    ones. If the process dies before the journal exists, no file has changed;
+    after it, recover_commit finishes the renames on the next load.
+    
+    Args:
+        files (list): (filename, JSON-serializable data) pairs
+    """
+    moves = []
+    for filename, data in files:
+        path = os.path.abspath(_resolve(filename))
+        _write_synced(path + ".tmp", data)
+        moves.append((path + ".tmp", path))
+    journal = _resolve(COMMIT_JOURNAL)
+    _write_synced(journal + ".tmp", moves)
+    os.replace(journal + ".tmp", journal)
+    _finish_commit(journal)
+    for filename, data in files:
+        _notify_saved(filename)
+
+def recover_commit(filename=COMMIT_JOURNAL):
+    """
+    Finish a multi-file commit interrupted after its journal was written.
+    
+    Returns:
+        bool: True if a commit was finished
+    """
+    journal = _resolve(filename)
+    if not os.path.exists(journal):
+        return False
+    _finish_commit(journal)
+    return True
+
+def save_recurring_batch(rules, expenses=None, incomes=None, filename="recurring.json"):
+    """
+    Save materialized recurring records together with the rules' last dates.
+    
+    The files are committed together (see commit_files), so a crash can never
+    leave new records saved without the rules' last_date, which would add them
+    again on the next run.
+    
+    Args:
+        rules (list): List of RecurringRule objects
+        expenses (list): List of Expense objects, or None if unchanged
+        incomes (list): List of Income objects, or None if unchanged
+        filename (str): Name of the recurring rules file
+    """
+    files = []
+    if expenses is not None:
+        files.append(("expenses.json", [expense.to_dict() for expense in expenses]))
+    if incomes is not None:
+        files.append(("incomes.json", [income.to_dict() for income in incomes]))
+    files.append((filename, [rule.to_dict() for rule in rules]))
+    commit_files(files)
+
+## Exchange rates--------------------------------------------------------------------------------------------------------
+
+def save_rates(rates, filename="rates.json"):
+    """
+    Save an exchange rate table to a JSON file.
+    
+    Args:
+        rates (RateTable): The rate table
+        filename (str): Name of the file to save to
+    """
+    with open(_resolve(filename), "w") as f:
+        json.dump(rates.to_dict(), f, indent=4)
+    _notify_saved(filename)
+
+def load_rates(filename="rates.json"):
+    """
+    Load the exchange rate table from a local JSON file.
+    
+    Returns:
+        RateTable: The rate table (base currency only if there is no file)
+        
+    Raises:
+        ValueError: If the file is not valid JSON or holds an invalid rate or date
+    """
+    try:
+        with open(_resolve(filename), "r") as f:
+            return RateTable.from_dict(json.load(f))
+    except FileNotFoundError:
+        return RateTable()
+    except ValueError as e:
+        raise ValueError(f"{filename}: {e}") from e
+
+## Category rules--------------------------------------------------------------------------------------------------------
+
+def save_category_rules(rules, filename="category_rules.json"):
+    """
+    Save a list of categorization rules to a JSON file.
+    
+    Args:
+        rules (list): List of CategoryRule objects, in priority order
+        filename (str): Name of the file to save to
+    """
+    with open(_resolve(filename), "w") as f:
+        json.dump([rule.to_dict() for rule in rules], f, indent=4)
+    _notify_saved(filename)
+
+def load_category_rules(filename="category_rules.json"):
+    """
+    Load categorization rules from JSON file.
+    
+    Returns:
+        list: List of CategoryRule objects, in priority order
+    """
+    try:
+        with open(_resolve(filename), "r") as f:
+            return [CategoryRule.from_dict(rule_dict) for rule_dict in json.load(f)]
+    except FileNotFoundError:
+        return []
+
+## Accounts and goals--------------------------------------------------------------------------------------------------------
+
+def save_accounts(accounts, goals, filename="accounts.json"):
+    """
+    Save the accounts and savings goals to a JSON file.
+    
+    Args:
+        accounts (list): List of Account objects
+        goals (list): List of SavingsGoal objects
+        filename (str): Name of the file to save to
+    """
+    with open(_resolve(filename), "w") as f:
+        json.dump({
+            "accounts": [account.to_dict() for account in accounts],
+            "goals": [goal.to_dict() for goal in goals]
+        }, f, indent=4)
+    _notify_saved(filename)
+
+def load_accounts(filename="accounts.json"):
+    """
+    Load the accounts and savings goals from JSON file.
+    
+    Returns:
+        tuple: (list of Account objects, list of SavingsGoal objects); a single
+               default checking account and no goals if there is no file
+    """
+    try:
+        with open(_resolve(filename), "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [Account(DEFAULT_ACCOUNT)], []
+    accounts = [Account.from_dict(account_dict) for account_dict in data.get("accounts", [])]
+    goals = [SavingsGoal.from_dict(_pad_dates(goal_dict, ("target_date",))) for goal_dict in data.get("goals", [])]
+    return accounts, goals
@@ -1,10 +1,215 @@
-from datetime import datetime
+import re
+
+## Batch validation------------------------------------------------------------------------------------------------
+# The batch validators check a whole column of values without raising: each returns a valid mask,
+# an error code per value (None when valid) and the converted values (None when invalid). Imports and
+# loads check millions of values this way; the single-value validators below are thin wrappers for the prompts.
+
+# Error codes
+NOT_A_NUMBER = "not_a_number"
+NOT_POSITIVE = "not_positive"
+BAD_DATE = "bad_date"
+NOT_TEXT = "not_text"
+EMPTY = "empty"
+TOO_LONG = "too_long"
+OUT_OF_RANGE = "out_of_range"
+
+# Messages shown for each code by the single-value validators
+AMOUNT_MESSAGES = {NOT_A_NUMBER: "Please enter a valid number", NOT_POSITIVE: "Amount must be greater than 0"}
+BUDGET_MESSAGES = {NOT_A_NUMBER: "Please enter a valid budget amount", NOT_POSITIVE: "Budget amount must be greater than 0"}
+INDEX_MESSAGES = {NOT_A_NUMBER: "Please enter a valid number", OUT_OF_RANGE: "Index out of range"}
+DESCRIPTION_MESSAGES = {NOT_TEXT: "Description must be text", EMPTY: "Description cannot be empty",
+                        TOO_LONG: "Description must be less than 100 characters"}
+
+MAX_DESCRIPTION_LENGTH = 100
+
+# Decimal numbers with an optional sign and exponent, with surrounding whitespace as float() allows
+_NUMBER = re.compile(r"\s*[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?\s*")
+_INTEGER = re.compile(r"\s*[+-]?[0-9]+\s*")
+# YYYY-MM-DD; one-digit months and days (which strptime("%Y-%m-%d") allowed, so older
+# files may hold them) are read and normalized to the zero-padded form
+_DATE = re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})")
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+def validate_amounts(values):
+    """
+    Validate a column of amounts without raising.
+    
+    Args:
+        values (iterable): Amount strings or numbers
+        
+    Returns:
+        tuple: (mask, codes, amounts) - lists of bool, error code or None, float or None
+        
+    Example:
+        >>> validate_amounts(["50.25", "-10", "abc"])
+        ([True, False, False], [None, 'not_positive', 'not_a_number'], [50.25, None, None])
+    """
+    match = _NUMBER.fullmatch
+    mask = []
+    codes = []
+    amounts = []
+    for value in values:
+        if type(value) is str:
+            amount = float(value) if match(value) else None
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                amount = float(value)
+            except OverflowError:  # An int too large for a float
+                amount = None
+        else:
+            amount = None
+        # NaN and overflowed exponents are not numbers the ledger can total
+        if amount is None or amount != amount or amount in (float("inf"), float("-inf")):
+            code = NOT_A_NUMBER
+        elif amount <= 0:
+            code = NOT_POSITIVE
+        else:
+            mask.append(True)
+            codes.append(None)
+            amounts.append(amount)
+            continue
+        mask.append(False)
+        codes.append(code)
+        amounts.append(None)
+    return mask, codes, amounts
+
+def _normalized_date(value):
+    # The zero-padded YYYY-MM-DD form of a valid date, or None
+    parts = _DATE.fullmatch(value)
+    if not parts:
+        return None
+    year, month, day = int(parts[1]), int(parts[2]), int(parts[3])
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return None
+    leap = month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    if day > _DAYS_IN_MONTH[month - 1] + leap:
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+def validate_dates(values, allow_empty=True):
+    """
+    Validate a column of YYYY-MM-DD dates without raising.
+    
+    Dates repeat heavily across a ledger, so each distinct string is checked once.
+    Valid dates are returned zero-padded ("2024-3-5" becomes "2024-03-05"), the
+    form every date comparison and period key in the ledger relies on.
+    
+    Args:
+        values (iterable): Date strings
+        allow_empty (bool): Treat empty values as valid (the prompts use today's date)
+        
+    Returns:
+        tuple: (mask, codes, dates) - lists of bool, error code or None, the normalized date or None
+        
+    Example:
+        >>> validate_dates(["2024-03-15", "2024-02-30", "", "2024-3-5"])
+        ([True, False, True, True], [None, 'bad_date', None, None], ['2024-03-15', None, '', '2024-03-05'])
+    """
+    seen = {}
+    mask = []
+    codes = []
+    dates = []
+    for value in values:
+        if not value:
+            normalized = value if allow_empty else None
+        elif type(value) is str:
+            normalized = seen.get(value, False)
+            if normalized is False:
+                normalized = seen[value] = _normalized_date(value)
+        else:
+            normalized = None
+        valid = normalized is not None
+        mask.append(valid)
+        codes.append(None if valid else BAD_DATE)
+        dates.append(normalized)
+    return mask, codes, dates
+
+def validate_descriptions(values):
+    """
+    Validate a column of descriptions without raising.
+    
+    Args:
+        values (iterable): Description strings
+        
+    Returns:
+        tuple: (mask, codes, descriptions) - lists of bool, error code or None, stripped text or None
+    """
+    mask = []
+    codes = []
+    descriptions = []
+    for value in values:
+        if type(value) is not str:
+            code = NOT_TEXT
+        else:
+            value = value.strip()
+            if not value:
+                code = EMPTY
+            elif len(value) > MAX_DESCRIPTION_LENGTH:
+                code = TOO_LONG
+            else:
+                mask.append(True)
+                codes.append(None)
+                descriptions.append(value)
+                continue
+        mask.append(False)
+        codes.append(code)
+        descriptions.append(None)
+    return mask, codes, descriptions
+
+def validate_indices(values, max_index):
+    """
+    Validate a column of list indices without raising.
+    
+    Args:
+        values (iterable): Index strings or integers
+        max_index (int): The length of the list (valid indices are 0 to max_index - 1)
+        
+    Returns:
+        tuple: (mask, codes, indices) - lists of bool, error code or None, int or None
+    """
+    match = _INTEGER.fullmatch
+    mask = []
+    codes = []
+    indices = []
+    for value in values:
+        if type(value) is str:
+            index = int(value) if match(value) else None
+        elif isinstance(value, int) and not isinstance(value, bool):
+            index = value
+        else:
+            index = None
+        if index is None:
+            code = NOT_A_NUMBER
+        elif not 0 <= index < max_index:
+            code = OUT_OF_RANGE
+        else:
+            mask.append(True)
+            codes.append(None)
+            indices.append(index)
+            continue
+        mask.append(False)
+        codes.append(code)
+        indices.append(None)
+    return mask, codes, indices
+
+def _single(result, messages):
+    # Unwrap a batch of one for the single-value validators, raising the code's message
+    mask, codes, values = result
+    if not mask[0]:
+        raise ValueError(messages[codes[0]])
+    return values[0]
+
+## Single values---------------------------------------------------------------------------------------------------
 
 #ensure date is a valid input
 def validate_date(date_str):
     """
     Validates if the input string is a valid date in YYYY-MM-DD format.
     
+    Month and day must have two digits, so an entered date can be stored as
+    typed (files written before this rule are normalized when loaded).
+    
     Args:
         date_str (str): The date string to validate
         
@@ -16,14 +221,10 @@ def validate_date(date_str):
         True
         >>> validate_date("invalid")
         False
+        >>> validate_date("2024-3-15")
+        False
     """
-    try:
-        if date_str:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            return True
-    except ValueError:
-        return False
-    return True  # Empty string is valid (will use today's date)
+    return validate_dates([date_str])[2][0] == date_str
 
 #ensure amount is a valid input
 def validate_amount(amount_str):
@@ -45,15 +246,7 @@ def validate_amount(amount_str):
         >>> validate_amount("-10")
         ValueError: Amount must be greater than 0
     """
-    try:
-        amount = float(amount_str)
-        if amount <= 0:
-            raise ValueError("Amount must be greater than 0")
-        return amount
-    except ValueError as e:
-        if str(e) == "Amount must be greater than 0":
-            raise
-        raise ValueError("Please enter a valid number")
+    return _single(validate_amounts([amount_str]), AMOUNT_MESSAGES)
 
 def validate_menu_choice(choice, valid_options):
     """
@@ -94,15 +287,7 @@ def validate_index(index_str, max_index):
         >>> validate_index("10", 5)
         ValueError: Index out of range
     """
-    try:
-        index = int(index_str)
-        if index < 0 or index >= max_index:
-            raise ValueError("Index out of range")
-        return index
-    except ValueError as e:
-        if str(e) == "Index out of range":
-            raise
-        raise ValueError("Please enter a valid number")
+    return _single(validate_indices([index_str], max_index), INDEX_MESSAGES)
 
 def validate_description(description):
     """
@@ -123,12 +308,7 @@ def validate_description(description):
         >>> validate_description("")
         ValueError: Description cannot be empty
     """
-    description = description.strip()
-    if not description:
-        raise ValueError("Description cannot be empty")
-    if len(description) > 100:
-        raise ValueError("Description must be less than 100 characters")
-    return description
+    return _single(validate_descriptions([description]), DESCRIPTION_MESSAGES)
 
 def validate_budget_amount(amount_str):
     """
@@ -149,12 +329,4 @@ def validate_budget_amount(amount_str):
         >>> validate_budget_amount("0")
         ValueError: Budget amount must be greater than 0
     """
-    try:
-        amount = float(amount_str)
-        if amount <= 0:
-            raise ValueError("Budget amount must be greater than 0")
-        return amount
-    except ValueError as e:
-        if str(e) == "Budget amount must be greater than 0":
-            raise
-        raise ValueError("Please enter a valid budget amount")
\ No newline at end of file
+    return _single(validate_amounts([amount_str]), BUDGET_MESSAGES)
\ No newline at end of file